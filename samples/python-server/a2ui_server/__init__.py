@@ -0,0 +1,51 @@
+"""Serving infrastructure for the Python A2UI sample server."""
+
+from .actions import ActionLanes, ResponseCache, Superseded
+from .backend import LocalBackend, MemoryBackend
+from .builder import Component, ComponentBuilder, Surface, SurfaceBuilder, SurfaceError
+from .connections import ConnectionManager, rss_bytes
+from .datamodel import DataModelMirror, diff
+from .encoding import dumps, set_encoder
+from .frames import SurfaceCache, sse
+from .hub import Broadcast, SlowConsumerPolicy, Subscription
+from .metrics import LoopLagMonitor, Metrics, MetricsMiddleware
+from .paging import ListPager
+from .pool import DeadlineExceeded, Disconnected, PoolFull, WorkPool
+from .replay import ReplayLog
+from .search import SearchIndex
+from .transport import TransportMiddleware
+
+__all__ = [
+    "ActionLanes",
+    "Broadcast",
+    "Component",
+    "ComponentBuilder",
+    "ConnectionManager",
+    "DataModelMirror",
+    "DeadlineExceeded",
+    "Disconnected",
+    "ListPager",
+    "LocalBackend",
+    "LoopLagMonitor",
+    "MemoryBackend",
+    "Metrics",
+    "MetricsMiddleware",
+    "PoolFull",
+    "ReplayLog",
+    "ResponseCache",
+    "SearchIndex",
+    "SlowConsumerPolicy",
+    "Subscription",
+    "Superseded",
+    "Surface",
+    "SurfaceBuilder",
+    "SurfaceCache",
+    "SurfaceError",
+    "TransportMiddleware",
+    "WorkPool",
+    "diff",
+    "dumps",
+    "rss_bytes",
+    "set_encoder",
+    "sse",
+]
@@ -0,0 +1,120 @@
+"""
+Action handling for interactive surfaces: latest-wins lanes and a response cache.
+
+A search box fires an action per keystroke, so a session typing "sushi" sends
+five searches where only the last answer matters. ActionLanes runs one action
+at a time per lane (a session and surface): starting a newer action cancels
+the older one at its next await, and the older request answers with nothing
+instead of a stale result.
+
+ResponseCache keeps recently computed responses (search rows, encoded
+frames) with LRU eviction and a TTL. Agents clear it when their dataset
+changes, since entries are only valid for the data they were built from.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class Superseded(Exception):
+    """A newer action on the same lane replaced this one before it finished."""
+
+
+class ActionLanes:
+    """Latest-wins execution: at most one running action per lane key."""
+
+    def __init__(self, settle_turns: int = 3):
+        """
+        `settle_turns`: event-loop turns an action waits before starting, so a
+        newer one already queued behind it can replace it first. On an idle
+        loop that costs microseconds; under load a turn takes as long as the
+        backlog, which is exactly when superseding pays off.
+        """
+        self.settle_turns = settle_turns
+        self._running: dict[Hashable, asyncio.Task] = {}
+        self.superseded = 0
+
+    async def run(self, key: Hashable | None, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `work()` on lane `key`, cancelling whatever that lane was running.
+
+        Raises Superseded if a newer action on the lane cancels this one. A key
+        of None runs `work` without a lane (callers that can't tell sessions
+        apart must not cancel each other's work).
+        """
+        if key is None:
+            return await work()
+        previous = self._running.get(key)
+        if previous is not None and not previous.done():
+            previous.cancel()
+            self.superseded += 1
+        task = asyncio.ensure_future(self._settle_then(work))
+        self._running[key] = task
+        try:
+            # wait() rather than awaiting the task, so a cancelled task reads as
+            # superseded while cancelling this caller (client gone) still propagates.
+            await asyncio.wait((task,))
+        finally:
+            if self._running.get(key) is task:
+                del self._running[key]
+            task.cancel()
+        if task.cancelled():
+            raise Superseded(key)
+        return task.result()
+
+    async def _settle_then(self, work: Callable[[], Awaitable[T]]) -> T:
+        for _ in range(self.settle_turns):
+            await asyncio.sleep(0)
+        return await work()
+
+    def __len__(self) -> int:
+        return len(self._running)
+
+
+class ResponseCache:
+    """LRU cache with a per-entry TTL, bounded by entry count and by the sizes given to put()."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int | None = None, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, object, int]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default=None):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._pop(key)
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value, size: int = 0) -> None:
+        """Cache `value`; `size` (e.g. len() of encoded frames) counts towards max_bytes."""
+        if key in self._entries:
+            self._pop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes and len(self._entries) > 1):
+            self._pop(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. because the data they were built from changed."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _pop(self, key: Hashable) -> None:
+        self._bytes -= self._entries.pop(key)[2]
+
+    def __len__(self) -> int:
+        return len(self._entries)
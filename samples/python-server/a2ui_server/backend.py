@@ -0,0 +1,243 @@
+"""
+Shared agent state and cross-process fan-out.
+
+Agents keep state that every worker must agree on (counters, last results) in
+a backend, and push updates to viewers by publishing on a channel. Whichever
+worker handles an action, the frame reaches the streams held by every worker.
+
+MemoryBackend keeps everything in this process: the default, and all that a
+single worker needs. LocalBackend shares one directory between the workers of
+`uvicorn --workers N` on one host:
+
+- state lives in a SQLite database in WAL mode; update() is a short
+  BEGIN IMMEDIATE transaction, so read-modify-write is atomic across workers.
+  It can wait up to the busy timeout for another worker's write, so handlers
+  on the event loop call aupdate(), which runs it on a thread;
+- each worker binds a Unix datagram socket in the directory, and publish()
+  sends the encoded frame once to every other worker's socket. The list of
+  sockets is read again whenever the directory changes, so a worker that has
+  just started receives the next frame published anywhere.
+
+Fan-out is best-effort, like the in-process slow-consumer policies: a frame
+for a worker whose socket buffer is full is dropped, so channels should carry
+whole values (or be followed by a snapshot), not patches that depend on every
+predecessor. A frame must fit in one datagram (about 200 KB by default).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+from typing import Any, AsyncIterator, Callable
+
+from .frames import sse
+from .hub import SlowConsumerPolicy, Subscription
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """State and channels for a single process."""
+
+    def __init__(self, queue_size: int = 16, policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST):
+        self._state: dict[str, Any] = {}
+        self._channels: dict[str, set[Subscription]] = {}
+        self._queue_size = queue_size
+        self._policy = SlowConsumerPolicy(policy)
+
+    def get(self, key: str, default=None):
+        return self._state.get(key, default)
+
+    def set(self, key: str, value) -> None:
+        self._state[key] = value
+
+    def update(self, key: str, fn: Callable[[Any], Any], default=None):
+        """Atomically replace the value at `key` with fn(current) and return it."""
+        value = fn(self._state.get(key, default))
+        self._state[key] = value
+        return value
+
+    async def aupdate(self, key: str, fn: Callable[[Any], Any], default=None):
+        """update() for handlers on the event loop; in memory it never waits."""
+        return self.update(key, fn, default)
+
+    def publish(self, channel: str, message: dict) -> None:
+        """Encode `message` once and deliver it to every subscriber of `channel`."""
+        self._deliver(channel, sse(message))
+
+    def subscribe(self, channel: str) -> Subscription:
+        sub = Subscription(self._queue_size, self._policy)
+        self._channels.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, channel: str, sub: Subscription) -> None:
+        sub.close()
+        subs = self._channels.get(channel)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._channels[channel]
+
+    async def stream(self, channel: str, snapshot: Callable[[], dict] | None = None) -> AsyncIterator[bytes]:
+        """
+        Frames published on `channel` for the lifetime of the iterator,
+        preceded by `snapshot()` taken after subscribing so nothing is missed.
+        """
+        sub = self.subscribe(channel)
+        try:
+            if snapshot is not None:
+                yield sse(snapshot())
+            while (frame := await sub.get()) is not None:
+                yield frame
+        finally:
+            self.unsubscribe(channel, sub)
+
+    def close(self) -> None:
+        for channel, subs in list(self._channels.items()):
+            for sub in tuple(subs):
+                self.unsubscribe(channel, sub)
+
+    def _deliver(self, channel: str, frame: bytes) -> None:
+        for sub in tuple(self._channels.get(channel, ())):
+            sub.offer(frame)
+            if sub.closed:
+                self.unsubscribe(channel, sub)
+
+
+class LocalBackend(MemoryBackend):
+    """State and channels shared by the worker processes on one host, via `directory`."""
+
+    def __init__(self, directory: str, worker: str | None = None, **kwargs):
+        """`worker` names this process's socket in the directory; it defaults to the pid."""
+        super().__init__(**kwargs)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        path = os.path.join(directory, "state.db")
+        self._db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        # Transactions get their own connection, one thread at a time, so get() on
+        # the loop never waits behind an update() running in aupdate()'s thread.
+        self._writer = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._writing = threading.Lock()
+        self._address = os.path.join(directory, f"worker-{worker or os.getpid()}.sock")
+        self._sock: socket.socket | None = None
+        self._peers: list[str] = []
+        self._peers_mtime = -1
+        self.dropped = 0
+
+    def get(self, key: str, default=None):
+        row = self._db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value) -> None:
+        self._db.execute("INSERT INTO state (key, value) VALUES (?, ?) "
+                         "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, json.dumps(value)))
+
+    def update(self, key: str, fn: Callable[[Any], Any], default=None):
+        """Blocks while another worker writes (up to the 5 s busy timeout); use aupdate() on the loop."""
+        with self._writing:
+            db = self._writer
+            # IMMEDIATE takes the write lock up front, so two workers can't both read the old value.
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+                value = fn(json.loads(row[0]) if row else default)
+                db.execute("INSERT INTO state (key, value) VALUES (?, ?) "
+                           "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, json.dumps(value)))
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        return value
+
+    async def aupdate(self, key: str, fn: Callable[[Any], Any], default=None):
+        """update() on a thread, so waiting for another worker's write doesn't stall the loop."""
+        return await asyncio.to_thread(self.update, key, fn, default)
+
+    def publish(self, channel: str, message: dict) -> None:
+        frame = sse(message)
+        self._deliver(channel, frame)
+        self._bind()
+        datagram = channel.encode() + b"\n" + frame
+        for peer in self._peer_addresses():
+            try:
+                self._sock.sendto(datagram, peer)
+            except BlockingIOError:
+                self.dropped += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                self._forget(peer)
+            except OSError:
+                logger.warning("Dropped %d-byte frame for %s on channel %s", len(datagram), peer, channel,
+                               exc_info=True)
+                self.dropped += 1
+
+    def subscribe(self, channel: str) -> Subscription:
+        self._bind()
+        return super().subscribe(channel)
+
+    def close(self) -> None:
+        super().close()
+        if self._sock is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self._sock.fileno())
+            except RuntimeError:
+                pass
+            self._sock.close()
+            self._sock = None
+            try:
+                os.unlink(self._address)
+            except FileNotFoundError:
+                pass
+        self._db.close()
+        with self._writing:
+            self._writer.close()
+
+    def _bind(self) -> None:
+        """Bind this worker's socket on first use, from inside the event loop."""
+        if self._sock is not None:
+            return
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        try:
+            os.unlink(self._address)  # left over from an earlier worker with our name
+        except FileNotFoundError:
+            pass
+        sock.bind(self._address)
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._on_readable)
+        self._sock = sock
+
+    def _on_readable(self) -> None:
+        while True:
+            try:
+                datagram = self._sock.recv(1 << 18)
+            except (BlockingIOError, InterruptedError):
+                return
+            channel, _, frame = datagram.partition(b"\n")
+            self._deliver(channel.decode(), frame)
+
+    def _peer_addresses(self) -> list[str]:
+        # Binding or removing a socket changes the directory's mtime, so one stat per
+        # publish notices a worker that has just started without listing every time.
+        mtime = os.stat(self.directory).st_mtime_ns
+        if mtime != self._peers_mtime:
+            self._peers = [
+                os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                if name.startswith("worker-") and name.endswith(".sock")
+                and os.path.join(self.directory, name) != self._address
+            ]
+            self._peers_mtime = mtime
+        return self._peers
+
+    def _forget(self, peer: str) -> None:
+        """A socket nobody is listening on belongs to a worker that exited."""
+        self._peers = [p for p in self._peers if p != peer]
+        try:
+            os.unlink(peer)
+        except FileNotFoundError:
+            pass
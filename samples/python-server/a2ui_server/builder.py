@@ -0,0 +1,322 @@
+"""
+Surface and component builders, the Python side of the .NET SurfaceBuilder.
+
+Agents describe a surface component by component and build() it once:
+
+    surface = (SurfaceBuilder("gallery")
+               .add("root", "Column", children=["title"], gap="16")
+               .add("title", "Text", text="Hello", variant="h1")
+               .build())
+    surfaces.define_surface(surface)
+
+build() checks the tree the way the renderer will read it and raises
+SurfaceError listing every problem: duplicate ids, no "root", references
+(`children`, a List's `template.componentId`, a tab's `contentId`) to ids
+that don't exist, reference cycles, and types outside the standard catalog
+(pass `allow_unknown` for deliberate custom types).
+
+The result is an immutable Surface holding the encoded prelude. Each
+component is encoded once, and updateComponents frames are assembled from
+those bytes, so delta() between two builds sends only the components that
+were added or changed without encoding anything again.
+"""
+
+import hashlib
+from typing import Iterable
+
+from .encoding import dumps
+
+STANDARD_CATALOG = frozenset({
+    "Text", "Image", "Icon", "Divider",
+    "Row", "Column", "Card", "List", "Tabs",
+    "Button", "TextField", "CheckBox", "ChoicePicker", "DateTimeInput", "Slider",
+    "Video", "AudioPlayer",
+    "StateMachine",
+})
+
+
+class SurfaceError(ValueError):
+    """A surface the renderer would not display as written. `problems` lists every one found."""
+
+    def __init__(self, surface_id: str, problems: list[str]):
+        super().__init__(f"surface {surface_id!r}: " + "; ".join(problems))
+        self.surface_id = surface_id
+        self.problems = problems
+
+
+class Component:
+    """One component as the renderer receives it, with its encoded JSON."""
+
+    __slots__ = ("id", "component", "props", "encoded")
+
+    def __init__(self, id: str, component: str, props: dict):
+        set_ = object.__setattr__
+        set_(self, "id", id)
+        set_(self, "component", component)
+        set_(self, "props", props)
+        set_(self, "encoded", dumps({"id": id, "component": component, **props}))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def references(self) -> list[str]:
+        """Ids of the components this one renders."""
+        refs = list(self.props.get("children") or ())
+        template = self.props.get("template")
+        if isinstance(template, dict) and "componentId" in template:
+            refs.append(template["componentId"])
+        for tab in self.props.get("tabs") or ():
+            if isinstance(tab, dict) and "contentId" in tab:
+                refs.append(tab["contentId"])
+        return refs
+
+    def __eq__(self, other):
+        return isinstance(other, Component) and self.encoded == other.encoded
+
+    def __hash__(self):
+        return hash(self.encoded)
+
+    def __repr__(self):
+        return f"Component({self.id!r}, {self.component!r})"
+
+
+class ComponentBuilder:
+    """Fluent builder for one component; the setters mirror the .NET ComponentBuilder."""
+
+    def __init__(self, id: str, component: str, **props):
+        self.id = id
+        self.component = component
+        self._props = props
+
+    def set(self, prop: str, value) -> "ComponentBuilder":
+        self._props[prop] = value
+        return self
+
+    def text(self, text: str) -> "ComponentBuilder":
+        return self.set("text", text)
+
+    def label(self, label: str) -> "ComponentBuilder":
+        return self.set("label", label)
+
+    def src(self, src: str) -> "ComponentBuilder":
+        return self.set("src", src)
+
+    def alt(self, alt: str) -> "ComponentBuilder":
+        return self.set("alt", alt)
+
+    def placeholder(self, placeholder: str) -> "ComponentBuilder":
+        return self.set("placeholder", placeholder)
+
+    def variant(self, variant: str) -> "ComponentBuilder":
+        return self.set("variant", variant)
+
+    def disabled(self, disabled: bool = True) -> "ComponentBuilder":
+        return self.set("disabled", disabled)
+
+    def value(self, value) -> "ComponentBuilder":
+        return self.set("value", value)
+
+    def children(self, *child_ids: str) -> "ComponentBuilder":
+        return self.set("children", list(child_ids))
+
+    def options(self, *options: str) -> "ComponentBuilder":
+        return self.set("options", list(options))
+
+    def title(self, title: str) -> "ComponentBuilder":
+        return self.set("title", title)
+
+    def action(self, event_name: str, context: dict | None = None) -> "ComponentBuilder":
+        event = {"name": event_name}
+        if context is not None:
+            event["context"] = context
+        return self.set("action", {"event": event})
+
+    def justify(self, justify: str) -> "ComponentBuilder":
+        return self.set("justify", justify)
+
+    def align(self, align: str) -> "ComponentBuilder":
+        return self.set("align", align)
+
+    def gap(self, gap: str) -> "ComponentBuilder":
+        return self.set("gap", gap)
+
+    def min(self, min: float) -> "ComponentBuilder":
+        return self.set("min", min)
+
+    def max(self, max: float) -> "ComponentBuilder":
+        return self.set("max", max)
+
+    def step(self, step: float) -> "ComponentBuilder":
+        return self.set("step", step)
+
+    def data(self, data_path: str) -> "ComponentBuilder":
+        return self.set("data", data_path)
+
+    def template(self, component_id: str) -> "ComponentBuilder":
+        return self.set("template", {"componentId": component_id})
+
+    def tabs(self, *tabs: tuple[str, str]) -> "ComponentBuilder":
+        """(label, content component id) pairs."""
+        return self.set("tabs", [{"label": label, "contentId": content_id} for label, content_id in tabs])
+
+    def build(self) -> Component:
+        return Component(self.id, self.component, dict(self._props))
+
+
+class SurfaceBuilder:
+    """Fluent builder for a surface's prelude: createSurface, its components and an initial data model."""
+
+    def __init__(self, surface_id: str, allow_unknown: Iterable[str] = ()):
+        self.surface_id = surface_id
+        self.allow_unknown = frozenset(allow_unknown)
+        self._catalog_id: str | None = None
+        self._send_data_model = False
+        self._theme: dict | None = None
+        self._data_model = None
+        self._components: list[Component] = []
+
+    def catalog_id(self, catalog_id: str) -> "SurfaceBuilder":
+        self._catalog_id = catalog_id
+        return self
+
+    def send_data_model(self, send: bool = True) -> "SurfaceBuilder":
+        self._send_data_model = send
+        return self
+
+    def theme(self, theme: dict) -> "SurfaceBuilder":
+        self._theme = theme
+        return self
+
+    def data_model(self, value) -> "SurfaceBuilder":
+        """The whole initial data model, sent after the components."""
+        self._data_model = value
+        return self
+
+    def add(self, id: str, component: str, **props) -> "SurfaceBuilder":
+        """Add a component; keyword arguments are its properties, named as on the wire."""
+        self._components.append(Component(id, component, props))
+        return self
+
+    def add_component(self, component: "ComponentBuilder | Component") -> "SurfaceBuilder":
+        self._components.append(component.build() if isinstance(component, ComponentBuilder) else component)
+        return self
+
+    def build(self) -> "Surface":
+        """Check the tree and encode it. Raises SurfaceError."""
+        problems = _check(self._components, self.allow_unknown)
+        if problems:
+            raise SurfaceError(self.surface_id, problems)
+        create = {"type": "createSurface", "surfaceId": self.surface_id}
+        if self._catalog_id is not None:
+            create["catalogId"] = self._catalog_id
+        if self._theme is not None:
+            create["theme"] = self._theme
+        if self._send_data_model:
+            create["sendDataModel"] = True
+        model = None
+        if self._data_model is not None:
+            model = {"type": "updateDataModel", "surfaceId": self.surface_id, "path": "/", "value": self._data_model}
+        return Surface(self.surface_id, tuple(self._components), create, model)
+
+
+class Surface:
+    """A built surface: its components and the encoded prelude, versioned by content."""
+
+    __slots__ = ("surface_id", "components", "prelude", "version", "_by_id", "_update_prefix")
+
+    def __init__(self, surface_id: str, components: tuple[Component, ...], create: dict, model: dict | None):
+        set_ = object.__setattr__
+        set_(self, "surface_id", surface_id)
+        set_(self, "components", components)
+        set_(self, "_by_id", {c.id: c for c in components})
+        set_(self, "_update_prefix", b'{"type":"updateComponents","surfaceId":' + dumps(surface_id) + b',"components":[')
+        frames = [b"data: " + dumps(create) + b"\n\n", self._update_frame(components)]
+        if model is not None:
+            frames.append(b"data: " + dumps(model) + b"\n\n")
+        body = b"".join(frames)
+        version = hashlib.blake2b(body, digest_size=8).hexdigest()
+        frames[-1] = f"id: {version}\n".encode() + frames[-1]
+        set_(self, "prelude", b"".join(frames))  # the last frame carries the version as its event id
+        set_(self, "version", version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getitem__(self, component_id: str) -> Component:
+        return self._by_id[component_id]
+
+    def __contains__(self, component_id: str) -> bool:
+        return component_id in self._by_id
+
+    def changed_since(self, previous: "Surface") -> list[Component]:
+        """Components that are new or differ from `previous`, in this surface's order."""
+        before = previous._by_id
+        return [c for c in self.components if c.id not in before or before[c.id].encoded != c.encoded]
+
+    def delta(self, previous: "Surface") -> bytes:
+        """
+        One updateComponents frame, with this version as its event id, taking
+        a client from `previous` to this surface; b"" when nothing changed.
+        Components that were removed are not sent: once nothing refers to them
+        the renderer no longer shows them.
+        """
+        changed = self.changed_since(previous)
+        if not changed:
+            return b""
+        return f"id: {self.version}\n".encode() + self._update_frame(changed)
+
+    def _update_frame(self, components: Iterable[Component]) -> bytes:
+        return b"data: " + self._update_prefix + b",".join(c.encoded for c in components) + b"]}\n\n"
+
+    def __repr__(self):
+        return f"Surface({self.surface_id!r}, {len(self.components)} components, version={self.version!r})"
+
+
+def _check(components: list[Component], allow_unknown: frozenset[str]) -> list[str]:
+    problems = []
+    by_id: dict[str, Component] = {}
+    for c in components:
+        if not isinstance(c.id, str) or not c.id:
+            problems.append(f"component id {c.id!r} must be a non-empty string")
+            continue
+        if c.id in by_id:
+            problems.append(f"duplicate id {c.id!r}")
+        by_id[c.id] = c
+        if c.component not in STANDARD_CATALOG and c.component not in allow_unknown:
+            problems.append(f"{c.id!r} has unknown component type {c.component!r}")
+    if components and "root" not in by_id:
+        problems.append("no component with id 'root'")
+
+    edges = {}  # only components that refer to others; the rest can't be on a cycle
+    for c in by_id.values():
+        refs = c.references()
+        for ref in refs:
+            if ref not in by_id:
+                problems.append(f"{c.id!r} refers to missing component {ref!r}")
+        if refs:
+            edges[c.id] = refs
+    problems.extend(f"reference cycle {' -> '.join(cycle)}" for cycle in _cycles(edges))
+    return problems
+
+
+def _cycles(edges: dict[str, list[str]]) -> list[list[str]]:
+    """Reference cycles found by a depth-first search, at least one for every loop."""
+    state: dict[str, int] = {}  # 1 on the current path, 2 finished
+    cycles = []
+    for start in edges:
+        if start in state:
+            continue
+        path, stack = [start], [iter(edges[start])]
+        state[start] = 1
+        while stack:
+            ref = next(stack[-1], None)
+            if ref is None:
+                state[path.pop()] = 2
+                stack.pop()
+            elif state.get(ref) == 1:
+                cycles.append(path[path.index(ref):] + [ref])
+            elif ref not in state and ref in edges:
+                state[ref] = 1
+                path.append(ref)
+                stack.append(iter(edges[ref]))
+    return cycles
@@ -0,0 +1,218 @@
+"""
+Connection manager for long-lived SSE streams.
+
+Every streaming endpoint hands its response to one ConnectionManager, which:
+
+- admits the stream against a global and a per-agent limit, answering 503
+  with Retry-After when either is reached;
+- sends keepalive comments to idle streams from one shared timer wheel, so an
+  idle stream holds no sleeping coroutine or timer of its own; a stream whose
+  last frame is still being written is not idle, and gets no keepalive;
+- closes a stream as soon as the server sees the client go away, and evicts
+  peers whose previous keepalive still hasn't been written one turn later,
+  or whose body write has been waiting for a whole keepalive interval;
+- reports open connections per agent and approximate memory per connection.
+
+The wheel has one slot per tick of the keepalive interval. New streams are
+spread across slots round-robin, so each tick touches about 1/slots of the
+open streams instead of all of them at once.
+"""
+
+import asyncio
+import os
+import time
+from typing import AsyncIterable
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+def rss_bytes() -> int | None:
+    """Resident memory of this process, or None where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Connection:
+    """One open stream as seen by the manager."""
+
+    __slots__ = ("agent", "slot", "last_write", "writing", "closed", "evicted", "_send", "_pending")
+
+    def __init__(self, agent: str, send: Send):
+        self.agent = agent
+        self.slot = -1
+        self.last_write = time.monotonic()  # when the latest write started
+        self.writing = 0  # writes waiting on send(); a keepalive must not go out between them
+        self.closed: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.evicted = False
+        self._send = send
+        self._pending: asyncio.Task | None = None
+
+    async def write(self, chunk: bytes) -> None:
+        self.last_write = time.monotonic()
+        self.writing += 1
+        try:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            self.writing -= 1
+
+    def close(self) -> None:
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+    async def _keepalive(self) -> None:
+        try:
+            await self.write(KEEPALIVE)
+        except OSError:
+            self.close()
+
+
+class ConnectionManager:
+    """Admission, keepalives and accounting for every open stream."""
+
+    def __init__(self, *, max_connections: int = 50_000, max_per_agent: int | None = None,
+                 keepalive_interval: float = 30.0, tick: float = 1.0, retry_after: int = 5):
+        self.max_connections = max_connections
+        self.max_per_agent = max_per_agent if max_per_agent is not None else max_connections
+        self.keepalive_interval = keepalive_interval
+        self.tick = tick
+        self.retry_after = retry_after
+        self._slots: list[set[Connection]] = [set() for _ in range(max(1, round(keepalive_interval / tick)))]
+        self._cursor = 0
+        self._placed = 0
+        self._task: asyncio.Task | None = None
+        self._per_agent: dict[str, int] = {}
+        self._baseline_rss = rss_bytes()
+        self.open = 0
+        self.peak = 0
+        self.rejected = 0
+        self.evicted = 0
+        self.keepalives = 0
+
+    def stream(self, agent: str, body: bytes | AsyncIterable[bytes] = b"",
+               media_type: str = "text/event-stream") -> Response:
+        """
+        A response that sends `body` (pre-encoded bytes, or an async iterable of
+        chunks) and then stays open until the client leaves. Returns a 503 with
+        Retry-After instead when a limit is reached.
+        """
+        if self.open >= self.max_connections or self._per_agent.get(agent, 0) >= self.max_per_agent:
+            self.rejected += 1
+            return Response(status_code=503, headers={"Retry-After": str(self.retry_after)})
+        if self.open == 0:
+            self._baseline_rss = rss_bytes()
+        # Count the stream now so a burst of requests can't all pass admission
+        # before the first of them starts streaming.
+        self.open += 1
+        self.peak = max(self.peak, self.open)
+        self._per_agent[agent] = self._per_agent.get(agent, 0) + 1
+        return ManagedStream(self, agent, body, media_type)
+
+    def stats(self) -> dict:
+        """Counters plus RSS growth per open stream since the manager was last idle (approximate)."""
+        rss = rss_bytes()
+        per_connection = None
+        if rss is not None and self._baseline_rss is not None and self.open:
+            per_connection = max(0, rss - self._baseline_rss) // self.open
+        return {
+            "open": self.open,
+            "peak": self.peak,
+            "perAgent": {agent: n for agent, n in self._per_agent.items() if n},
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+            "keepalives": self.keepalives,
+            "rssBytes": rss,
+            "rssBytesPerConnection": per_connection,
+        }
+
+    def _attach(self, conn: Connection) -> None:
+        conn.slot = (self._cursor + self._placed) % len(self._slots)
+        self._placed += 1
+        self._slots[conn.slot].add(conn)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def _release(self, conn: Connection | None, agent: str) -> None:
+        if conn is not None:
+            self._slots[conn.slot].discard(conn)
+        self.open -= 1
+        self._per_agent[agent] -= 1
+
+    async def _run(self) -> None:
+        try:
+            while any(self._slots):
+                await asyncio.sleep(self.tick)
+                self._turn()
+        finally:
+            self._task = None
+
+    def _turn(self) -> None:
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        now = time.monotonic()
+        recent = now - self.keepalive_interval / 2
+        stuck = now - self.keepalive_interval
+        for conn in tuple(self._slots[self._cursor]):
+            if (conn._pending is not None and not conn._pending.done()) or (conn.writing and conn.last_write < stuck):
+                # The last keepalive is still waiting on a full socket buffer, or
+                # a body write has waited on it for a whole keepalive interval.
+                conn.evicted = True
+                conn.close()
+                self.evicted += 1
+            elif conn.last_write < recent and not conn.writing:
+                conn._pending = asyncio.ensure_future(conn._keepalive())
+                self.keepalives += 1
+
+
+class ManagedStream(Response):
+    """The ASGI side of a stream admitted by a ConnectionManager."""
+
+    def __init__(self, manager: ConnectionManager, agent: str, body: bytes | AsyncIterable[bytes],
+                 media_type: str):
+        self.status_code = 200
+        self.media_type = media_type
+        self.background = None
+        self.init_headers()
+        self._manager = manager
+        self._agent = agent
+        self._body = body
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        conn = None
+        listener = pump = None
+        try:
+            conn = Connection(self._agent, send)
+            self._manager._attach(conn)
+            listener = asyncio.ensure_future(_wait_for_disconnect(receive))
+            listener.add_done_callback(lambda _: conn.close())
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if isinstance(self._body, bytes):
+                if self._body:
+                    await conn.write(self._body)
+            else:
+                pump = asyncio.ensure_future(_pump(self._body, conn))
+                pump.add_done_callback(lambda _: conn.close())
+            await conn.closed
+            if pump is not None and pump.done() and not pump.cancelled():
+                pump.result()  # re-raise a failed body iterator
+            if not conn.evicted and not listener.done():
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            for task in (listener, pump, conn and conn._pending):
+                if task is not None:
+                    task.cancel()
+            self._manager._release(conn, self._agent)
+
+
+async def _wait_for_disconnect(receive: Receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _pump(body: AsyncIterable[bytes], conn: Connection) -> None:
+    async for chunk in body:
+        await conn.write(chunk)
@@ -0,0 +1,181 @@
+"""
+Server-side data-model mirror and JSON-pointer diff engine.
+
+A DataModelMirror remembers the last value sent for each surface. Updating it
+with a new value at a path yields the smallest set of path-scoped
+updateDataModel messages that bring the client up to date, e.g. a single
+/pipeline/states/2/status change instead of the whole /pipeline subtree.
+
+The protocol has no "remove" operation, so removed object keys or a shrinking
+array fall back to replacing the enclosing container. A container is also
+replaced wholesale when the patch would encode larger than the container.
+
+Values are held by reference: don't mutate a value in place after sending it.
+Equality is Python equality, so a nested 1 -> true change inside otherwise
+equal containers is not detected.
+"""
+
+from .encoding import dumps
+
+_MISSING = object()
+
+# Fixed bytes around each patch: {"type":"updateDataModel","surfaceId":..,"path":..,"value":..}
+# plus SSE framing. Only used to weigh a patch against a full replace.
+_MESSAGE_OVERHEAD = len(b'data: {"type":"updateDataModel","surfaceId":"","path":"","value":}\n\n')
+
+
+def escape_token(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def split_pointer(path: str) -> list[str]:
+    """Split a JSON pointer into unescaped tokens. "" and "/" address the root."""
+    return [t.replace("~1", "/").replace("~0", "~") for t in path.split("/") if t]
+
+
+def join_pointer(tokens: list[str]) -> str:
+    return "/" + "/".join(escape_token(t) for t in tokens) if tokens else "/"
+
+
+def get_at(root, tokens: list[str]):
+    """Value at tokens, or _MISSING when the path does not resolve."""
+    current = root
+    for token in tokens:
+        if isinstance(current, dict):
+            current = current.get(token, _MISSING)
+        elif isinstance(current, list) and token.isdigit() and int(token) < len(current):
+            current = current[int(token)]
+        else:
+            return _MISSING
+        if current is _MISSING:
+            return _MISSING
+    return current
+
+
+def set_at(root, tokens: list[str], value):
+    """
+    Return a new root with value set at tokens.
+
+    Containers along the path are shallow-copied so values that were already
+    sent (and may be shared with other surfaces) are never mutated.
+    """
+    if not tokens:
+        return value
+    head, rest = tokens[0], tokens[1:]
+    if isinstance(root, list) and head.isdigit() and int(head) <= len(root):
+        index = int(head)
+        copy = list(root)
+        child = copy[index] if index < len(copy) else None
+        if index == len(copy):
+            copy.append(set_at(child, rest, value))
+        else:
+            copy[index] = set_at(child, rest, value)
+        return copy
+    copy = dict(root) if isinstance(root, dict) else {}
+    copy[head] = set_at(copy.get(head), rest, value)
+    return copy
+
+
+def diff(old, new, path: str = "", surface_id: str = "") -> list[tuple[str, object]]:
+    """
+    Patch operations turning `old` into `new`, as (path, value) pairs.
+
+    `path` is the pointer `old`/`new` live at ("" for the root). An empty list
+    means nothing changed.
+    """
+    ops: list[tuple[str, object]] = []
+    _diff(old, new, path, ops, _MESSAGE_OVERHEAD + len(surface_id))
+    return ops
+
+
+def _same(old, new) -> bool:
+    # bool is an int subclass, so True == 1 — but they encode differently.
+    return old is new or (type(old) is type(new) and old == new)
+
+
+def _diff(old, new, path: str, ops: list, overhead: int) -> None:
+    if _same(old, new):
+        return
+
+    child_ops: list[tuple[str, object]] = []
+    if isinstance(old, dict) and isinstance(new, dict):
+        if any(k not in new for k in old):
+            ops.append((path, new))
+            return
+        for key, value in new.items():
+            child_path = f"{path}/{escape_token(key)}"
+            previous = old.get(key, _MISSING)
+            if previous is _MISSING:
+                child_ops.append((child_path, value))
+            else:
+                _diff(previous, value, child_path, child_ops, overhead)
+    elif isinstance(old, list) and isinstance(new, list) and len(new) >= len(old):
+        # Find changed rows at C speed; rows shared by reference are skipped by `is`.
+        changed = [i for i, (a, b) in enumerate(zip(old, new)) if a is not b and a != b]
+        appended = len(new) - len(old)
+        if len(changed) + appended > max(8, len(new) // 2):
+            ops.append((path, new))
+            return
+        for i in changed:
+            _diff(old[i], new[i], f"{path}/{i}", child_ops, overhead)
+        for i in range(len(old), len(new)):
+            child_ops.append((f"{path}/{i}", new[i]))
+    else:
+        ops.append((path, new))
+        return
+
+    # Replace the whole container when that encodes no larger than the patch.
+    patch_cost = sum(overhead + len(p) + len(dumps(v)) for p, v in child_ops)
+    if not _encodes_larger_than(new, patch_cost - overhead - len(path or "/")):
+        ops.append((path, new))
+    else:
+        ops.extend(child_ops)
+
+
+def _encodes_larger_than(value, limit: int) -> bool:
+    """Whether dumps(value) exceeds `limit` bytes, stopping as soon as it does."""
+    if isinstance(value, dict):
+        size = 2
+        for key, child in value.items():
+            size += len(key) + 4 + len(dumps(child))
+            if size > limit:
+                return True
+        return False
+    if isinstance(value, list):
+        size = 2
+        for child in value:
+            size += len(dumps(child)) + 1
+            if size > limit:
+                return True
+        return False
+    return len(dumps(value)) > limit
+
+
+class DataModelMirror:
+    """The data model as last sent to the client(s) of one surface."""
+
+    def __init__(self, surface_id: str, initial: dict | None = None):
+        self.surface_id = surface_id
+        self.data = initial if initial is not None else {}
+
+    def reset(self, data: dict) -> None:
+        self.data = data
+
+    def update(self, path: str, value) -> list[dict]:
+        """Record `value` at `path` and return the updateDataModel messages to send."""
+        tokens = split_pointer(path)
+        old = get_at(self.data, tokens)
+        pointer = join_pointer(tokens)
+        if old is _MISSING:
+            ops = [(pointer, value)]
+        else:
+            ops = diff(old, value, pointer if tokens else "", self.surface_id)
+        self.data = set_at(self.data, tokens, value)
+        return [self._message(p or "/", v) for p, v in ops]
+
+    def snapshot(self) -> dict:
+        """A single message replacing the client's whole data model."""
+        return self._message("/", self.data)
+
+    def _message(self, path: str, value) -> dict:
+        return {"type": "updateDataModel", "surfaceId": self.surface_id, "path": path, "value": value}
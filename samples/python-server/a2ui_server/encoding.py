@@ -0,0 +1,35 @@
+"""
+JSON encoding for outgoing A2UI frames.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Call set_encoder() to plug in a different implementation.
+"""
+
+import json
+from typing import Callable
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+Encoder = Callable[[object], bytes]
+
+
+def stdlib_dumps(obj: object) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+DEFAULT_ENCODER: Encoder = orjson.dumps if orjson is not None else stdlib_dumps
+
+_encoder: Encoder = DEFAULT_ENCODER
+
+
+def set_encoder(encoder: Encoder | None) -> None:
+    """Replace the frame encoder. Passing None restores the default."""
+    global _encoder
+    _encoder = encoder or DEFAULT_ENCODER
+
+
+def dumps(obj: object) -> bytes:
+    return _encoder(obj)
@@ -0,0 +1,75 @@
+"""
+SSE framing and the pre-encoded surface cache.
+
+Static surfaces (createSurface + updateComponents, plus any initial data
+model) are encoded once into ready-to-send bytes and served from memory on
+every connect. An entry is only re-encoded when its definition changes.
+Surfaces built with SurfaceBuilder arrive already encoded.
+
+The last frame of a prelude carries the surface version as its SSE event id,
+so a client reconnecting with that `Last-Event-ID` can skip the prelude.
+"""
+
+import hashlib
+
+from .builder import Surface
+from .encoding import dumps
+
+
+def sse(data: dict, event_id: int | str | None = None) -> bytes:
+    if event_id is None:
+        return b"data: " + dumps(data) + b"\n\n"
+    return f"id: {event_id}\n".encode() + b"data: " + dumps(data) + b"\n\n"
+
+
+class SurfaceCache:
+    """Versioned, pre-encoded prelude frames keyed by surface id."""
+
+    def __init__(self):
+        self._entries: dict[str, tuple[str, bytes]] = {}
+
+    def define(self, surface_id: str, messages: list[dict], version: str | None = None) -> str:
+        """
+        Register the prelude for a surface and return its version.
+
+        With an explicit version, an unchanged version skips encoding entirely.
+        Without one, the version is a hash of the encoded frames, so redefining
+        a surface with identical content keeps the existing entry.
+        """
+        current = self._entries.get(surface_id)
+        if version is not None and current is not None and current[0] == version:
+            return version
+
+        frames = [sse(m) for m in messages]
+        if version is None:
+            version = hashlib.blake2b(b"".join(frames), digest_size=8).hexdigest()
+        if current is None or current[0] != version:
+            if frames:
+                frames[-1] = f"id: {version}\n".encode() + frames[-1]
+            self._entries[surface_id] = (version, b"".join(frames))
+        return version
+
+    def define_surface(self, surface: Surface) -> str:
+        """Register a built surface's prelude (see SurfaceBuilder) and return its version."""
+        current = self._entries.get(surface.surface_id)
+        if current is None or current[0] != surface.version:
+            self._entries[surface.surface_id] = (surface.version, surface.prelude)
+        return surface.version
+
+    def prelude(self, surface_id: str) -> bytes:
+        return self._entries[surface_id][1]
+
+    def resume(self, surface_id: str, last_event_id: str | None) -> bytes:
+        """The prelude, or nothing when the client already holds this version."""
+        version, body = self._entries[surface_id]
+        return b"" if last_event_id == version else body
+
+    def version(self, surface_id: str) -> str | None:
+        entry = self._entries.get(surface_id)
+        return entry[0] if entry else None
+
+    def invalidate(self, surface_id: str) -> None:
+        self._entries.pop(surface_id, None)
+
+    def __contains__(self, surface_id: str) -> bool:
+        return surface_id in self._entries
@@ -0,0 +1,186 @@
+"""
+Publish/subscribe hub for live surfaces.
+
+One producer coroutine per surface publishes updates; each update is encoded
+once and the same bytes are fanned out to every subscriber. Subscribers read
+from a bounded queue, and a slow-consumer policy decides what happens when a
+queue is full.
+
+Published frames carry SSE event ids and are kept in a ReplayLog, so a client
+that reconnects with `Last-Event-ID` resumes with just the frames it missed.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from enum import Enum
+from typing import AsyncIterator, Awaitable, Callable
+
+from starlette.requests import Request
+
+from .frames import sse
+from .replay import ReplayLog
+
+logger = logging.getLogger(__name__)
+
+Publish = Callable[[dict], None]
+Producer = Callable[[Publish], Awaitable[None]]
+
+
+class SlowConsumerPolicy(str, Enum):
+    """What to do when a subscriber's queue is full."""
+
+    DROP_OLDEST = "drop-oldest"  # discard the oldest queued frame
+    COALESCE = "coalesce"  # discard everything queued, resync to the latest state
+    DISCONNECT = "disconnect"  # close the subscription; the client reconnects
+
+
+class Subscription:
+    """A single subscriber's bounded frame queue."""
+
+    def __init__(self, maxsize: int, policy: SlowConsumerPolicy, resync: Callable[[], bytes] | None = None):
+        self._frames: deque[bytes] = deque()
+        self._maxsize = maxsize
+        self._policy = policy
+        self._resync = resync
+        self._wakeup = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+
+    def offer(self, frame: bytes) -> None:
+        if self.closed:
+            return
+        if len(self._frames) >= self._maxsize:
+            if self._policy is SlowConsumerPolicy.DISCONNECT:
+                self.close()
+                return
+            if self._policy is SlowConsumerPolicy.COALESCE:
+                self.dropped += len(self._frames)
+                self._frames.clear()
+                if self._resync is not None:
+                    frame = self._resync()
+            else:
+                self._frames.popleft()
+                self.dropped += 1
+        self._frames.append(frame)
+        self._wakeup.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wakeup.set()
+
+    async def get(self) -> bytes | None:
+        """Next frame, or None once the subscription is closed and drained."""
+        while not self._frames:
+            if self.closed:
+                return None
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        return self._frames.popleft()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+
+class Broadcast:
+    """
+    Runs `producer` while at least one subscriber is connected.
+
+    The producer receives a `publish(message)` callback. Late subscribers, and
+    coalescing ones that fell behind, are brought up to date with a single
+    resync frame: `snapshot()` when given (needed when published messages are
+    partial patches), otherwise the most recent frame. Resuming subscribers get
+    the frames they missed from `replay` instead, when those are still
+    buffered and no larger than the resync frame.
+    """
+
+    def __init__(self, producer: Producer, *, snapshot: Callable[[], dict] | None = None,
+                 queue_size: int = 16, policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST,
+                 replay: ReplayLog | None = None):
+        self._producer = producer
+        self._snapshot = snapshot
+        self._queue_size = queue_size
+        self._policy = SlowConsumerPolicy(policy)
+        self.replay = replay if replay is not None else ReplayLog()
+        self._subscribers: set[Subscription] = set()
+        self._task: asyncio.Task | None = None
+        self._resync_frame: bytes | None = None
+        self.latest: bytes | None = None
+
+    def publish(self, message: dict) -> None:
+        frame = self.replay.append(message)
+        self.latest = frame
+        self._resync_frame = None
+        for sub in tuple(self._subscribers):
+            sub.offer(frame)
+            if sub.closed:
+                self._subscribers.discard(sub)
+
+    def resync(self) -> bytes:
+        """One frame carrying the current state, encoded at most once per publish."""
+        if self._resync_frame is None:
+            if self._snapshot is None:
+                self._resync_frame = self.latest
+            else:
+                self._resync_frame = sse(self._snapshot(), event_id=self.replay.last_id)
+        return self._resync_frame
+
+    def can_resume(self, last_event_id: str | None) -> bool:
+        """
+        Whether a client that last saw `last_event_id` can be caught up from
+        this run without resending the surface's prelude.
+        """
+        return self.latest is not None and self.replay.issued(last_event_id)
+
+    def subscribe(self, last_event_id: str | None = None) -> Subscription:
+        sub = Subscription(self._queue_size, self._policy, self.resync)
+        if self.latest is not None:
+            frame = self._catch_up(last_event_id)
+            if frame:
+                sub.offer(frame)
+        self._subscribers.add(sub)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        sub.close()
+        self._subscribers.discard(sub)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self.latest = None
+            self._resync_frame = None
+            self.replay.reset()
+
+    async def stream(self, request: Request | None = None, last_event_id: str | None = None) -> AsyncIterator[bytes]:
+        """Subscribe for the lifetime of the iterator; unsubscribes on exit or disconnect."""
+        sub = self.subscribe(last_event_id)
+        try:
+            while (frame := await sub.get()) is not None:
+                yield frame
+                if request is not None and await request.is_disconnected():
+                    break
+        finally:
+            self.unsubscribe(sub)
+
+    def _catch_up(self, last_event_id: str | None) -> bytes:
+        """The missed frames as one chunk, or the resync frame if that is smaller."""
+        resync = self.resync()
+        missed = self.replay.since(last_event_id)
+        if missed is None or sum(map(len, missed)) > len(resync):
+            return resync
+        return b"".join(missed)
+
+    async def _run(self) -> None:
+        try:
+            await self._producer(self.publish)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Broadcast producer failed; closing %d subscribers", len(self._subscribers))
+            for sub in tuple(self._subscribers):
+                sub.close()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
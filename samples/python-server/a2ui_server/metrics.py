@@ -0,0 +1,345 @@
+"""
+Counters, gauges and histograms for the agent server, in Prometheus text format.
+
+Metrics is a small in-process registry: recording is a dict lookup and an
+add under the family's lock (the encoder is also timed on WorkPool threads),
+and nothing is formatted until /metrics is scraped. Values that other
+components already track (open streams, cache hits) are read at scrape time
+through callback gauges instead of being mirrored on every change.
+
+MetricsMiddleware meters every request under /agents/: response bytes and
+frames per agent and message type, and the latency of each action POST.
+Each outgoing chunk is split into frames at their blank lines and each frame
+is typed by the `data: {"type":"...` prefix every server message is encoded
+with, so a prelude encoded once and sent a thousand times counts a thousand
+times. timed() wraps the JSON
+encoder (see encoding.set_encoder) to record encode time; process-pool
+workers encode with the plain encoder, since their registry is a copy
+nobody scrapes.
+
+LoopLagMonitor samples event-loop lag, the delay every stream on the loop
+sees when something hogs it.
+
+With a trace file, every action and client error report is also written as
+a Chrome trace event (open it in Perfetto or chrome://tracing).
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MESSAGE_TYPES = ("createSurface", "updateComponents", "updateDataModel", "deleteSurface")
+_TYPE_MARKERS = tuple((t, f'data: {{"type":"{t}"'.encode()) for t in MESSAGE_TYPES)
+_FRAME_MARKER = b"data: "
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+ENCODE_BUCKETS = (5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05)
+
+# Label values that come from clients (error codes, agent paths) are capped
+# per label, so a misbehaving client can't create unbounded series.
+_MAX_LABEL_VALUES = 64
+_LABEL_VALUE = re.compile(r"[A-Za-z0-9_.-]{1,64}")
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def _label_text(self, values: tuple, extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(str(v))}"' for k, v in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = list(self.values.items())
+        return super().render() + [f"{self.name}{self._label_text(k)} {_number(v)}" for k, v in values]
+
+
+class Gauge(_Family):
+    """
+    A value read at scrape time from `read()`, as {label values: value} or a
+    bare number. kind="counter" exposes a cumulative count kept elsewhere.
+    """
+
+    def __init__(self, name: str, help: str, read: Callable[[], dict | float | None], labels: Iterable[str] = (),
+                 kind: str = "gauge"):
+        super().__init__(name, help, labels)
+        self.read = read
+        self.kind = kind
+
+    def render(self) -> list[str]:
+        value = self.read()
+        if value is None:
+            return []
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        return super().render() + [
+            f"{self.name}{self._label_text(k if isinstance(k, tuple) else (k,))} {_number(v)}" for k, v in items
+        ]
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket (+Inf last), sum].
+        self.values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bucket] += 1
+            series[1] += value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self.values.items()]
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{self._label_text(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """The server's metrics, plus an optional trace file."""
+
+    def __init__(self, trace_file: str | None = None):
+        self._families: list[_Family] = []
+        self.frames = self.counter("a2ui_frames_sent_total", "Frames sent, by agent and message type.",
+                                   ("agent", "type"))
+        self.bytes = self.counter("a2ui_bytes_sent_total", "Response body bytes sent, by agent and message type "
+                                  "(comment: keepalives), before compression.", ("agent", "type"))
+        self.actions = self.histogram("a2ui_action_seconds", "Action POST latency, until the response is sent.",
+                                      ("agent", "status"))
+        self.client_errors = self.counter("a2ui_client_errors_total", "Error reports received from clients.",
+                                          ("agent", "code"))
+        self.encode = self.histogram("a2ui_encode_seconds", "Time spent JSON-encoding one value.",
+                                     buckets=ENCODE_BUCKETS)
+        self.encoded_bytes = self.counter("a2ui_encoded_bytes_total", "Bytes produced by the JSON encoder.")
+        self._seen: dict[str, set[str]] = {}
+        self._trace = None
+        if trace_file:
+            self._trace = open(trace_file, "a", buffering=64 * 1024)
+            if self._trace.tell() == 0:
+                self._trace.write("[\n")  # the JSON array format; a missing "]" is allowed
+        self._pid = os.getpid()
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, read: Callable[[], dict | float | None], labels: Iterable[str] = (),
+              kind: str = "gauge") -> Gauge:
+        return self._register(Gauge(name, help, read, labels, kind))
+
+    def sent(self, agent: str, body: bytes) -> None:
+        """Count a response body chunk: its frames and their bytes, by message type."""
+        frames: dict[str, int] = {}
+        sizes: dict[str, int] = {}
+        pos, size = 0, len(body)
+        while pos < size:
+            end = body.find(b"\n\n", pos)
+            end = size if end < 0 else end + 2
+            data = body.find(_FRAME_MARKER, pos, end)
+            if data < 0:
+                message_type = "comment"
+            else:
+                message_type = next((t for t, marker in _TYPE_MARKERS if body.startswith(marker, data)), "other")
+                frames[message_type] = frames.get(message_type, 0) + 1
+            sizes[message_type] = sizes.get(message_type, 0) + end - pos
+            pos = end
+        for message_type, n in frames.items():
+            self.frames.inc((agent, message_type), n)
+        for message_type, n in sizes.items():
+            self.bytes.inc((agent, message_type), n)
+
+    def action(self, agent: str, status: int, start: float, end: float) -> None:
+        self.actions.observe((agent, str(status)), end - start)
+        if self._trace is not None:
+            self._event({"name": f"POST /agents/{agent}", "cat": "action", "ph": "X",
+                         "ts": start * 1e6, "dur": (end - start) * 1e6, "args": {"status": status}})
+
+    def client_error(self, agent: str, error: dict) -> None:
+        """Count an error report from a client's `error` envelope."""
+        code = self.bounded("code", str(error.get("code", "")))
+        self.client_errors.inc((agent, code))
+        if self._trace is not None:
+            self._event({"name": f"client error {code}", "cat": "client-error", "ph": "i", "s": "p",
+                         "ts": time.perf_counter() * 1e6,
+                         "args": {"agent": agent, "message": str(error.get("message", ""))[:200],
+                                  "surfaceId": error.get("surfaceId"), "path": error.get("path")}})
+
+    def bounded(self, label: str, value: str) -> str:
+        """`value` if it may be used for `label`, else "invalid" or (past the cap) "other"."""
+        seen = self._seen.setdefault(label, set())
+        if value in seen:
+            return value
+        if not _LABEL_VALUE.fullmatch(value):
+            return "invalid"
+        if len(seen) >= _MAX_LABEL_VALUES:
+            return "other"
+        seen.add(value)
+        return value
+
+    def timed(self, encoder: Callable[[object], bytes]) -> Callable[[object], bytes]:
+        """Wrap a JSON encoder so every call records its duration and output size."""
+        observe = self.encode.observe
+        count = self.encoded_bytes.inc
+        clock = time.perf_counter
+
+        def encode(obj: object) -> bytes:
+            start = clock()
+            data = encoder(obj)
+            observe((), clock() - start)
+            count((), len(data))
+            return data
+
+        return encode
+
+    def render(self) -> bytes:
+        lines = []
+        for family in self._families:
+            lines.extend(family.render())
+        return ("\n".join(lines) + "\n").encode()
+
+    def close(self) -> None:
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+    def _register(self, family):
+        self._families.append(family)
+        return family
+
+    def _event(self, event: dict) -> None:
+        event["pid"] = self._pid
+        event["tid"] = 0
+        self._trace.write(json.dumps(event, separators=(",", ":")) + ",\n")
+
+
+class LoopLagMonitor:
+    """
+    Event-loop lag: how late the loop runs a timer due every `interval`
+    seconds. Every frame, keepalive and tick on the loop waits about as long.
+    """
+
+    def __init__(self, metrics: Metrics, interval: float = 0.05, window: int = 200):
+        self.interval = interval
+        self.recent: deque[float] = deque(maxlen=window)
+        self.histogram = metrics.histogram("a2ui_event_loop_lag_seconds", "How late the event loop ran a timer.")
+        metrics.gauge("a2ui_event_loop_lag_max_seconds",
+                      f"Largest event-loop lag over the last {window * interval:g} seconds.",
+                      lambda: max(self.recent, default=0.0))
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._handle: asyncio.TimerHandle | None = None
+        self._due = 0.0
+
+    def start(self) -> None:
+        """Start sampling on the running loop (e.g. from the app's lifespan)."""
+        self._loop = asyncio.get_running_loop()
+        self._due = self._loop.time() + self.interval
+        self._handle = self._loop.call_at(self._due, self._tick)
+
+    def stop(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _tick(self) -> None:
+        now = self._loop.time()
+        lag = max(0.0, now - self._due)
+        self.histogram.observe((), lag)
+        self.recent.append(lag)
+        self._due = now + self.interval
+        self._handle = self._loop.call_at(self._due, self._tick)
+
+
+class MetricsMiddleware:
+    """Meters responses and action latency for requests under `prefix` (ASGI middleware)."""
+
+    def __init__(self, app: ASGIApp, metrics: Metrics, prefix: str = "/agents/"):
+        self.app = app
+        self.metrics = metrics
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not path.startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        agent = metrics.bounded("agent", path[len(self.prefix):].strip("/"))
+        status = 500
+
+        async def metered(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.body":
+                body = message.get("body")
+                if body:
+                    metrics.sent(agent, body)
+            elif message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        if scope["method"] != "POST":
+            await self.app(scope, receive, metered)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, metered)
+        finally:
+            metrics.action(agent, status, start, time.perf_counter())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if isinstance(value, int) or (isinstance(value, float) and value.is_integer() and abs(value) < 1e15):
+        return str(int(value))
+    return repr(float(value))
@@ -0,0 +1,36 @@
+"""
+Windowed delivery of list-backed data models.
+
+Instead of sending a whole dataset as one updateDataModel value, an agent
+sends a first window and loads further windows on demand (a loadMore-style
+action). A window is bounded both by row count and by encoded size, so a few
+very wide rows can't blow up a frame.
+"""
+
+from .encoding import dumps
+
+
+class ListPager:
+    """Cuts windows of at most `page_size` rows and roughly `byte_budget` encoded bytes."""
+
+    def __init__(self, page_size: int = 50, byte_budget: int = 32 * 1024):
+        self.page_size = page_size
+        self.byte_budget = byte_budget
+
+    def window(self, rows: list, offset: int = 0) -> list:
+        """The next window starting at `offset`. Never empty unless `rows` is exhausted."""
+        end = min(offset + self.page_size, len(rows))
+        size = 0
+        for i in range(offset, end):
+            size += len(dumps(rows[i])) + 1
+            if size > self.byte_budget and i > offset:
+                return rows[offset:i]
+        return rows[offset:end]
+
+    def extend(self, rows: list, loaded: int) -> tuple[list, dict]:
+        """
+        The rows to show once one more window is loaded after the first
+        `loaded`, plus a page summary for the data model.
+        """
+        shown = rows[:loaded + len(self.window(rows, loaded))]
+        return shown, {"loaded": len(shown), "total": len(rows), "hasMore": len(shown) < len(rows)}
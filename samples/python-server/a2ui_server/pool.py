@@ -0,0 +1,241 @@
+"""
+Off-event-loop execution for CPU-bound agent work.
+
+Everything an agent does runs on the one asyncio event loop, so a long search
+or a large encode delays every keepalive, broadcast tick and frame of every
+other stream. WorkPool runs declared CPU-bound steps elsewhere:
+
+- kind="thread": a thread pool. Workers share the process's data (indexes,
+  caches); the GIL still serializes Python code, but the loop gets it back
+  every switch interval (5 ms by default) instead of after the whole job.
+- kind="process": forked worker processes, fully parallel. Arguments and
+  results are pickled, and workers see module state as of the fork, so call
+  reset() after changing data that workers read.
+- kind="inline": run on the event loop, as if there were no pool.
+
+Each job is admitted against a bounded queue (PoolFull when it is full), has
+a deadline (DeadlineExceeded) and can be tied to the request's ASGI receive
+channel, so a client that disconnects abandons its job (Disconnected). A job
+that has not started yet is dropped; one already running can't be
+interrupted, and its result is discarded.
+
+Declare a step with the pool's decorator and await it like a coroutine:
+
+    pool = WorkPool(kind="thread", workers=2)
+
+    @pool.cpu_bound
+    def answer(query: str) -> bytes: ...
+
+    frames = await answer(query, receive=request.receive)
+"""
+
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import os
+import signal
+import stat
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from starlette.types import Receive
+
+from .connections import _wait_for_disconnect
+from .encoding import set_encoder
+
+KINDS = ("thread", "process", "inline")
+
+_DEFAULT: Any = object()
+
+
+class PoolFull(Exception):
+    """Every worker is busy and the queue is full; retry later."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The job did not finish before its deadline."""
+
+
+class Disconnected(Exception):
+    """The client went away before the job finished."""
+
+
+class WorkPool:
+    """A bounded thread, process or inline pool with deadlines and disconnect cancellation."""
+
+    def __init__(self, kind: str = "thread", workers: int = 2, max_queue: int = 64, deadline: float | None = None):
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {KINDS}, not {kind!r}")
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self._executor: Executor | None = None
+        self.pending = 0  # admitted and not finished: queued or running
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.abandoned = 0
+
+    @property
+    def shares_memory(self) -> bool:
+        """Whether jobs see (and may return) this process's objects without copying."""
+        return self.kind != "process"
+
+    def cpu_bound(self, fn: Callable) -> "Offloaded":
+        """Declare `fn` CPU-bound: calling it returns an awaitable that runs it on this pool."""
+        return Offloaded(self, fn)
+
+    async def run(self, fn: Callable, *args, deadline: float | None = _DEFAULT, receive: Receive | None = None):
+        """
+        `fn(*args)` on the pool. `deadline` (seconds, None for none) defaults to
+        the pool's. With `receive`, the job is abandoned when the client
+        disconnects.
+        """
+        if self.kind == "inline":
+            self.submitted += 1
+            result = fn(*args)
+            self.completed += 1
+            return result
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PoolFull(f"{self.pending} jobs pending")
+
+        loop = asyncio.get_running_loop()
+        future = self._get_executor().submit(fn, *args)
+        self.pending += 1
+        self.submitted += 1
+        # A running job keeps its worker busy even once abandoned, so it counts until it really ends.
+        future.add_done_callback(functools.partial(_on_loop, loop, self._finished))
+        result = asyncio.wrap_future(future)
+        watcher = asyncio.ensure_future(_wait_for_disconnect(receive)) if receive is not None else None
+        try:
+            done, _ = await asyncio.wait({result, watcher} - {None},
+                                         timeout=self.deadline if deadline is _DEFAULT else deadline,
+                                         return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            future.cancel()
+            result.add_done_callback(_discard)
+            self.abandoned += 1
+            raise
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+        if result in done:
+            self.completed += 1
+            return result.result()
+        future.cancel()  # drops the job if it hasn't started
+        result.add_done_callback(_discard)
+        if watcher in done:
+            self.abandoned += 1
+            raise Disconnected()
+        self.timed_out += 1
+        raise DeadlineExceeded(f"{getattr(fn, '__qualname__', fn)} took longer than its deadline")
+
+    def reset(self) -> None:
+        """Start fresh worker processes on the next job, so they see current module state."""
+        if self.kind == "process" and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def shutdown(self) -> None:
+        """Drop queued jobs and stop the workers, waiting for running jobs to end."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "pending": self.pending,
+            "queued": max(0, self.pending - self.workers),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timedOut": self.timed_out,
+            "abandoned": self.abandoned,
+        }
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="a2ui-pool")
+            else:
+                # Fork, so workers inherit the agents' data instead of re-importing the app.
+                fork = sys.platform != "win32"
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(
+                    "fork" if fork else "spawn"), initializer=_init_worker if fork else None)
+        return self._executor
+
+    def _finished(self) -> None:
+        self.pending -= 1
+
+
+class Offloaded:
+    """A function declared with WorkPool.cpu_bound. Calling it runs the function on the pool."""
+
+    def __init__(self, pool: WorkPool, fn: Callable):
+        functools.update_wrapper(self, fn)
+        self.pool = pool
+        self.fn = fn
+
+    def __call__(self, *args, deadline: float | None = _DEFAULT, receive: Receive | None = None):
+        if self.pool.kind == "process":
+            # The module attribute is this wrapper, not fn, so fn can't be pickled by name.
+            return self.pool.run(_call_declared, self.__module__, self.__qualname__, args,
+                                 deadline=deadline, receive=receive)
+        return self.pool.run(self.fn, *args, deadline=deadline, receive=receive)
+
+
+def _on_loop(loop: asyncio.AbstractEventLoop, callback: Callable, _future) -> None:
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:  # the loop has closed
+        pass
+
+
+def _discard(future: asyncio.Future) -> None:
+    if not future.cancelled():
+        future.exception()  # retrieved, so an abandoned job's error isn't logged as unhandled
+
+
+def _init_worker() -> None:
+    # A forked worker inherits the server's signal handlers, which would only
+    # set a flag on a server that isn't running here; SIGTERM and SIGINT
+    # should just end the worker.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # A timed encoder would record into this worker's copy of the metrics,
+    # which /metrics never reads.
+    set_encoder(None)
+    _release_sockets()
+
+
+def _release_sockets() -> None:
+    """
+    In a forked worker: point every inherited socket (the listener, client
+    connections, the loop's wakeup pair) at /dev/null. Otherwise a connection
+    the server closes stays open for as long as the worker holds it, and the
+    port stays bound if the server dies first. The descriptors stay valid, so
+    the worker's copies of their socket objects can't close someone else's.
+    """
+    devnull = os.open(os.devnull, os.O_RDWR)
+    fds = [int(fd) for fd in os.listdir("/proc/self/fd")] if os.path.isdir("/proc/self/fd") else range(3, 1024)
+    for fd in fds:
+        try:
+            if stat.S_ISSOCK(os.fstat(fd).st_mode):
+                os.dup2(devnull, fd)
+        except OSError:
+            pass
+    os.close(devnull)
+
+
+def _call_declared(module: str, qualname: str, args: tuple):
+    target = importlib.import_module(module)
+    for name in qualname.split("."):
+        target = getattr(target, name)
+    return target.fn(*args)
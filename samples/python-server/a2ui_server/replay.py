@@ -0,0 +1,78 @@
+"""
+Bounded replay log for resuming SSE streams.
+
+Every frame a live surface publishes gets a monotonically increasing event id
+and is kept in a ring buffer bounded by both message count and encoded bytes.
+A client that reconnects with `Last-Event-ID` is sent only the frames it
+missed, provided they are all still buffered; otherwise the caller falls back
+to a snapshot.
+
+Ids are integers seeded from the wall clock in microseconds, so ids from an
+earlier process (or an earlier run of the producer, see reset()) are always
+below the current floor and are never mistaken for a position in this log.
+"""
+
+import time
+from collections import deque
+from itertools import islice
+
+from .frames import sse
+
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+
+class ReplayLog:
+    """The last `max_messages` frames, and no more than `max_bytes` of them."""
+
+    def __init__(self, max_messages: int = 256, max_bytes: int = 256 * 1024):
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self._frames: deque[bytes] = deque()
+        self._bytes = 0
+        self._boot = self._floor = self.last_id = _now_us()
+
+    def append(self, message: dict) -> bytes:
+        """Frame `message` under the next id, buffer it and return the frame."""
+        self.last_id += 1
+        frame = sse(message, event_id=self.last_id)
+        self._frames.append(frame)
+        self._bytes += len(frame)
+        while len(self._frames) > self.max_messages or (self._bytes > self.max_bytes and len(self._frames) > 1):
+            self._bytes -= len(self._frames.popleft())
+        return frame
+
+    def since(self, last_event_id: str | None) -> list[bytes] | None:
+        """
+        Frames published after `last_event_id`, or None when they can't be
+        replayed (unknown id, a previous run, or already evicted).
+        """
+        last = self._parse(last_event_id)
+        if last is None or last <= self._floor or last > self.last_id:
+            return None
+        missed = self.last_id - last
+        if missed > len(self._frames):
+            return None
+        return list(islice(self._frames, len(self._frames) - missed, None))
+
+    def issued(self, last_event_id: str | None) -> bool:
+        """Whether `last_event_id` came from this log in this process."""
+        last = self._parse(last_event_id)
+        return last is not None and self._boot < last <= self.last_id
+
+    def reset(self) -> None:
+        """Start a new run: drop buffered frames and invalidate every earlier id."""
+        self._frames.clear()
+        self._bytes = 0
+        self._floor = self.last_id = max(self.last_id, _now_us())
+
+    @staticmethod
+    def _parse(last_event_id: str | None) -> int | None:
+        try:
+            return int(last_event_id) if last_event_id else None
+        except ValueError:
+            return None
+
+    def __len__(self) -> int:
+        return len(self._frames)
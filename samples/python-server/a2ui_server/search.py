@@ -0,0 +1,84 @@
+"""
+In-process substring search over agent datasets.
+
+SearchIndex lowercases the configured fields once per row and keeps trigram
+postings (row ids in insertion order, packed into arrays). A query reads the
+postings of its rarest trigram and checks only those candidates, instead of
+lowercasing every field of every row per request. Queries shorter than a
+trigram fall back to a scan of the pre-lowered text.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Sequence
+
+_SEPARATOR = "\x00"  # joins fields so a match can't span two of them
+
+
+class SearchIndex:
+    """Case-insensitive substring search over `fields` of a list of row dicts."""
+
+    def __init__(self, fields: Sequence[str], rows: Iterable[dict] = (), gram: int = 3):
+        self.fields = tuple(fields)
+        self.gram = gram
+        self._rows: list[dict | None] = []
+        self._text: list[str | None] = []
+        self._postings: dict[str, array] = {}
+        self._live = 0
+        for row in rows:
+            self.insert(row)
+
+    def insert(self, row: dict) -> int:
+        """Index a row and return its id, used for delete()."""
+        row_id = len(self._rows)
+        values = [str(row.get(field, "")).lower() for field in self.fields]
+        self._rows.append(row)
+        self._text.append(_SEPARATOR.join(values))
+        self._live += 1
+        postings = self._postings
+        for g in self._grams(values):
+            posting = postings.get(g)
+            if posting is None:
+                postings[g] = array("I", (row_id,))
+            else:
+                posting.append(row_id)
+        return row_id
+
+    def delete(self, row_id: int) -> None:
+        text = self._text[row_id]
+        if text is None:
+            raise KeyError(row_id)
+        for g in self._grams(text.split(_SEPARATOR)):
+            posting = self._postings[g]
+            del posting[bisect_left(posting, row_id)]
+            if not posting:
+                del self._postings[g]
+        self._rows[row_id] = None
+        self._text[row_id] = None
+        self._live -= 1
+
+    def search(self, query: str, limit: int | None = None) -> list[dict]:
+        """Rows where any indexed field contains `query`, in insertion order."""
+        q = query.lower()
+        text = self._text
+        if not q:
+            ids = [i for i, t in enumerate(text) if t is not None]
+        elif len(q) < self.gram:
+            ids = [i for i, t in enumerate(text) if t is not None and q in t]
+        else:
+            postings = [self._postings.get(g) for g in self._grams([q])]
+            if not all(postings):
+                return []
+            ids = [i for i in min(postings, key=len) if q in text[i]]
+        rows = self._rows
+        return [rows[i] for i in ids[:limit]]
+
+    def rows(self) -> list[dict]:
+        return [row for row in self._rows if row is not None]
+
+    def _grams(self, values: Iterable[str]) -> set[str]:
+        n = self.gram
+        return {v[i:i + n] for v in values for i in range(len(v) - n + 1)}
+
+    def __len__(self) -> int:
+        return self._live
@@ -0,0 +1,303 @@
+"""
+Transport negotiation and streaming compression for A2UI frame responses.
+
+The app always produces SSE (`text/event-stream`). TransportMiddleware picks
+the wire format per request:
+
+- `Accept` chooses SSE or JSON Lines (`application/jsonl`, one message per
+  line). JSONL has no event ids, so a JSONL client that reconnects gets the
+  prelude again; keepalive comments become empty lines.
+- `Accept-Encoding` chooses gzip, deflate or, when the brotli package is
+  installed, br. The compressor is flushed after every chunk the app sends,
+  and every chunk holds whole frames, so a client can decode each frame as
+  soon as it arrives.
+
+gzip and deflate are one raw deflate stream with the matching header and
+trailer. Deflate blocks that end in a sync flush can be concatenated, so a
+chunk compressed on its own can be spliced into any stream. A stream's first
+chunk (usually a cached prelude or search answer, sent to many clients) and
+the first chunk after a keepalive are compressed that way and shared through
+an LRU cache. Later chunks go through the stream's own compressor so they can
+refer back to earlier frames.
+
+The level follows chunk size (see LEVELS): large chunks get a fast level,
+because compression time dominates their latency and repetitive payloads
+compress well anyway; small ones a thorough level, which costs next to
+nothing. A shared chunk is recompressed at the thorough level once it is
+reused, since that cost is paid once for every client.
+
+Per-stream compressors use an 8 KiB window, which loses nothing on live
+frames and holds about 70 KiB instead of 260 KiB, and an idle stream drops
+its compressor after a keepalive, so thousands of quiet streams don't each
+hold deflate state.
+"""
+
+import struct
+import zlib
+from functools import lru_cache
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .actions import ResponseCache
+from .metrics import Metrics
+
+try:
+    import brotli
+except ImportError:  # optional: br is only offered when installed
+    brotli = None
+
+SSE = "text/event-stream"
+JSONL = "application/jsonl"
+
+# (largest chunk, level) pairs, first match wins.
+LEVELS = ((64 * 1024, 6), (None, 1))
+
+ENCODINGS = ("gzip", "br", "deflate") if brotli is not None else ("gzip", "deflate")
+
+_GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+_ZLIB_HEADER = b"\x78\x9c"
+_FINAL_BLOCK = b"\x03\x00"  # an empty last deflate block
+_STREAM_WBITS = 13
+_STREAM_MEM_LEVEL = 6
+
+
+def level_for(size: int, levels: tuple = LEVELS) -> int:
+    for limit, level in levels:
+        if limit is None or size <= limit:
+            return level
+    return levels[-1][1]
+
+
+@lru_cache(maxsize=256)
+def negotiate_format(accept: str) -> str:
+    """SSE unless `accept` prefers application/jsonl."""
+    if not accept:
+        return SSE
+    ranges = _parse(accept)
+    sse = _quality(ranges, SSE)
+    jsonl = _quality(ranges, JSONL)
+    return JSONL if jsonl > sse else SSE
+
+
+@lru_cache(maxsize=256)
+def negotiate_encoding(accept_encoding: str, available: tuple[str, ...] = ENCODINGS) -> str | None:
+    """The best of `available` for `accept_encoding`, or None for identity. Ties go to the earlier one."""
+    if not accept_encoding:
+        return None
+    codings = {name.lower(): q for name, q in _parse(accept_encoding)}
+    best, best_q = None, 0.0
+    for coding in available:
+        q = codings.get(coding, codings.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def sse_to_jsonl(chunk: bytes) -> bytes:
+    """Rewrite SSE frames as JSON lines: data fields kept, ids and comments dropped."""
+    start = chunk.find(b"data:")
+    end = chunk.find(b"\n", start)
+    if start >= 0 and end == len(chunk) - 2:
+        # Most chunks are one frame: slice out its data line without splitting.
+        start += 6 if chunk[start + 5:start + 6] == b" " else 5
+        return chunk[start:end + 1]
+    lines = [line[6:] if line.startswith(b"data: ") else line[5:]
+             for line in chunk.split(b"\n") if line.startswith(b"data:")]
+    return b"\n".join(lines) + b"\n" if lines else b"\n"
+
+
+class DeflateStream:
+    """One gzip or deflate (zlib) response body, compressed chunk by chunk."""
+
+    def __init__(self, coding: str, shared: ResponseCache, levels: tuple = LEVELS):
+        self.gzip = coding == "gzip"
+        self.shared = shared
+        self.levels = levels
+        self._checksum = zlib.crc32(b"") if self.gzip else zlib.adler32(b"")
+        self._size = 0
+        self._deflate = None
+        self._level = 0
+        self._fresh = True  # the next chunk is compressed on its own
+        self._header = _GZIP_HEADER if self.gzip else _ZLIB_HEADER
+
+    def compress(self, chunk: bytes) -> bytes:
+        """Compressed bytes for `chunk`, flushed so the client can decode all of it."""
+        self._checksum = zlib.crc32(chunk, self._checksum) if self.gzip else zlib.adler32(chunk, self._checksum)
+        self._size += len(chunk)
+        level = level_for(len(chunk), self.levels)
+        if self._fresh:
+            data = self._shared(chunk, level)
+            self._fresh = False
+        else:
+            if self._deflate is None or level != self._level:
+                self._deflate = zlib.compressobj(level, zlib.DEFLATED, -_STREAM_WBITS, _STREAM_MEM_LEVEL)
+                self._level = level
+            data = self._deflate.compress(chunk) + self._deflate.flush(zlib.Z_SYNC_FLUSH)
+        if self._header:
+            data = self._header + data
+            self._header = b""
+        return data
+
+    def idle(self) -> None:
+        """Release the compressor; the next chunk is compressed on its own."""
+        self._deflate = None
+        self._fresh = True
+
+    def finish(self) -> bytes:
+        data = self._header + (self._deflate.flush(zlib.Z_FINISH) if self._deflate is not None else _FINAL_BLOCK)
+        if self.gzip:
+            return data + struct.pack("<II", self._checksum & 0xFFFFFFFF, self._size & 0xFFFFFFFF)
+        return data + struct.pack(">I", self._checksum & 0xFFFFFFFF)
+
+    def _shared(self, chunk: bytes, level: int) -> bytes:
+        entry = self.shared.get(chunk)
+        if entry is not None:
+            level = max(level for _, level in self.levels)
+            if entry[0] >= level:
+                return entry[1]
+        deflate = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        data = deflate.compress(chunk) + deflate.flush(zlib.Z_SYNC_FLUSH)
+        self.shared.put(chunk, (level, data), len(chunk) + len(data))
+        return data
+
+
+class BrotliStream:
+    """One br response body. Quality is picked from the first chunk."""
+
+    def __init__(self, levels: tuple = LEVELS):
+        self.levels = levels
+        self._brotli = None
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self._brotli is None:
+            # Brotli quality 0-11; keep zlib's speed/ratio trade-off.
+            quality = 5 if level_for(len(chunk), self.levels) > 1 else 1
+            self._brotli = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality, lgwin=18)
+        return self._brotli.process(chunk) + self._brotli.flush()
+
+    def idle(self) -> None:
+        pass
+
+    def finish(self) -> bytes:
+        if self._brotli is None:
+            self._brotli = brotli.Compressor(quality=1)
+        return self._brotli.finish()
+
+
+class TransportMiddleware:
+    """
+    Negotiates SSE or JSONL and response compression for `text/event-stream`
+    responses under `prefix` (ASGI middleware). Responses that declare a
+    Content-Length under `min_size` are not compressed.
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str = "/agents/", min_size: int = 256, levels: tuple = LEVELS,
+                 encodings: tuple[str, ...] = ENCODINGS, shared_entries: int = 256,
+                 shared_bytes: int = 32 * 1024 * 1024, metrics: Metrics | None = None):
+        self.app = app
+        self.prefix = prefix
+        self.min_size = min_size
+        self.levels = levels
+        self.encodings = tuple(e for e in encodings if e != "br" or brotli is not None)
+        self.shared = ResponseCache(max_entries=shared_entries, max_bytes=shared_bytes, ttl=3600)
+        self._bytes_in = self._bytes_out = self._responses = None
+        if metrics is not None:
+            self._bytes_in = metrics.counter("a2ui_compression_input_bytes_total",
+                                             "Response bytes before compression, by encoding.", ("encoding",))
+            self._bytes_out = metrics.counter("a2ui_compression_output_bytes_total",
+                                              "Response bytes after compression, by encoding.", ("encoding",))
+            self._responses = metrics.counter("a2ui_responses_total", "Frame responses, by format and encoding.",
+                                              ("format", "encoding"))
+            metrics.gauge("a2ui_compression_shared_hits_total", "Chunks served from the shared compressed cache.",
+                          lambda: self.shared.hits, kind="counter")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope.get("path", "").startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        media = negotiate_format(request_headers.get("accept", ""))
+        coding = negotiate_encoding(request_headers.get("accept-encoding", ""), self.encodings)
+        stream = None
+        jsonl = False
+        passthrough = True
+
+        async def negotiated(message: Message) -> None:
+            nonlocal stream, jsonl, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if not headers.get("content-type", "").startswith(SSE) or "content-encoding" in headers:
+                    await send(message)
+                    return
+                jsonl = media == JSONL
+                length = headers.get("content-length")
+                use = coding if coding is not None and (length is None or int(length) >= self.min_size) else None
+                if use is not None:
+                    stream = BrotliStream(self.levels) if use == "br" else DeflateStream(use, self.shared, self.levels)
+                passthrough = not jsonl and stream is None
+                if self._responses is not None:
+                    self._responses.inc(("jsonl" if jsonl else "sse", use or "identity"))
+                raw = [(k, v) for k, v in message["headers"]
+                       if k not in (b"vary", b"content-type") and (passthrough or k != b"content-length")]
+                vary = ", ".join(filter(None, (headers.get("vary"), "Accept, Accept-Encoding")))
+                raw.append((b"vary", vary.encode("latin-1")))
+                content_type = (JSONL + "; charset=utf-8") if jsonl else headers["content-type"]
+                raw.append((b"content-type", content_type.encode("latin-1")))
+                if stream is not None:
+                    raw.append((b"content-encoding", use.encode()))
+                await send({**message, "headers": raw})
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if body and jsonl:
+                body = sse_to_jsonl(body)
+            if stream is not None:
+                raw_size = len(body)
+                keepalive = body[:1] == b":" or body == b"\n"
+                body = stream.compress(body) if body else b""
+                if keepalive:
+                    stream.idle()
+                if not more:
+                    body += stream.finish()
+                if self._bytes_in is not None:
+                    self._bytes_in.inc((coding,), raw_size)
+                    self._bytes_out.inc((coding,), len(body))
+            await send({"type": "http.response.body", "body": body, "more_body": more})
+
+        await self.app(scope, receive, negotiated)
+
+
+def _parse(header: str) -> list[tuple[str, float]]:
+    """(value, q) pairs from an Accept-style header."""
+    out = []
+    for part in header.split(","):
+        value, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, number = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        if value.strip():
+            out.append((value.strip(), q))
+    return out
+
+
+def _quality(ranges: list[tuple[str, float]], media: str) -> float:
+    """The q of the most specific range that matches `media`, or 0."""
+    kind = media.split("/")[0] + "/*"
+    best = -1, 0.0
+    for value, q in ranges:
+        value = value.lower()
+        specificity = 2 if value == media else 1 if value == kind else 0 if value == "*/*" else -1
+        if specificity > best[0]:
+            best = specificity, q
+    return best[1]
@@ -0,0 +1,6 @@
+"""
+Micro-benchmarks for the Python A2UI server.
+
+Run from samples/python-server, e.g.:
+    uv run python -m bench.prelude
+"""
@@ -0,0 +1,72 @@
+"""
+In-process ASGI driver for benchmarks.
+
+Calls the FastAPI app directly (no sockets) so results measure server work
+rather than the network stack.
+"""
+
+import asyncio
+import json
+
+
+def http_scope(method: str, path: str, headers: dict | None = None) -> dict:
+    return {
+        "type": "http", "http_version": "1.1", "method": method, "path": path,
+        "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "scheme": "http", "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+
+
+async def request(app, method: str, path: str, body: dict | None = None,
+                  headers: dict | None = None, until: int | None = None) -> tuple[int, bytes]:
+    """
+    Issue one request and return (status, body).
+
+    For streaming endpoints pass `until`: the client disconnects once that many
+    body bytes have arrived, the way a browser tab closing would.
+    """
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = dict(headers or {})
+    if body is not None:
+        headers["content-type"] = "application/json"
+    scope = http_scope(method, path, headers)
+    status = 0
+    chunks: list[bytes] = []
+    received = 0
+    done = asyncio.Event()
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, received
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            chunks.append(chunk)
+            received += len(chunk)
+            if (until is not None and received >= until) or not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def frames(body: bytes) -> list[dict]:
+    """Decode the JSON payloads of an SSE or JSONL body."""
+    out = []
+    for line in body.decode().splitlines():
+        if line.startswith("data:"):
+            line = line[5:]
+        line = line.strip()
+        if line and not line.startswith(":") and line.startswith("{"):
+            out.append(json.loads(line))
+    return out
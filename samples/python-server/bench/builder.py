@@ -0,0 +1,77 @@
+"""
+Defining and updating a surface with message dicts versus SurfaceBuilder.
+
+  define   time to turn the gallery's components into a cached prelude:
+           SurfaceCache.define on the message dicts, or SurfaceBuilder.build
+           (which also checks references, cycles and the catalog) plus
+           define_surface
+  update   one component's text changes: re-encoding the whole
+           updateComponents message, or Surface.delta between two builds
+
+    uv run python -m bench.builder [--rounds 2000]
+"""
+
+import argparse
+import time
+
+import server
+from a2ui_server import SurfaceBuilder, SurfaceCache, sse
+from bench.asgi import frames
+
+
+def specs(components: list[dict], title: str | None = None) -> list[tuple[str, str, dict]]:
+    """(id, type, props) for SurfaceBuilder.add, optionally with a new title text."""
+    out = []
+    for c in components:
+        props = {k: v for k, v in c.items() if k not in ("id", "component")}
+        if title is not None and c["id"] == "title":
+            props["text"] = title
+        out.append((c["id"], c["component"], props))
+    return out
+
+
+def build(spec: list[tuple[str, str, dict]]):
+    builder = SurfaceBuilder("gallery")
+    for id, component, props in spec:
+        builder.add(id, component, **props)
+    return builder.build()
+
+
+def timed(work, rounds: int) -> float:
+    start = time.perf_counter()
+    for i in range(rounds):
+        work(i)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main(rounds: int) -> None:
+    messages = frames(server.surfaces.prelude("gallery"))
+    components = messages[1]["components"]
+    cache = SurfaceCache()
+
+    def define_dicts(i):
+        cache.define("gallery", messages)
+
+    original = specs(components)
+
+    def define_built(i):
+        cache.define_surface(build(original))
+
+    before = build(original)
+    after = build(specs(components, "Renamed gallery"))
+    changed = [dict(c, text="Renamed gallery") if c["id"] == "title" else c for c in components]
+    full = sse({"type": "updateComponents", "surfaceId": "gallery", "components": changed})
+    delta = after.delta(before)
+
+    print(f"{len(components)} components")
+    print(f"{'define':<8} {'dicts':>10} {timed(define_dicts, rounds):>8.1f}µs")
+    print(f"{'define':<8} {'builder':>10} {timed(define_built, rounds):>8.1f}µs  (includes checks)")
+    encode_full = lambda i: sse({"type": "updateComponents", "surfaceId": "gallery", "components": changed})
+    print(f"{'update':<8} {'full':>10} {timed(encode_full, rounds):>8.1f}µs {len(full):>7} bytes")
+    print(f"{'update':<8} {'delta':>10} {timed(lambda i: after.delta(before), rounds):>8.1f}µs {len(delta):>7} bytes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    main(parser.parse_args().rounds)
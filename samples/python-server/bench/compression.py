@@ -0,0 +1,141 @@
+"""
+Bandwidth and CPU per connection for each negotiated transport.
+
+Runs the real frames through TransportMiddleware in-process:
+
+  gallery      connect, receive the gallery prelude, leave
+  live         state-machine prelude, then 100 small patch frames
+  10k rows     one updateDataModel carrying 10,000 contacts
+
+for SSE and JSONL, uncompressed and with each encoding, plus two gzip
+variants: a single fixed level instead of the size-based LEVELS, and no
+shared cache for first chunks. A second table shows the compressor state an
+open stream holds after the prelude, after live frames and after a keepalive.
+
+    uv run python -m bench.compression [--connections 300]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+
+import server
+from a2ui_server import DataModelMirror, TransportMiddleware, sse
+from a2ui_server.actions import ResponseCache
+from a2ui_server.connections import KEEPALIVE
+from a2ui_server.transport import DeflateStream, brotli
+
+
+def live_frames(n: int) -> list[bytes]:
+    model = DataModelMirror("state-machine", server.PIPELINE_INITIAL)
+    states = server.PIPELINE_STATES
+    frames = []
+    while len(frames) < n:
+        for step in range(len(states) + 1):
+            value = [{**s, "status": "completed" if i < step else "active" if i == step else "pending"}
+                     for i, s in enumerate(states)]
+            frames.extend(sse(m) for m in model.update("/pipeline", {
+                "title": "Order Processing Pipeline", "states": value, "statusMessage": f"Step {step + 1}"}))
+    return frames[:n]
+
+
+def contacts(n: int) -> bytes:
+    rng = random.Random(3)
+    first = ["Alice", "Bob", "Carol", "David", "Eve", "Frank", "Grace", "Heidi"]
+    last = ["Johnson", "Smith", "Williams", "Brown", "Davis", "Miller", "Wilson"]
+    rows = []
+    for i in range(n):
+        name = f"{rng.choice(first)} {rng.choice(last)}"
+        rows.append({"name": f"{name} {i}", "email": f"{name.lower().replace(' ', '.')}{i}@example.com",
+                     "department": rng.choice(["Engineering", "Marketing", "Sales", "Support"])})
+    return sse({"type": "updateDataModel", "surfaceId": "contacts", "path": "/contacts", "value": rows})
+
+
+def app_for(chunks: list[bytes]):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream; charset=utf-8")]})
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    return app
+
+
+async def connect(app, headers: list) -> int:
+    received = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal received
+        received += len(message.get("body", b""))
+
+    await app({"type": "http", "method": "GET", "path": "/agents/bench", "headers": headers}, receive, send)
+    return received
+
+
+CASES = [
+    ("sse", "identity", {}),
+    ("sse", "gzip", {}),
+    ("sse", "deflate", {}),
+    ("sse", "br", {}),
+    ("jsonl", "identity", {}),
+    ("jsonl", "gzip", {}),
+    ("sse", "gzip, level 6", {"levels": ((None, 6),)}),
+    ("sse", "gzip, unshared", {"shared_entries": 0}),
+]
+
+
+async def main(connections: int) -> None:
+    scenarios = {
+        "gallery": [server.surfaces.prelude("gallery")],
+        "live": [server.surfaces.prelude("state-machine"), *live_frames(100)],
+        "10k rows": [contacts(10_000)],
+    }
+    print(f"{'scenario':<9} {'format':<6} {'encoding':<15} {'bytes/conn':>11} {'ratio':>6} {'CPU/conn':>10}")
+    for scenario, chunks in scenarios.items():
+        raw = sum(len(c) for c in chunks)
+        n = max(50, connections * 4000 // raw) if scenario != "live" else connections
+        for media, encoding, options in CASES:
+            if encoding == "br" and brotli is None:
+                continue
+            app = TransportMiddleware(app_for(chunks), **options)
+            accept = b"application/jsonl" if media == "jsonl" else b"text/event-stream"
+            headers = [(b"accept", accept), (b"accept-encoding", encoding.split(",")[0].encode())]
+            await connect(app, headers)  # warm up (and fill the shared cache)
+            cpu = time.process_time()
+            sent = sum([await connect(app, headers) for _ in range(n)])
+            cpu = (time.process_time() - cpu) / n
+            print(f"{scenario:<9} {media:<6} {encoding:<15} {sent // n:>11,} {raw / (sent / n):>5.1f}x "
+                  f"{cpu * 1e6:>8.0f}µs", flush=True)
+
+    print(f"\n{'state held by an open gzip stream':<40} {'KiB':>6}")
+    prelude, frames = scenarios["live"][0], scenarios["live"][1:]
+    for label, chunks, idle in (("after the prelude", [prelude], False),
+                                ("after the prelude and 10 live frames", [prelude, *frames[:10]], False),
+                                ("... then a keepalive", [prelude, *frames[:10], KEEPALIVE], True)):
+        shared = ResponseCache()
+        DeflateStream("gzip", shared).compress(prelude)
+        tracemalloc.start()
+        streams = []
+        for _ in range(100):
+            stream = DeflateStream("gzip", shared)
+            for chunk in chunks:
+                stream.compress(chunk)
+            if idle:
+                stream.idle()
+            streams.append(stream)
+        held = tracemalloc.get_traced_memory()[0] / len(streams)
+        tracemalloc.stop()
+        print(f"{label:<40} {held / 1024:>6.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=300)
+    args = parser.parse_args()
+    asyncio.run(main(args.connections))
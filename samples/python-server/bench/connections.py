@@ -0,0 +1,143 @@
+"""
+Memory and CPU cost of holding many idle SSE streams.
+
+  legacy    StreamingResponse + a `while True: sleep; yield keepalive` loop per stream
+  managed   ConnectionManager: one shared timer wheel sends every keepalive
+
+Opens N idle /agents/gallery-style streams in-process, then reports heap and
+RSS per connection, CPU used per second while idle (with a short keepalive
+interval so keepalives actually fire during the window), and how long it takes
+for every stream to notice its client leaving. Each case runs in a fresh
+interpreter so RSS deltas aren't skewed by memory the other case freed.
+
+    uv run python -m bench.connections [--connections 50000] [--interval 5] [--idle 10]
+"""
+
+import argparse
+import asyncio
+import gc
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from fastapi.responses import StreamingResponse
+
+import server
+from a2ui_server import ConnectionManager, rss_bytes
+from bench.asgi import http_scope
+
+
+class Peer:
+    """An idle client: counts what it receives and disconnects on demand."""
+
+    __slots__ = ("received", "gone", "first")
+
+    def __init__(self):
+        self.received = 0
+        self.gone = asyncio.Event()
+        self.first = asyncio.Event()
+
+    async def receive(self) -> dict:
+        await self.gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message: dict) -> None:
+        if message["type"] == "http.response.body" and message.get("body"):
+            self.received += len(message["body"])
+            self.first.set()
+
+
+def mount_legacy(interval: float) -> None:
+    async def legacy():
+        async def generate():
+            yield server.surfaces.prelude("gallery")
+            while True:
+                await asyncio.sleep(interval)
+                yield ": keepalive\n\n"
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    server.app.add_api_route("/bench/legacy-idle", legacy, methods=["GET"])
+
+
+async def open_streams(path: str, peers: list[Peer]) -> list[asyncio.Task]:
+    tasks = []
+    for i, peer in enumerate(peers):
+        tasks.append(asyncio.ensure_future(server.app(http_scope("GET", path), peer.receive, peer.send)))
+        if i % 1000 == 999:
+            await asyncio.sleep(0)
+    for peer in peers:
+        await peer.first.wait()
+    return tasks
+
+
+async def close_streams(peers: list[Peer], tasks: list[asyncio.Task]) -> float:
+    start = time.perf_counter()
+    for peer in peers:
+        peer.gone.set()
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - start
+
+
+async def run_case(path: str, n: int, idle: float) -> dict:
+    peers = [Peer() for _ in range(n)]
+    gc.collect()
+    rss_before = rss_bytes() or 0
+    tasks = await open_streams(path, peers)
+    gc.collect()
+    rss = (rss_bytes() or 0) - rss_before
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    received_start = sum(p.received for p in peers)
+    await asyncio.sleep(idle)
+    cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+    keepalive_bytes = sum(p.received for p in peers) - received_start
+
+    teardown = await close_streams(peers, tasks)
+
+    # Python heap per stream, on a smaller sample: tracemalloc slows everything down.
+    # The fake clients are created first so they don't count towards the server.
+    peers = [Peer() for _ in range(min(n, 5000))]
+    gc.collect()
+    tracemalloc.start()
+    tasks = await open_streams(path, peers)
+    gc.collect()
+    heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    await close_streams(peers, tasks)
+
+    return {
+        "heap_per_conn": heap / len(peers),
+        "rss_per_conn": rss / n,
+        "cpu": cpu,
+        "keepalive_bytes": keepalive_bytes,
+        "teardown_ms": teardown * 1000,
+    }
+
+
+CASES = {"legacy": "/bench/legacy-idle", "managed": "/agents/gallery"}
+HEADER = f"{'case':<10} {'heap B/conn':>12} {'RSS B/conn':>11} {'idle CPU':>9} {'keepalive B':>12} {'teardown ms':>12}"
+
+
+async def main(case: str, n: int, interval: float, idle: float) -> None:
+    mount_legacy(interval)
+    server.connections = ConnectionManager(max_connections=n, keepalive_interval=interval)
+    r = await run_case(CASES[case], n, idle)
+    print(f"{case:<10} {r['heap_per_conn']:>12.0f} {r['rss_per_conn']:>11.0f} {r['cpu']:>8.1%} "
+          f"{r['keepalive_bytes']:>12} {r['teardown_ms']:>12.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=50_000)
+    parser.add_argument("--interval", type=float, default=5.0, help="keepalive interval in seconds")
+    parser.add_argument("--idle", type=float, default=10.0, help="seconds to sit idle while measuring CPU")
+    parser.add_argument("--case", choices=CASES, help="run one case in this process")
+    args = parser.parse_args()
+    if args.case:
+        asyncio.run(main(args.case, args.connections, args.interval, args.idle))
+    else:
+        print(f"{args.connections} idle streams, keepalive every {args.interval:g}s, {args.idle:g}s idle window")
+        print(HEADER, flush=True)
+        for case in CASES:
+            subprocess.run([sys.executable, "-m", "bench.connections", *sys.argv[1:], "--case", case], check=True)
@@ -0,0 +1,66 @@
+"""
+Bytes on the wire and encode time: full-subtree updateDataModel vs the
+DataModelMirror diff, for a small model (one state-machine tick) and a
+10k-row list (one row edited, rows appended, every row edited).
+
+    uv run python -m bench.datamodel [--rows 10000]
+"""
+
+import argparse
+import time
+
+from a2ui_server import DataModelMirror, sse
+
+
+def timed(fn, repeat: int) -> tuple[float, object]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1e6, result
+
+
+def compare(name: str, path: str, old_model: dict, new_value, repeat: int) -> None:
+    def full():
+        return sse({"type": "updateDataModel", "surfaceId": "bench", "path": path, "value": new_value})
+
+    def diffed():
+        mirror = DataModelMirror("bench", old_model)
+        return b"".join(sse(m) for m in mirror.update(path, new_value))
+
+    full_us, full_bytes = timed(full, repeat)
+    diff_us, diff_bytes = timed(diffed, repeat)
+    print(f"{name:<28} {len(full_bytes):>10} {len(diff_bytes):>10} {full_us:>10.1f} {diff_us:>10.1f}")
+
+
+def pipeline(step: int) -> dict:
+    labels = ["Received", "Validating", "Processing", "Billing", "Shipping", "Delivered"]
+    return {
+        "title": "Order Processing Pipeline",
+        "states": [
+            {"id": label.lower(), "label": label,
+             "status": "completed" if i < step else "active" if i == step else "pending"}
+            for i, label in enumerate(labels)
+        ],
+        "statusMessage": f"Step {step + 1}/6: {labels[step]}",
+    }
+
+
+def main(rows: int) -> None:
+    print(f"{'case':<28} {'full B':>10} {'diff B':>10} {'full us':>10} {'diff us':>10}")
+    compare("state-machine tick", "/pipeline", {"pipeline": pipeline(2)}, pipeline(3), 2000)
+
+    contacts = [{"name": f"Contact {i}", "email": f"c{i}@example.com", "department": "Engineering"} for i in range(rows)]
+    edited = list(contacts)
+    edited[rows // 2] = {**edited[rows // 2], "department": "Sales"}
+    appended = contacts + [{"name": f"New {i}", "email": f"n{i}@example.com", "department": "Sales"} for i in range(10)]
+    rewritten = [{**c, "department": "Sales"} for c in contacts]
+    model = {"contacts": contacts}
+    compare(f"{rows} rows, one edited", "/contacts", model, edited, 20)
+    compare(f"{rows} rows, 10 appended", "/contacts", model, appended, 20)
+    compare(f"{rows} rows, all edited", "/contacts", model, rewritten, 5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    main(parser.parse_args().rows)
@@ -0,0 +1,80 @@
+"""
+Minimal asyncio HTTP/1.1 client for load benchmarks.
+
+Keeps one connection alive across requests and understands the two body
+framings the server uses (Content-Length and chunked), so load generators
+measure the server rather than a client library.
+"""
+
+import asyncio
+import json
+
+
+class HttpConnection:
+    """One keep-alive connection. Not safe for concurrent requests."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def open(self) -> "HttpConnection":
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        return self
+
+    async def request(self, method: str, path: str, body: dict | None = None,
+                      headers: dict | None = None) -> tuple[int, bytes]:
+        """Send a request and read the whole response body."""
+        await self._send(method, path, body, headers)
+        status, response_headers = await self._read_head()
+        if response_headers.get("transfer-encoding") == "chunked":
+            chunks = [chunk async for chunk in self._chunks()]
+            return status, b"".join(chunks)
+        length = int(response_headers.get("content-length", 0))
+        return status, await self._reader.readexactly(length)
+
+    async def stream(self, path: str, headers: dict | None = None):
+        """GET `path` and yield body chunks as they arrive (for SSE streams)."""
+        await self._send("GET", path, None, headers)
+        status, response_headers = await self._read_head()
+        if status != 200:
+            raise ConnectionError(f"GET {path}: {status}")
+        async for chunk in self._chunks():
+            yield chunk
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _send(self, method: str, path: str, body: dict | None, headers: dict | None) -> None:
+        payload = json.dumps(body).encode() if body is not None else b""
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(payload)}"]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        lines.extend(f"{k}: {v}" for k, v in (headers or {}).items())
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + payload)
+        await self._writer.drain()
+
+    async def _read_head(self) -> tuple[int, dict[str, str]]:
+        head = await self._reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        headers = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        return int(status_line.split()[1]), headers
+
+    async def _chunks(self):
+        while True:
+            size = int((await self._reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                await self._reader.readuntil(b"\r\n")
+                return
+            chunk = await self._reader.readexactly(size + 2)
+            yield chunk[:-2]
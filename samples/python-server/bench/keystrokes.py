@@ -0,0 +1,166 @@
+"""
+Search-as-you-type: server CPU and latency when every keystroke POSTs a search.
+
+  legacy    every search runs to completion and sends its full result
+  lanes     searches go through ActionLanes: a newer keystroke from the same
+            session cancels the older search, which answers with nothing
+  current   lanes plus the ResponseCache (rows per normalized query and
+            encoded frames per echoed model and query)
+
+Simulated sessions type words into the restaurant finder, one POST per
+keystroke without waiting for the previous answer, the way a TextField
+bound to the search action behaves. Each session applies the frames it gets
+back to its own copy of the data model and echoes that model with the next
+search (sendDataModel). Both cases replay the same keystrokes.
+
+Reports CPU time for the whole run, round trips of the keystrokes that got an
+answer, how long after the last keystroke the session's model shows the
+final query ("settle"), how many answers arrived for a query the user had
+already typed past ("stale"), and how many searches were superseded.
+
+    uv run python -m bench.keystrokes [--rows 50000] [--sessions 40] [--words 5]
+"""
+
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+import server
+from a2ui_server import DataModelMirror, ResponseCache, SearchIndex, sse
+from a2ui_server.datamodel import set_at, split_pointer
+from bench.asgi import frames, request
+
+CUISINES = ["Italian", "Japanese", "Mexican", "French", "Thai", "Indian", "Greek", "Korean"]
+WORDS = ["sushi", "italian", "golden fork", "taco", "bistro", "thai garden", "korean bbq", "pizza", "ramen"]
+
+
+def make_restaurants(n: int) -> list[dict]:
+    rng = random.Random(7)
+    names = ["Sushi", "Golden", "Fork", "Taco", "Bistro", "Garden", "Pizza", "Ramen", "Noodle", "Grill", "BBQ"]
+    return [{"name": f"{rng.choice(names)} {rng.choice(names)} {i}", "cuisine": rng.choice(CUISINES),
+             "rating": round(rng.uniform(3, 5), 1), "priceRange": "$" * rng.randint(1, 3)} for i in range(n)]
+
+
+def mount_legacy() -> None:
+    """The original handler: search, window, diff and stream, every time."""
+
+    async def legacy(request_: Request):
+        body = await request_.json()
+        query, loaded = server.requested_window(body, "restaurants")
+        restaurants, page = server.list_window(server.restaurant_index.search(query), loaded)
+        model = DataModelMirror("restaurant-finder", body.get("dataModel"))
+        messages = model.update("/query", query) + model.update("/restaurants", restaurants) + model.update("/page", page)
+
+        async def generate():
+            for message in messages:
+                yield sse(message)
+
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    server.app.add_api_route("/bench/legacy-restaurant", legacy, methods=["POST"])
+
+
+class Session:
+    def __init__(self, name: str, path: str, model: dict):
+        self.name = name
+        self.path = path
+        self.model = model
+        self.typed = ""
+        self.latencies: list[float] = []
+        self.stale = 0
+        self.received = 0
+
+    async def keystroke(self, query: str) -> None:
+        self.typed = query
+        body = {"version": "v0.9", "action": {"name": "search", "surfaceId": "restaurant-finder",
+                                              "sourceComponentId": "search-field", "context": {"value": query}},
+                "dataModel": self.model}
+        start = time.perf_counter()
+        status, data = await request(server.app, "POST", self.path, body, headers={"A2UI-Session": self.name})
+        assert status == 200, status
+        messages = frames(data)
+        if not messages:
+            return  # superseded
+        self.latencies.append(time.perf_counter() - start)
+        self.received += len(data)
+        for message in messages:
+            self.model = set_at(self.model, split_pointer(message["path"]), message["value"])
+        if self.model.get("query") != self.typed:
+            self.stale += 1
+
+    async def type_words(self, words: list[str], rng: random.Random, settle: list[float]) -> None:
+        for word in words:
+            sent = []
+            for i in range(1, len(word) + 1):
+                last_keystroke = time.perf_counter()
+                sent.append(asyncio.ensure_future(self.keystroke(word[:i])))
+                if i < len(word):
+                    await asyncio.sleep(max(0.02, rng.gauss(0.12, 0.04)))
+            # Out-of-order answers can leave an older query showing; stop waiting once all are in.
+            while self.model.get("query") != word and not all(t.done() for t in sent):
+                await asyncio.sleep(0.002)
+            settle.append(time.perf_counter() - last_keystroke)
+            await asyncio.gather(*sent)
+            await asyncio.sleep(rng.uniform(0.3, 0.8))  # reading the results
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000 if ordered else float("nan")
+
+
+async def main(case: str, rows: int, sessions: int, words: int) -> None:
+    server.restaurant_index = SearchIndex(("name", "cuisine"), make_restaurants(rows))
+    server.define_restaurant_surface()
+    mount_legacy()
+    if case == "lanes":
+        server.restaurant_cache = ResponseCache(max_entries=0)
+    path = "/bench/legacy-restaurant" if case == "legacy" else "/agents/restaurant"
+    initial = frames(server.surfaces.prelude("restaurant-finder"))[-1]["value"]
+
+    rng = random.Random(1)
+    plans = [[rng.choice(WORDS) for _ in range(words)] for _ in range(sessions)]
+    clients = [Session(f"session-{i}", path, initial) for i in range(sessions)]
+    settle: list[float] = []
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(c.type_words(plan, random.Random(i), settle)
+                           for i, (c, plan) in enumerate(zip(clients, plans))))
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+
+    latencies = [x for c in clients for x in c.latencies]
+    keystrokes = sum(len(w) for plan in plans for w in plan)
+    cache = server.restaurant_cache
+    hit_rate = cache.hits / (cache.hits + cache.misses) if cache.hits + cache.misses else 0
+    print(f"{case:<8} {cpu:>7.2f}s {cpu / wall:>6.0%} {keystrokes:>10} {len(latencies):>8} "
+          f"{percentile(latencies, 0.5):>7.1f} {percentile(latencies, 0.95):>7.1f} {percentile(latencies, 0.99):>7.1f} "
+          f"{percentile(settle, 0.5):>9.1f} {percentile(settle, 0.99):>9.1f} {sum(c.stale for c in clients):>6} "
+          f"{sum(c.received for c in clients) / 2**20:>7.1f} {hit_rate:>6.0%} {server.search_lanes.superseded:>10}", flush=True)
+
+
+CASES = ["legacy", "lanes", "current"]
+HEADER = (f"{'case':<8} {'CPU':>8} {'busy':>6} {'keystrokes':>10} {'answers':>8} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'settle p50':>9} {'settle p99':>9} {'stale':>6} "
+          f"{'MiB':>7} {'hits':>6} {'superseded':>10}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--words", type=int, default=5, help="words typed per session")
+    parser.add_argument("--case", choices=CASES, help="run one case in this process")
+    args = parser.parse_args()
+    if args.case:
+        asyncio.run(main(args.case, args.rows, args.sessions, args.words))
+    else:
+        print(f"{args.rows} restaurants, {args.sessions} sessions typing {args.words} words each")
+        print(HEADER, flush=True)
+        for case in CASES:
+            subprocess.run([sys.executable, "-m", "bench.keystrokes", *sys.argv[1:], "--case", case], check=True)
@@ -0,0 +1,395 @@
+"""
+Load and latency against a running A2UI server, over real sockets.
+
+Speaks only the wire protocol (SSE GETs, v0.9 `{version, action}` POSTs), so
+the same run works against this server and samples/dotnet-server:
+
+    uv run uvicorn server:app --port 5050 &
+    uv run python -m bench.load --url http://127.0.0.1:5050 --pid $! --json python.json
+
+    dotnet run --project ../dotnet-server &
+    uv run python -m bench.load --url http://127.0.0.1:5050 --server-name dotnet --json dotnet.json
+
+    uv run python -m bench.load ... --compare python.json
+
+`--server CMD` starts the server itself and stops it afterwards; `--pid`
+measures an already running one. Either way RSS is the process and its
+children (so `dotnet run` counts the app it launches).
+
+Reports:
+
+  ttff      connect to first data frame, per stream
+  jitter    /agents/state-machine: frames arrive in bursts (one per step);
+            how far each gap between bursts lands from the whole-second
+            schedule the agents sleep on (--tick)
+  action    POST round trip to the end of the response; requests are sent
+            on a fixed schedule and timed from when they were due, so a
+            slow server can't hide its queueing delay
+  bytes     body bytes received per stream
+  rss       server resident memory before, at peak, and per stream
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from bench.http import HttpConnection
+
+ACTIONS = {
+    "restaurant": {"name": "search", "surfaceId": "restaurant-finder", "sourceComponentId": "search-btn",
+                   "context": {"value": "sushi"}},
+    "contacts": {"name": "search", "surfaceId": "contacts", "sourceComponentId": "search-btn",
+                 "context": {"value": "Engineering"}},
+}
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"n": 0}
+    ordered = sorted(values)
+
+    def at(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {"n": len(ordered), "p50": at(0.50), "p95": at(0.95), "p99": at(0.99), "max": ordered[-1]}
+
+
+def tree_rss(pid: int) -> int | None:
+    """Resident bytes of `pid` and its descendants, or None if it is gone."""
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    total, pending = 0, [pid]
+    while pending:
+        p = pending.pop()
+        try:
+            with open(f"/proc/{p}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            if p == pid:
+                return None
+        pending.extend(children.get(p, ()))
+    return total
+
+
+class Stream:
+    """One SSE viewer: when it connected, when each data frame arrived, bytes received."""
+
+    __slots__ = ("agent", "started", "arrivals", "bytes", "error")
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self.started = 0.0
+        self.arrivals: list[float] = []
+        self.bytes = 0
+        self.error: str | None = None
+
+    async def run(self, host: str, port: int) -> None:
+        conn = HttpConnection(host, port)
+        self.started = time.perf_counter()
+        buffer = b""
+        try:
+            await conn.open()
+            async for chunk in conn.stream(f"/agents/{self.agent}"):
+                now = time.perf_counter()
+                self.bytes += len(chunk)
+                buffer += chunk
+                *events, buffer = buffer.split(b"\n\n")
+                self.arrivals.extend(now for event in events if b"data:" in event)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            await conn.close()
+
+    @property
+    def ttff(self) -> float | None:
+        return self.arrivals[0] - self.started if self.arrivals else None
+
+
+def burst_jitter(arrivals: list[float], burst_gap: float, tick: float) -> list[float]:
+    """Distance of each gap between bursts from the nearest multiple of `tick`."""
+    bursts = [t for i, t in enumerate(arrivals) if i == 0 or t - arrivals[i - 1] > burst_gap]
+    # The first burst is the prelude; the ticker's phase relative to it is arbitrary.
+    gaps = [b - a for a, b in zip(bursts[1:], bursts[2:])]
+    return [abs(g - round(g / tick) * tick) for g in gaps]
+
+
+class ActionLoad:
+    """POSTs on a fixed schedule over a pool of keep-alive connections."""
+
+    def __init__(self, host: str, port: int, agents: list[str], rate: float):
+        self.host, self.port = host, port
+        self.agents = agents
+        self.rate = rate
+        self.latencies: dict[str, list[float]] = {agent: [] for agent in agents}
+        self.errors = 0
+        self.error_types: dict[str, int] = {}
+        self._idle: list[HttpConnection] = []
+        self._inflight: set[asyncio.Task] = set()
+
+    async def run(self, seconds: float) -> None:
+        if self.rate <= 0 or not self.agents:
+            return
+        start = time.perf_counter()
+        for i in range(int(seconds * self.rate)):
+            due = start + i / self.rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.ensure_future(self._one(self.agents[i % len(self.agents)], due))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+        if self._inflight:
+            await asyncio.wait(self._inflight)
+        for conn in self._idle:
+            await conn.close()
+
+    async def _one(self, agent: str, due: float) -> None:
+        body = {"version": "v0.9", "action": {**ACTIONS[agent], "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ")}}
+        conn = self._idle.pop() if self._idle else None
+        try:
+            if conn is not None:
+                try:
+                    status, _ = await conn.request("POST", f"/agents/{agent}", body)
+                except (OSError, asyncio.IncompleteReadError):
+                    # The server closed it while idle (keep-alive timeout): not a failure.
+                    await conn.close()
+                    conn = None
+            if conn is None:
+                conn = await HttpConnection(self.host, self.port).open()
+                status, _ = await conn.request("POST", f"/agents/{agent}", body)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            self.errors += 1
+            self.error_types[type(e).__name__] = self.error_types.get(type(e).__name__, 0) + 1
+            if conn is not None:
+                await conn.close()
+            return
+        if status != 200:
+            self.errors += 1
+        self.latencies[agent].append(time.perf_counter() - due)
+        self._idle.append(conn)
+
+
+class RssSampler:
+    def __init__(self, pid: int | None):
+        self.pid = pid
+        self.baseline = tree_rss(pid) if pid else None
+        self.peak = self.baseline
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.pid:
+            self._task = asyncio.ensure_future(self._sample())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._take()
+
+    def _take(self) -> None:
+        rss = tree_rss(self.pid) if self.pid else None
+        if rss is not None:
+            self.peak = max(self.peak or 0, rss)
+
+    async def _sample(self) -> None:
+        while True:
+            self._take()
+            await asyncio.sleep(0.25)
+
+
+def raise_fd_limit(needed: int) -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard == resource.RLIM_INFINITY else min(hard, needed), hard))
+
+
+async def wait_ready(host: str, port: int, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            conn = await HttpConnection(host, port).open()
+            await conn.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def run(args) -> dict:
+    url = urlsplit(args.url)
+    host, port = url.hostname or "127.0.0.1", url.port or 80
+    raise_fd_limit(args.streams + 1024)
+
+    server = None
+    pid = args.pid
+    if args.server:
+        server = subprocess.Popen(shlex.split(args.server))
+        pid = server.pid
+    try:
+        await wait_ready(host, port, args.startup_timeout)
+        await asyncio.sleep(0.5)  # let the server settle before taking its baseline
+        rss = RssSampler(pid)
+        rss.start()
+
+        streams = [Stream(args.stream_agents[i % len(args.stream_agents)]) for i in range(args.streams)]
+        tasks = []
+        opening = time.perf_counter()
+        for i, stream in enumerate(streams):
+            tasks.append(asyncio.ensure_future(stream.run(host, port)))
+            if args.ramp and i % 100 == 99:
+                await asyncio.sleep(100 / args.ramp)
+        opened_in = time.perf_counter() - opening
+
+        load = ActionLoad(host, port, args.action_agents, args.rate)
+        await load.run(args.duration)
+        if not args.rate:
+            await asyncio.sleep(args.duration)
+
+        await rss.stop()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+    ttff = [s.ttff for s in streams if s.ttff is not None]
+    jitter = [j for s in streams if s.agent == "state-machine"
+              for j in burst_jitter(s.arrivals, args.burst_gap, args.tick)]
+    all_latencies = [x for values in load.latencies.values() for x in values]
+    return {
+        "target": {"url": args.url, "server": args.server_name, "pid": pid},
+        "client": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+                   "time": time.strftime("%Y-%m-%dT%H:%M:%S%z")},
+        "config": {"streams": args.streams, "streamAgents": args.stream_agents, "rate": args.rate,
+                   "actionAgents": args.action_agents, "duration": args.duration},
+        "streams": {
+            "opened": len(streams), "openSeconds": opened_in,
+            "withFrames": len(ttff), "errors": sum(s.error is not None for s in streams),
+            "ttffMs": ms(percentiles(ttff)),
+            "bytesPerStream": statistics.fmean(s.bytes for s in streams) if streams else 0,
+            "framesPerStream": statistics.fmean(len(s.arrivals) for s in streams) if streams else 0,
+        },
+        "stateMachineJitterMs": ms(percentiles(jitter)),
+        "actions": {
+            "sent": len(all_latencies) + load.errors, "errors": load.errors, "errorTypes": load.error_types,
+            "latencyMs": ms(percentiles(all_latencies)),
+            "perAgent": {agent: ms(percentiles(values)) for agent, values in load.latencies.items()},
+        },
+        "rss": {
+            "baselineBytes": rss.baseline, "peakBytes": rss.peak,
+            "perStreamBytes": (rss.peak - rss.baseline) / len(streams)
+            if streams and rss.baseline is not None else None,
+        },
+    }
+
+
+def ms(summary: dict) -> dict:
+    return {k: (v * 1000 if k != "n" else v) for k, v in summary.items()}
+
+
+# (label, path into the result, lower is better)
+REPORTED = [
+    ("ttff p50 ms", ("streams", "ttffMs", "p50")),
+    ("ttff p99 ms", ("streams", "ttffMs", "p99")),
+    ("jitter p95 ms", ("stateMachineJitterMs", "p95")),
+    ("jitter max ms", ("stateMachineJitterMs", "max")),
+    ("action p50 ms", ("actions", "latencyMs", "p50")),
+    ("action p95 ms", ("actions", "latencyMs", "p95")),
+    ("action p99 ms", ("actions", "latencyMs", "p99")),
+    ("action errors", ("actions", "errors")),
+    ("stream errors", ("streams", "errors")),
+    ("bytes/stream", ("streams", "bytesPerStream")),
+    ("rss peak MiB", ("rss", "peakBytes")),
+    ("rss B/stream", ("rss", "perStreamBytes")),
+]
+
+
+def lookup(result: dict, path: tuple):
+    for key in path:
+        if not isinstance(result, dict) or key not in result:
+            return None
+        result = result[key]
+    if path == ("rss", "peakBytes") and result is not None:
+        return result / 2**20
+    return result
+
+
+def report(result: dict, baseline: dict | None) -> None:
+    s = result["streams"]
+    print(f"{result['target']['server']}: {s['opened']} streams opened in {s['openSeconds']:.1f}s, "
+          f"{result['actions']['sent']} actions at {result['config']['rate']:g}/s")
+    print(f"{'metric':<16} {'value':>12}" + (f" {'baseline':>12} {'change':>8}" if baseline else ""))
+    for label, path in REPORTED:
+        value = lookup(result, path)
+        line = f"{label:<16} {fmt(value):>12}"
+        if baseline:
+            before = lookup(baseline, path)
+            change = f"{(value - before) / before:+.0%}" if value is not None and before else ""
+            line += f" {fmt(before):>12} {change:>8}"
+        print(line)
+
+
+def fmt(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.0f}" if isinstance(value, int) or abs(value) >= 100 else f"{value:.2f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5050")
+    parser.add_argument("--server", help="command that starts the server; it is stopped afterwards")
+    parser.add_argument("--pid", type=int, help="pid of an already running server, for RSS")
+    parser.add_argument("--server-name", default="python", help="label stored with the results")
+    parser.add_argument("--streams", type=int, default=2000)
+    parser.add_argument("--stream-agents", nargs="+",
+                        default=["state-machine", "error-demo", "gallery", "restaurant", "contacts"])
+    parser.add_argument("--ramp", type=float, default=2000, help="streams opened per second (0: all at once)")
+    parser.add_argument("--rate", type=float, default=50, help="action POSTs per second")
+    parser.add_argument("--action-agents", nargs="+", default=list(ACTIONS), choices=list(ACTIONS))
+    parser.add_argument("--duration", type=float, default=20, help="seconds of action load with streams open")
+    parser.add_argument("--tick", type=float, default=1.0, help="granularity of the state-machine schedule")
+    parser.add_argument("--burst-gap", type=float, default=0.25, help="frames closer than this are one step")
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="results file from an earlier run to compare against")
+    args = parser.parse_args()
+    if args.pid is None and args.server is None:
+        print("no --pid or --server: RSS will not be measured", file=sys.stderr)
+
+    result = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(result, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
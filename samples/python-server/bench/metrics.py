@@ -0,0 +1,71 @@
+"""
+Cost of metering: the same requests with A2UI_METRICS=0 and with metrics on.
+
+Each case runs in its own process (the middleware and the timed encoder are
+installed at import time) and drives the app in-process:
+
+  connects   gallery stream connects, disconnecting after the prelude
+  searches   restaurant search POSTs with the search cache disabled, so every
+             one is searched, diffed and encoded
+  errors     error-demo POSTs carrying a client error report
+
+    uv run python -m bench.metrics [--requests 3000]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+QUERIES = ["sushi", "taco", "golden", "bistro", "garden", "pizza", "thai", "fork"]
+
+
+async def main(requests: int) -> None:
+    import server
+    from a2ui_server import ResponseCache
+    from bench.asgi import frames, request
+
+    server.restaurant_cache = ResponseCache(max_entries=0)
+    prelude = len(server.surfaces.prelude("gallery"))
+    model = frames(server.surfaces.prelude("restaurant-finder"))[-1]["value"]
+    error = {"version": "v0.9", "error": {"code": "VALIDATION_FAILED", "surfaceId": "error-demo",
+                                          "path": "/email", "message": "Invalid email"}}
+
+    async def connect(i):
+        await request(server.app, "GET", "/agents/gallery", until=prelude)
+
+    async def search(i):
+        body = {"version": "v0.9", "dataModel": model,
+                "action": {"name": "search", "surfaceId": "restaurant-finder", "sourceComponentId": "search-field",
+                           "context": {"value": QUERIES[i % len(QUERIES)]}}}
+        await request(server.app, "POST", "/agents/restaurant", body)
+
+    async def report(i):
+        await request(server.app, "POST", "/agents/error-demo", error)
+
+    row = []
+    for work in (connect, search, report):
+        for i in range(min(200, requests)):  # warm up
+            await work(i)
+        start = time.perf_counter()
+        for i in range(requests):
+            await work(i)
+        row.append(requests / (time.perf_counter() - start))
+    case = "off" if os.environ.get("A2UI_METRICS") == "0" else "on"
+    print(f"{case:<8} " + " ".join(f"{r:>10.0f}" for r in row), flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--run", action="store_true", help="run one case in this process")
+    args = parser.parse_args()
+    if args.run:
+        asyncio.run(main(args.requests))
+    else:
+        print(f"{'metrics':<8} {'connects/s':>10} {'searches/s':>10} {'errors/s':>10}", flush=True)
+        for setting in ("0", "1"):
+            env = dict(os.environ, A2UI_METRICS=setting)
+            subprocess.run([sys.executable, "-m", "bench.metrics", *sys.argv[1:], "--run"], env=env, check=True)
@@ -0,0 +1,114 @@
+"""
+Event-loop lag while searches run inline, on a thread pool or on a process
+pool (A2UI_POOL).
+
+Each case runs in its own process against a large restaurant index with the
+search cache disabled, so every search is a full scan, window, diff and
+encode. Concurrent clients POST short queries back to back while the loop
+also runs:
+
+  a lag monitor   LoopLagMonitor sampling every 10 ms
+  a ticker        due every 50 ms, like a Broadcast ticker sending frames;
+                  reports how late its frames go out
+
+Reports loop lag and ticker lateness (p50/p99/max, ms), search latency (ms),
+searches per second and how many were refused (503) or missed the deadline
+(504).
+
+    uv run python -m bench.offload [--rows 200000] [--clients 8] [--seconds 5] [--workers 2]
+
+Process workers only help with spare cores; on one core they still keep the
+loop responsive, since the kernel preempts them.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+QUERIES = ["s", "a", "g", "t", "i", "o", "r", "e"]
+TICK = 0.05
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000 if ordered else float("nan")
+
+
+async def main(rows: int, clients: int, seconds: float) -> None:
+    import server
+    from a2ui_server import LoopLagMonitor, Metrics, ResponseCache, SearchIndex
+    from bench.asgi import frames, request
+    from bench.keystrokes import make_restaurants
+
+    server.restaurant_index = SearchIndex(("name", "cuisine"), make_restaurants(rows))
+    server.define_restaurant_surface()
+    server.restaurant_cache = ResponseCache(max_entries=0)
+    model = frames(server.surfaces.prelude("restaurant-finder"))[-1]["value"]
+    statuses: dict[int, int] = {}
+    latencies: list[float] = []
+    late: list[float] = []
+    end = time.perf_counter() + seconds
+
+    async def client(i: int) -> None:
+        n = i
+        while time.perf_counter() < end:
+            body = {"version": "v0.9", "dataModel": model,
+                    "action": {"name": "search", "surfaceId": "restaurant-finder",
+                               "sourceComponentId": "search-field", "context": {"value": QUERIES[n % len(QUERIES)]}}}
+            start = time.perf_counter()
+            status, _ = await request(server.app, "POST", "/agents/restaurant", body)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                await asyncio.sleep(0.1)  # Retry-After, roughly
+            n += 1
+            await asyncio.sleep(0)  # the next request arrives through the loop, as it would from a socket
+
+    async def ticker() -> None:
+        loop = asyncio.get_running_loop()
+        due = loop.time() + TICK
+        stop = due + seconds
+        while due < stop:
+            await asyncio.sleep(max(0.0, due - loop.time()))
+            late.append(max(0.0, loop.time() - due))
+            due += TICK
+
+    await request(server.app, "POST", "/agents/restaurant", {"version": "v0.9", "dataModel": model, "action": {
+        "name": "search", "context": {"value": "warm up"}}})
+    monitor = LoopLagMonitor(Metrics(), interval=0.01, window=1_000_000)
+    monitor.start()
+    await asyncio.gather(ticker(), *(client(i) for i in range(clients)))
+    monitor.stop()
+    server.cpu_pool.shutdown()
+
+    lag = list(monitor.recent)
+    print(f"{server.cpu_pool.kind:<8} {percentile(lag, 0.5):>8.1f} {percentile(lag, 0.99):>8.1f} {max(lag) * 1000:>8.1f} "
+          f"{percentile(late, 0.5):>8.1f} {percentile(late, 0.99):>8.1f} {max(late) * 1000:>8.1f} "
+          f"{percentile(latencies, 0.5):>8.1f} {percentile(latencies, 0.99):>8.1f} {len(latencies) / seconds:>8.1f} "
+          f"{statuses.get(503, 0):>6} {statuses.get(504, 0):>6}", flush=True)
+
+
+CASES = ["inline", "thread", "process"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--run", action="store_true", help="run one case (A2UI_POOL) in this process")
+    args = parser.parse_args()
+    if args.run:
+        asyncio.run(main(args.rows, args.clients, args.seconds))
+    else:
+        print(f"{args.rows} restaurants, {args.clients} clients searching for {args.seconds:g}s, "
+              f"{args.workers} pool workers, {os.cpu_count()} cores")
+        print(f"{'pool':<8} {'lag p50':>8} {'p99':>8} {'max':>8} {'tick p50':>8} {'p99':>8} {'max':>8} "
+              f"{'srch p50':>8} {'p99':>8} {'per s':>8} {'503':>6} {'504':>6}", flush=True)
+        for case in CASES:
+            env = dict(os.environ, A2UI_POOL=case, A2UI_POOL_WORKERS=str(args.workers))
+            subprocess.run([sys.executable, "-m", "bench.offload", *sys.argv[1:], "--run"], env=env, check=True)
@@ -0,0 +1,126 @@
+"""
+Time until the list data has arrived, bytes sent and peak server memory per
+connection for a large contact list, with and without paging.
+
+  legacy   whole list encoded per connection (the original server)
+  cached   whole list pre-encoded once in the SurfaceCache
+  paged    first ListPager window pre-encoded; the rest loads on demand
+
+Also compares a broad search POST (half the rows match) returning every hit
+against returning the first window.
+
+    uv run python -m bench.paging [--rows 200000]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from fastapi.responses import StreamingResponse
+
+import server
+from a2ui_server import SearchIndex, sse
+from bench.asgi import request
+
+
+def make_contacts(n: int) -> list[dict]:
+    departments = ["Engineering", "Sales"]
+    return [{"name": f"Contact {i:07d}", "email": f"c{i}@example.com", "department": departments[i % 2]} for i in range(n)]
+
+
+# The legacy preludes only need a stand-in component tree.
+COMPONENTS = {"type": "updateComponents", "surfaceId": "contacts",
+              "components": [{"id": "root", "component": "Column", "children": ["contact-list"]}]}
+
+
+def mount_routes(contacts: list[dict]) -> None:
+    create = {"type": "createSurface", "surfaceId": "contacts", "sendDataModel": True}
+    components = COMPONENTS
+
+    async def legacy():
+        async def generate():
+            yield f"data: {json.dumps(create)}\n\n"
+            yield f"data: {json.dumps({'type': 'updateDataModel', 'surfaceId': 'contacts', 'path': '/', 'value': {'query': '', 'contacts': contacts}})}\n\n"
+            yield f"data: {json.dumps(components)}\n\n"
+            await asyncio.Event().wait()
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    server.surfaces.define("bench-cached", [create, {"type": "updateDataModel", "surfaceId": "contacts", "path": "/", "value": {"query": "", "contacts": contacts}}, components])
+
+    async def cached():
+        async def generate():
+            yield server.surfaces.prelude("bench-cached")
+            await asyncio.Event().wait()
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    async def legacy_search(request_):
+        body = await request_.json()
+        query = body["action"]["context"]["value"]
+        filtered = [c for c in contacts if query.lower() in c["name"].lower() or query.lower() in c["department"].lower()]
+
+        async def generate():
+            yield sse({"type": "updateDataModel", "surfaceId": "contacts", "path": "/contacts", "value": filtered})
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    from fastapi import Request
+    legacy_search.__annotations__["request_"] = Request
+    server.app.add_api_route("/bench/legacy", legacy, methods=["GET"])
+    server.app.add_api_route("/bench/cached", cached, methods=["GET"])
+    server.app.add_api_route("/bench/legacy-search", legacy_search, methods=["POST"])
+
+
+def prelude_size(contacts: list[dict]) -> dict[str, int]:
+    """Bytes each GET variant sends before going idle."""
+    create = {"type": "createSurface", "surfaceId": "contacts", "sendDataModel": True}
+    components = COMPONENTS
+    model = {"type": "updateDataModel", "surfaceId": "contacts", "path": "/", "value": {"query": "", "contacts": contacts}}
+    return {
+        "/bench/legacy": sum(len(f"data: {json.dumps(m)}\n\n".encode()) for m in (create, model, components)),
+        "/bench/cached": len(server.surfaces.prelude("bench-cached")),
+        "/agents/contacts": len(server.surfaces.prelude("contacts")),
+    }
+
+
+async def measure(method: str, path: str, body: dict | None, until: int | None) -> tuple[float, int, float]:
+    """(ms until the response is in, bytes received, peak MiB allocated while serving)."""
+    tracemalloc.start()
+    status, data = await request(server.app, method, path, body=body, until=until)
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    assert status == 200, (path, status)
+    # Timed separately: tracemalloc inflates allocation cost. Clear the search
+    # caches so the second request isn't simply served from them.
+    server.contacts_cache.clear()
+    start = time.perf_counter()
+    await request(server.app, method, path, body=body, until=until)
+    return (time.perf_counter() - start) * 1000, len(data), peak
+
+
+async def main(rows: int) -> None:
+    contacts = make_contacts(rows)
+    server.contacts_index = SearchIndex(("name", "department"), contacts)
+    server.define_contacts_surface()
+    mount_routes(contacts)
+    sizes = prelude_size(contacts)
+
+    search = {"version": "v0.9", "action": {"name": "search", "context": {"value": "engineering"}}}
+    cases = [
+        ("connect: legacy", "GET", "/bench/legacy", None),
+        ("connect: cached", "GET", "/bench/cached", None),
+        ("connect: paged", "GET", "/agents/contacts", None),
+        ("search: full result", "POST", "/bench/legacy-search", search),
+        ("search: paged", "POST", "/agents/contacts", search),
+    ]
+    print(f"{rows} contacts")
+    print(f"{'case':<22} {'data ms':>9} {'bytes':>12} {'peak MiB':>9}")
+    for label, method, path, body in cases:
+        elapsed, size, peak = await measure(method, path, body, sizes.get(path))
+        print(f"{label:<22} {elapsed:>9.2f} {size:>12} {peak:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    asyncio.run(main(parser.parse_args().rows))
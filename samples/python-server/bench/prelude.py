@@ -0,0 +1,72 @@
+"""
+Connections per second for the static surface preludes, before and after the
+pre-encoded SurfaceCache.
+
+"before" mounts a legacy route per agent that rebuilds and json.dumps every
+message on each connect, the way server.py did originally. "after" is the real
+route serving cached bytes. Both run through the full FastAPI stack in-process.
+
+    uv run python -m bench.prelude [--connections 2000]
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import time
+
+from fastapi.responses import StreamingResponse
+
+import server
+from bench.asgi import frames, request
+
+AGENTS = {
+    "gallery": "gallery",
+    "restaurant": "restaurant-finder",
+    "contacts": "contacts",
+    "error-demo": "error-demo",
+}
+
+
+def mount_legacy_route(agent: str, surface_id: str) -> int:
+    """Mount the legacy route and return the size of its prelude in bytes."""
+    messages = frames(server.surfaces.prelude(surface_id))
+
+    async def legacy_stream():
+        async def generate():
+            # Rebuilding the literal dicts costs about what a deepcopy does.
+            for message in copy.deepcopy(messages):
+                yield f"data: {json.dumps(message)}\n\n"
+            while True:
+                await asyncio.sleep(30)
+                yield ": keepalive\n\n"
+
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    server.app.add_api_route(f"/legacy/{agent}", legacy_stream, methods=["GET"])
+    return sum(len(f"data: {json.dumps(m)}\n\n".encode()) for m in messages)
+
+
+async def connections_per_second(path: str, until: int, connections: int) -> float:
+    start = time.perf_counter()
+    for _ in range(connections):
+        await request(server.app, "GET", path, until=until)
+    return connections / (time.perf_counter() - start)
+
+
+async def main(connections: int) -> None:
+    legacy_sizes = {agent: mount_legacy_route(agent, sid) for agent, sid in AGENTS.items()}
+
+    print(f"{'agent':<12} {'bytes':>13} {'before/s':>10} {'after/s':>10} {'speedup':>8}")
+    for agent, surface_id in AGENTS.items():
+        size = len(server.surfaces.prelude(surface_id))
+        before = await connections_per_second(f"/legacy/{agent}", legacy_sizes[agent], connections)
+        after = await connections_per_second(f"/agents/{agent}", size, connections)
+        sizes = f"{legacy_sizes[agent]}->{size}"
+        print(f"{agent:<12} {sizes:>13} {before:>10.0f} {after:>10.0f} {after / before:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=2000)
+    asyncio.run(main(parser.parse_args().connections))
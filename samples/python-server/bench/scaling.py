@@ -0,0 +1,191 @@
+"""
+Action throughput versus uvicorn worker count, with state shared through
+LocalBackend.
+
+For each worker count the server is started with A2UI_STATE_DIR pointing at a
+fresh directory, a set of viewers holds /agents/error-demo streams (spread
+over the workers by the kernel), and client processes drive two POST loads
+over keep-alive connections:
+
+  search   restaurant search; no shared state, should scale with cores
+  report   error report; an atomic update of the shared count plus a
+           fan-out of the new value to every worker's viewers
+
+After the report load every viewer must have seen the final count, whichever
+worker holds its stream.
+
+    uv run python -m bench.scaling [--workers 1 2 4] [--clients 4] [--seconds 5]
+
+Client processes need cores of their own; on a machine with fewer cores than
+workers + clients the numbers measure contention, not scaling.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bench.asgi import frames
+from bench.http import HttpConnection
+
+HOST = "127.0.0.1"
+
+LOADS = {
+    "search": ("/agents/restaurant", {"version": "v0.9", "action": {"name": "search", "context": {"value": "sushi"}}}),
+    "report": ("/agents/error-demo", {"version": "v0.9", "error": {"code": "VALIDATION_FAILED", "message": "bench"}}),
+}
+
+
+async def _drive(port: int, load: str, connections: int, seconds: float) -> int:
+    path, body = LOADS[load]
+    deadline = time.perf_counter() + seconds
+    done = 0
+
+    async def loop():
+        nonlocal done
+        conn = await HttpConnection(HOST, port).open()
+        try:
+            while time.perf_counter() < deadline:
+                status, _ = await conn.request("POST", path, body)
+                assert status == 200, status
+                done += 1
+        finally:
+            await conn.close()
+
+    await asyncio.gather(*(loop() for _ in range(connections)))
+    return done
+
+
+def drive(port: int, load: str, connections: int, seconds: float) -> int:
+    """Run in a client process: requests completed by `connections` loops in `seconds`."""
+    return asyncio.run(_drive(port, load, connections, seconds))
+
+
+class Viewer:
+    """Holds one error-demo stream and remembers the last errorCount it saw."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.count = -1
+        self.task: asyncio.Task | None = None
+
+    async def run(self) -> None:
+        conn = await HttpConnection(HOST, self.port).open()
+        try:
+            async for chunk in conn.stream("/agents/error-demo"):
+                for message in frames(chunk):
+                    if message.get("path") == "/":
+                        self.count = message["value"]["errorCount"]
+        finally:
+            await conn.close()
+
+
+def start_server(workers: int, port: int, state_dir: str) -> subprocess.Popen:
+    env = {**os.environ, "A2UI_STATE_DIR": state_dir}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", HOST, "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--timeout-graceful-shutdown", "2"],
+        env=env,
+    )
+
+
+async def wait_ready(port: int, timeout: float = 30) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            conn = await HttpConnection(HOST, port).open()
+            await conn.request("GET", "/connections")
+            await conn.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def wait_closed(port: int, reads: int, timeout: float = 10) -> None:
+    """Until `reads` /connections answers in a row (from whichever workers take them) show no open streams."""
+    deadline = time.perf_counter() + timeout
+    quiet = 0
+    while quiet < reads and time.perf_counter() < deadline:
+        conn = await HttpConnection(HOST, port).open()
+        _, body = await conn.request("GET", "/connections")
+        await conn.close()
+        quiet = quiet + 1 if json.loads(body)["open"] == 0 else 0
+        await asyncio.sleep(0.05)
+
+
+async def measure(workers: int, args, pool: ProcessPoolExecutor) -> dict:
+    port = args.port
+    with tempfile.TemporaryDirectory() as state_dir:
+        server = start_server(workers, port, state_dir)
+        try:
+            await wait_ready(port)
+            viewers = [Viewer(port) for _ in range(args.viewers)]
+            for viewer in viewers:
+                viewer.task = asyncio.ensure_future(viewer.run())
+            await asyncio.sleep(0.5)
+
+            loop = asyncio.get_running_loop()
+            result = {"workers": workers}
+            for load in LOADS:
+                jobs = [loop.run_in_executor(pool, drive, port, load, args.connections, args.seconds)
+                        for _ in range(args.clients)]
+                result[load] = sum(await asyncio.gather(*jobs)) / args.seconds
+
+            await asyncio.sleep(0.5)
+            conn = await HttpConnection(HOST, port).open()
+            _, body = await conn.request("POST", *LOADS["report"])
+            await conn.close()
+            final = frames(body)[0]["value"]["errorCount"]
+            await asyncio.sleep(0.5)
+            result["viewers_current"] = sum(v.count == final for v in viewers)
+            result["viewers"] = len(viewers)
+            for viewer in viewers:
+                viewer.task.cancel()
+            await asyncio.gather(*(v.task for v in viewers), return_exceptions=True)
+            await wait_closed(port, reads=4 * workers)  # so shutdown finds no streams to cancel
+            return result
+        finally:
+            server.terminate()
+            try:
+                server.wait(10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+
+async def main(args) -> None:
+    results = []
+    print(f"{'workers':>7} {'search req/s':>13} {'speedup':>8} {'report req/s':>13} {'speedup':>8} {'viewers current':>16}")
+    # Spawned, not forked: a forked client would inherit the viewers' sockets
+    # and keep their streams open on the server after the viewers close them.
+    with ProcessPoolExecutor(args.clients, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for workers in args.workers:
+            r = await measure(workers, args, pool)
+            base = results[0] if results else r
+            print(f"{workers:>7} {r['search']:>13.0f} {r['search'] / base['search']:>7.2f}x "
+                  f"{r['report']:>13.0f} {r['report'] / base['report']:>7.2f}x "
+                  f"{r['viewers_current']:>9}/{r['viewers']}", flush=True)
+            results.append(r)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cpus": os.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4, help="client processes")
+    parser.add_argument("--connections", type=int, default=16, help="keep-alive connections per client process")
+    parser.add_argument("--viewers", type=int, default=32, help="error-demo streams held open")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--json", help="also write results to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,80 @@
+"""
+Query latency and memory: SearchIndex vs the original list comprehension
+(`query.lower() in r["name"].lower() or ...` on every row, every request).
+
+Rows are synthetic contacts; queries range from very selective (one person)
+to very broad (a department), plus a two-character query that takes the
+index's scan fallback.
+
+    uv run python -m bench.search [--sizes 1000 100000 1000000]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from a2ui_server import SearchIndex
+
+FIRST = ["Alice", "Bob", "Carol", "David", "Eve", "Frank", "Grace", "Heidi", "Ivan", "Judy", "Mallory", "Niaj"]
+LAST = ["Johnson", "Smith", "Williams", "Brown", "Davis", "Miller", "Wilson", "Moore", "Taylor", "Anderson"]
+DEPARTMENTS = ["Engineering", "Marketing", "Sales", "Finance", "Legal", "Support", "Operations", "Research"]
+
+
+def make_contacts(n: int) -> list[dict]:
+    rng = random.Random(42)
+    return [
+        {"name": f"{rng.choice(FIRST)} {rng.choice(LAST)} {i:07d}",
+         "email": f"user{i}@example.com",
+         "department": rng.choice(DEPARTMENTS)}
+        for i in range(n)
+    ]
+
+
+def linear(rows: list[dict], query: str) -> list[dict]:
+    return [c for c in rows if query.lower() in c["name"].lower() or query.lower() in c["department"].lower()]
+
+
+def latency_ms(fn, query: str, budget: float = 0.5) -> float:
+    runs, start = 0, time.perf_counter()
+    while True:
+        fn(query)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed > budget or runs >= 200:
+            return elapsed / runs * 1000
+
+
+def main(sizes: list[int]) -> None:
+    queries = {
+        "one row": "0000042",
+        "narrow": "grace wil",
+        "broad": "engineering",
+        "2-char": "al",
+    }
+    for n in sizes:
+        rows = make_contacts(n)
+        start = time.perf_counter()
+        index = SearchIndex(("name", "department"), rows)
+        build_s = time.perf_counter() - start
+        # Measured on a second build: tracemalloc slows allocation-heavy code.
+        tracemalloc.start()
+        measured = SearchIndex(("name", "department"), rows)
+        index_mb = tracemalloc.get_traced_memory()[0] / 2**20
+        tracemalloc.stop()
+        del measured
+
+        print(f"\n{n} rows: index built in {build_s:.2f}s, {index_mb:.1f} MiB on top of the rows")
+        print(f"  {'query':<10} {'hits':>8} {'linear ms':>10} {'index ms':>10} {'speedup':>8}")
+        for label, query in queries.items():
+            hits = len(index.search(query))
+            assert hits == len(linear(rows, query))
+            before = latency_ms(lambda q: linear(rows, q), query)
+            after = latency_ms(index.search, query)
+            print(f"  {label:<10} {hits:>8} {before:>10.3f} {after:>10.3f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    main(parser.parse_args().sizes)
@@ -2,21 +2,106 @@
 Minimal A2UI server in Python — proves the Blazor client is protocol-agnostic.
 
 Serves the same agents as the .NET server (restaurant finder, contacts, gallery)
-using raw SSE/JSONL. No .NET dependency. ~100 lines.
+using raw SSE/JSONL. No .NET dependency.
+
+Surfaces are declared with SurfaceBuilder, checked against the standard catalog
+and encoded once at import time (see a2ui_server.builder), then served from
+memory on every connect. Frames carry SSE event ids, so a client reconnecting
+with Last-Event-ID only gets what it missed. Open streams are admitted and
+kept alive by one ConnectionManager (see /connections).
+Agent state that workers must agree on goes through a2ui_server.backend.
+Searches are latest-wins per session (A2UI-Session header) and cached.
+Counters and timings are served in Prometheus text format on /metrics.
+Responses are SSE or JSONL and optionally compressed, as the client's Accept
+and Accept-Encoding headers ask (see a2ui_server.transport). Searches run on
+a WorkPool off the event loop, whose lag is exported as a metric.
+
+Environment:
+    A2UI_STATE_DIR     share agent state between `--workers` (see above)
+    A2UI_METRICS=0     don't meter responses or time the JSON encoder
+    A2UI_TRACE_FILE    also write actions and client errors as Chrome trace events
+    A2UI_POOL          where searches run: thread (default), process or inline
+    A2UI_POOL_WORKERS  pool size (default 2)
 
 Usage:
     uv run uvicorn server:app --port 5050
+    uv run --extra fast uvicorn server:app --port 5050   # orjson encoding, br compression
+    A2UI_STATE_DIR=/tmp/a2ui uv run uvicorn server:app --port 5050 --workers 4
 """
 
-import json
 import asyncio
+import atexit
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+from a2ui_server import (
+    ActionLanes, Broadcast, ConnectionManager, DataModelMirror, DeadlineExceeded, Disconnected, ListPager,
+    LocalBackend, LoopLagMonitor, MemoryBackend, Metrics, MetricsMiddleware, PoolFull, ResponseCache, SearchIndex,
+    SlowConsumerPolicy, Superseded, SurfaceBuilder, SurfaceCache, TransportMiddleware, WorkPool, rss_bytes,
+    set_encoder, sse,
+)
+from a2ui_server.encoding import DEFAULT_ENCODER
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_lag.start()
+    yield
+    loop_lag.stop()
+    cpu_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
+surfaces = SurfaceCache()
+
+# Agent state shared across workers. Point A2UI_STATE_DIR at a directory to run
+# `uvicorn --workers N`; without it, state lives in this process.
+backend = LocalBackend(os.environ["A2UI_STATE_DIR"]) if os.environ.get("A2UI_STATE_DIR") else MemoryBackend()
+
+# Every GET stream is admitted, kept alive and accounted for here.
+connections = ConnectionManager(max_connections=50_000, max_per_agent=20_000)
+
+
+@app.get("/connections")
+async def connection_stats():
+    return connections.stats()
+
+
+# Frames, bytes and action latency per agent, encode time, client errors.
+metrics = Metrics(trace_file=os.environ.get("A2UI_TRACE_FILE"))
+atexit.register(metrics.close)
+metered = os.environ.get("A2UI_METRICS", "1") != "0"
+if metered:
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+    set_encoder(metrics.timed(DEFAULT_ENCODER))
+
+# SSE or JSONL, compressed or not, per Accept / Accept-Encoding. Added last so
+# it wraps the metrics middleware, which counts frames in the SSE it sees.
+app.add_middleware(TransportMiddleware, metrics=metrics if metered else None)
+
+metrics.gauge("a2ui_open_streams", "Open SSE streams, by agent.", lambda: connections.stats()["perAgent"], ("agent",))
+metrics.gauge("a2ui_open_streams_peak", "Most SSE streams open at once.", lambda: connections.peak)
+metrics.gauge("a2ui_streams_rejected_total", "Streams refused at the connection limits.",
+              lambda: connections.rejected, kind="counter")
+metrics.gauge("a2ui_streams_evicted_total", "Streams closed because the client stopped reading.",
+              lambda: connections.evicted, kind="counter")
+metrics.gauge("a2ui_keepalives_total", "Keepalive comments sent.", lambda: connections.keepalives, kind="counter")
+metrics.gauge("a2ui_resident_memory_bytes", "Resident memory of this worker.", rss_bytes)
+metrics.gauge("a2ui_fanout_dropped_total", "Frames not delivered to another worker (LocalBackend).",
+              lambda: getattr(backend, "dropped", None), kind="counter")
+loop_lag = LoopLagMonitor(metrics)
+
+
+@app.get("/metrics")
+async def metrics_text():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 ALL_RESTAURANTS = [
     {"name": "The Golden Fork", "cuisine": "Italian", "rating": 4.5, "priceRange": "$$"},
     {"name": "Sushi Zen", "cuisine": "Japanese", "rating": 4.8, "priceRange": "$$$"},
@@ -32,185 +117,299 @@ ALL_CONTACTS = [
     {"name": "Eve Davis", "email": "eve@example.com", "department": "Engineering"},
 ]
 
+# Built once at startup. insert()/delete() keep an index current if the data
+# changes, but the cached search answers, the prelude's first window and
+# process workers' copies don't follow: call define_*_surface() afterwards.
+restaurant_index = SearchIndex(("name", "cuisine"), ALL_RESTAURANTS)
+contacts_index = SearchIndex(("name", "department"), ALL_CONTACTS)
+
+
+# ── Paging ───────────────────────────────────────────────────────────
+
+# List surfaces send one window up front; the "Load more" button fetches the next.
+pager = ListPager(page_size=50, byte_budget=32 * 1024)
 
-def sse(data: dict) -> str:
-    return f"data: {json.dumps(data)}\n\n"
 
+def list_window(rows: list, loaded: int) -> tuple[list, dict]:
+    shown, page = pager.extend(rows, loaded)
+    page["summary"] = f"Showing {page['loaded']} of {page['total']}"
+    return shown, page
 
-def components_msg(surface_id: str, components: list) -> dict:
-    return {"type": "updateComponents", "surfaceId": surface_id, "components": components}
+
+def requested_window(body: dict, list_key: str) -> tuple[str, int]:
+    """(query, rows already loaded) for a search or loadMore action."""
+    action = body.get("action", {})
+    if action.get("name") == "loadMore":
+        # The client echoes its data model, so the server keeps no paging state.
+        # The reply sets the grown list in one message: per-row messages would
+        # each rebuild the client's document.
+        echoed = body.get("dataModel") or {}
+        return echoed.get("query", ""), len(echoed.get(list_key) or [])
+    return (action.get("context") or {}).get("value", ""), 0
+
+
+# ── CPU-bound work ───────────────────────────────────────────────────
+
+# Searching a large dataset and encoding the answer would stall every stream
+# on the event loop, so it runs here. Process workers are forked and see the
+# datasets as of the last reset(), which define_*_surface calls.
+cpu_pool = WorkPool(kind=os.environ.get("A2UI_POOL", "thread"), workers=int(os.environ.get("A2UI_POOL_WORKERS", "2")),
+                    max_queue=64, deadline=5.0)
+metrics.gauge("a2ui_pool_pending", "CPU-bound jobs queued or running.", lambda: cpu_pool.pending)
+metrics.gauge("a2ui_pool_rejected_total", "CPU-bound jobs refused because the queue was full.",
+              lambda: cpu_pool.rejected, kind="counter")
+metrics.gauge("a2ui_pool_timed_out_total", "CPU-bound jobs that missed their deadline.",
+              lambda: cpu_pool.timed_out, kind="counter")
+metrics.gauge("a2ui_pool_abandoned_total", "CPU-bound jobs abandoned by a disconnect or a newer search.",
+              lambda: cpu_pool.abandoned, kind="counter")
+
+
+# ── Search actions ───────────────────────────────────────────────────
+
+# Clients search on every keystroke. A newer search from the same session and
+# surface cancels the one in flight, and answers are cached until the dataset
+# changes (define_*_surface clears them).
+SESSION_HEADER = "a2ui-session"
+search_lanes = ActionLanes()
+restaurant_cache = ResponseCache(max_entries=4096, max_bytes=16 * 1024 * 1024, ttl=300)
+contacts_cache = ResponseCache(max_entries=4096, max_bytes=16 * 1024 * 1024, ttl=300)
+
+
+metrics.gauge("a2ui_actions_superseded_total", "Searches cancelled by a newer one from the same session.",
+              lambda: search_lanes.superseded, kind="counter")
+metrics.gauge("a2ui_search_cache_hits_total", "Search cache hits, by agent.",
+              lambda: {"restaurant": restaurant_cache.hits, "contacts": contacts_cache.hits}, ("agent",), kind="counter")
+metrics.gauge("a2ui_search_cache_misses_total", "Search cache misses, by agent.",
+              lambda: {"restaurant": restaurant_cache.misses, "contacts": contacts_cache.misses}, ("agent",),
+              kind="counter")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+@cpu_pool.cpu_bound
+def answer_search(index_name: str, surface_id: str, list_key: str, query: str, loaded: int,
+                  matches: list | None) -> tuple[bytes, list | None]:
+    """
+    Encoded frames for a search: run it (unless `matches` are given) and cut
+    the window. Also returns the matches it found, for the rows cache, when
+    the pool shares this process's memory. The index is looked up by its
+    module-level name, so that a worker process uses its own copy instead of
+    receiving it pickled.
+    """
+    searched = None
+    if matches is None:
+        matches = searched = globals()[index_name].search(normalize_query(query))
+    rows, page = list_window(matches, loaded)
+    # Whole values, not a diff against the echoed model: replies to overlapping
+    # searches can arrive after the client's model has moved on, and replacing
+    # is right whatever the client holds.
+    messages = [{"type": "updateDataModel", "surfaceId": surface_id, "path": path, "value": value}
+                for path, value in (("/query", query), (f"/{list_key}", rows), ("/page", page))]
+    return b"".join(sse(m) for m in messages), searched if cpu_pool.shares_memory else None
+
+
+async def search_frames(body: dict, surface_id: str, index_name: str, list_key: str, cache: ResponseCache,
+                        receive) -> bytes:
+    query, loaded = requested_window(body, list_key)
+    key = ("frames", query, loaded)
+    frames = cache.get(key)
+    if frames is not None:
+        return frames
+
+    rows_key = ("rows", normalize_query(query))
+    # Worker processes would have to copy the rows both ways; they search their own copy instead.
+    matches = cache.get(rows_key) if cpu_pool.shares_memory else None
+    frames, searched = await answer_search(index_name, surface_id, list_key, query, loaded, matches, receive=receive)
+    if searched is not None:
+        cache.put(rows_key, searched, 8 * len(searched))  # references to shared rows
+    cache.put(key, frames, len(frames))
+    return frames
+
+
+async def search_action(request: Request, body: dict, surface_id: str, index_name: str, list_key: str,
+                        cache: ResponseCache) -> Response:
+    session = request.headers.get(SESSION_HEADER)
+    try:
+        frames = await search_lanes.run(
+            (session, surface_id) if session else None,
+            lambda: search_frames(body, surface_id, index_name, list_key, cache, request.receive),
+        )
+    except (Superseded, Disconnected):
+        frames = b""  # the newer search answers instead, or nobody is listening
+    except PoolFull:
+        return Response(status_code=503, headers={"Retry-After": "1"})
+    except DeadlineExceeded:
+        return Response(status_code=504)
+    return Response(frames, media_type="text/event-stream")
 
 
 # ── Restaurant Finder ────────────────────────────────────────────────
 
+def define_restaurant_surface() -> None:
+    """(Re)build the cached prelude and drop cached searches; call again after changing the dataset."""
+    restaurant_cache.clear()
+    cpu_pool.reset()
+    restaurants, page = list_window(restaurant_index.rows(), 0)
+    surfaces.define_surface(
+        SurfaceBuilder("restaurant-finder").send_data_model()
+        .add("root", "Column", children=["header", "search-row", "divider1", "results-list", "page-row"])
+        .add("header", "Text", text="Restaurant Finder", variant="h2")
+        .add("search-row", "Row", children=["search-field", "search-btn"], gap="8", align="end")
+        .add("search-field", "TextField", placeholder="Try 'Italian' or 'Sushi'...", label="Search by name or cuisine", action={"event": {"name": "search"}})
+        .add("search-btn", "Button", label="Search", action={"event": {"name": "search", "context": {"value": "/query"}}})
+        .add("divider1", "Divider")
+        .add("results-list", "List", data="/restaurants", template={"componentId": "restaurant-card"})
+        .add("restaurant-card", "Card", title="name", children=["card-body"])
+        .add("card-body", "Row", children=["card-cuisine", "card-rating", "card-price"], justify="spaceBetween")
+        .add("card-cuisine", "Text", text="cuisine", variant="body")
+        .add("card-rating", "Text", text="rating", variant="caption")
+        .add("card-price", "Text", text="priceRange", variant="caption")
+        .add("page-row", "Row", children=["page-summary", "load-more-btn"], justify="spaceBetween", align="center")
+        .add("page-summary", "Text", text="/page/summary", variant="caption")
+        .add("load-more-btn", "Button", label="Load more", action={"event": {"name": "loadMore"}})
+        # First window right after the components so the page paints early.
+        .data_model({"query": "", "restaurants": restaurants, "page": page})
+        .build()
+    )
+
+
+define_restaurant_surface()
+
+
 @app.get("/agents/restaurant")
-async def restaurant_stream():
-    async def generate():
-        yield sse({"type": "createSurface", "surfaceId": "restaurant-finder", "sendDataModel": True})
-        yield sse({"type": "updateDataModel", "surfaceId": "restaurant-finder", "path": "/", "value": {"query": "", "restaurants": ALL_RESTAURANTS}})
-        yield sse(components_msg("restaurant-finder", [
-            {"id": "root", "component": "Column", "children": ["header", "search-row", "divider1", "results-list"]},
-            {"id": "header", "component": "Text", "text": "Restaurant Finder", "variant": "h2"},
-            {"id": "search-row", "component": "Row", "children": ["search-field", "search-btn"], "gap": "8", "align": "end"},
-            {"id": "search-field", "component": "TextField", "placeholder": "Try 'Italian' or 'Sushi'...", "label": "Search by name or cuisine", "action": {"event": {"name": "search"}}},
-            {"id": "search-btn", "component": "Button", "label": "Search", "action": {"event": {"name": "search", "context": {"value": "/query"}}}},
-            {"id": "divider1", "component": "Divider"},
-            {"id": "results-list", "component": "List", "data": "/restaurants", "template": {"componentId": "restaurant-card"}},
-            {"id": "restaurant-card", "component": "Card", "title": "name", "children": ["card-body"]},
-            {"id": "card-body", "component": "Row", "children": ["card-cuisine", "card-rating", "card-price"], "justify": "spaceBetween"},
-            {"id": "card-cuisine", "component": "Text", "text": "cuisine", "variant": "body"},
-            {"id": "card-rating", "component": "Text", "text": "rating", "variant": "caption"},
-            {"id": "card-price", "component": "Text", "text": "priceRange", "variant": "caption"},
-        ]))
-        # Keep alive
-        while True:
-            await asyncio.sleep(30)
-            yield ": keepalive\n\n"
-
-    return StreamingResponse(generate(), media_type="text/event-stream")
+async def restaurant_stream(request: Request):
+    return connections.stream("restaurant", surfaces.resume("restaurant-finder", request.headers.get("last-event-id")))
 
 
 @app.post("/agents/restaurant")
 async def restaurant_action(request: Request):
     body = await request.json()
     if "error" in body:
+        metrics.client_error("restaurant", body["error"])
         return StreamingResponse(iter([]), media_type="text/event-stream")
-    action = body.get("action", {})
-    query = (action.get("context") or {}).get("value", "")
+    # loadMore reads how many rows are shown from the data model the client echoes back (sendDataModel).
+    return await search_action(request, body, "restaurant-finder", "restaurant_index", "restaurants", restaurant_cache)
 
-    if query:
-        filtered = [r for r in ALL_RESTAURANTS if query.lower() in r["name"].lower() or query.lower() in r["cuisine"].lower()]
-    else:
-        filtered = ALL_RESTAURANTS
 
-    async def generate():
-        yield sse({"type": "updateDataModel", "surfaceId": "restaurant-finder", "path": "/query", "value": query})
-        yield sse({"type": "updateDataModel", "surfaceId": "restaurant-finder", "path": "/restaurants", "value": filtered})
-
-    return StreamingResponse(generate(), media_type="text/event-stream")
+# ── Contact Lookup ───────────────────────────────────────────────────
 
+def define_contacts_surface() -> None:
+    """(Re)build the cached prelude and drop cached searches; call again after changing the dataset."""
+    contacts_cache.clear()
+    cpu_pool.reset()
+    contacts, page = list_window(contacts_index.rows(), 0)
+    surfaces.define_surface(
+        SurfaceBuilder("contacts").send_data_model()
+        .add("root", "Column", children=["header", "search-row", "divider", "contact-list", "page-row"], gap="12")
+        .add("header", "Text", text="Contact Directory", variant="h2")
+        .add("search-row", "Row", children=["search-input", "search-btn"], gap="8", align="end")
+        .add("search-input", "TextField", placeholder="Try 'Engineering' or 'Alice'...", label="Search by name or department", action={"event": {"name": "search"}})
+        .add("search-btn", "Button", label="Search", action={"event": {"name": "search", "context": {"value": "/query"}}})
+        .add("divider", "Divider")
+        .add("contact-list", "List", data="/contacts", template={"componentId": "contact-row"})
+        .add("contact-row", "Row", children=["contact-name", "contact-email", "contact-dept"], justify="spaceBetween")
+        .add("contact-name", "Text", text="name", variant="body")
+        .add("contact-email", "Text", text="email", variant="caption")
+        .add("contact-dept", "Text", text="department", variant="caption")
+        .add("page-row", "Row", children=["page-summary", "load-more-btn"], justify="spaceBetween", align="center")
+        .add("page-summary", "Text", text="/page/summary", variant="caption")
+        .add("load-more-btn", "Button", label="Load more", action={"event": {"name": "loadMore"}})
+        .data_model({"query": "", "contacts": contacts, "page": page})
+        .build()
+    )
+
+
+define_contacts_surface()
 
-# ── Contact Lookup ───────────────────────────────────────────────────
 
 @app.get("/agents/contacts")
-async def contacts_stream():
-    async def generate():
-        yield sse({"type": "createSurface", "surfaceId": "contacts", "sendDataModel": True})
-        yield sse({"type": "updateDataModel", "surfaceId": "contacts", "path": "/", "value": {"query": "", "contacts": ALL_CONTACTS}})
-        yield sse(components_msg("contacts", [
-            {"id": "root", "component": "Column", "children": ["header", "search-row", "divider", "contact-list"], "gap": "12"},
-            {"id": "header", "component": "Text", "text": "Contact Directory", "variant": "h2"},
-            {"id": "search-row", "component": "Row", "children": ["search-input", "search-btn"], "gap": "8", "align": "end"},
-            {"id": "search-input", "component": "TextField", "placeholder": "Try 'Engineering' or 'Alice'...", "label": "Search by name or department", "action": {"event": {"name": "search"}}},
-            {"id": "search-btn", "component": "Button", "label": "Search", "action": {"event": {"name": "search", "context": {"value": "/query"}}}},
-            {"id": "divider", "component": "Divider"},
-            {"id": "contact-list", "component": "List", "data": "/contacts", "template": {"componentId": "contact-row"}},
-            {"id": "contact-row", "component": "Row", "children": ["contact-name", "contact-email", "contact-dept"], "justify": "spaceBetween"},
-            {"id": "contact-name", "component": "Text", "text": "name", "variant": "body"},
-            {"id": "contact-email", "component": "Text", "text": "email", "variant": "caption"},
-            {"id": "contact-dept", "component": "Text", "text": "department", "variant": "caption"},
-        ]))
-        while True:
-            await asyncio.sleep(30)
-            yield ": keepalive\n\n"
-
-    return StreamingResponse(generate(), media_type="text/event-stream")
+async def contacts_stream(request: Request):
+    return connections.stream("contacts", surfaces.resume("contacts", request.headers.get("last-event-id")))
 
 
 @app.post("/agents/contacts")
 async def contacts_action(request: Request):
     body = await request.json()
     if "error" in body:
+        metrics.client_error("contacts", body["error"])
         return StreamingResponse(iter([]), media_type="text/event-stream")
-    action = body.get("action", {})
-    query = (action.get("context") or {}).get("value", "")
+    return await search_action(request, body, "contacts", "contacts_index", "contacts", contacts_cache)
 
-    if query:
-        filtered = [c for c in ALL_CONTACTS if query.lower() in c["name"].lower() or query.lower() in c["department"].lower()]
-    else:
-        filtered = ALL_CONTACTS
 
-    async def generate():
-        yield sse({"type": "updateDataModel", "surfaceId": "contacts", "path": "/query", "value": query})
-        yield sse({"type": "updateDataModel", "surfaceId": "contacts", "path": "/contacts", "value": filtered})
-
-    return StreamingResponse(generate(), media_type="text/event-stream")
+# ── Component Gallery ────────────────────────────────────────────────
 
+surfaces.define_surface(
+    SurfaceBuilder("gallery")
+    # Root layout
+    .add("root", "Column", children=[
+        "title", "subtitle", "divider-top",
+        "display-section", "divider1",
+        "layout-section", "divider2",
+        "input-section", "divider3",
+        "media-section",
+    ], gap="16")
+    .add("title", "Text", text="A2UI Component Gallery", variant="h1")
+    .add("subtitle", "Text", text="Served from Python, rendered in Blazor", variant="caption")
+    .add("divider-top", "Divider")
+
+    # ── Display Components ──────────────────────────────────────
+    .add("display-section", "Card", title="Display Components", children=["display-col"])
+    .add("display-col", "Column", children=["text-h2", "text-body", "icon1", "image1"], gap="8")
+    .add("text-h2", "Text", text="Heading 2", variant="h2")
+    .add("text-body", "Text", text="This text is coming from a Python FastAPI server.", variant="body")
+    .add("icon1", "Icon", icon="★", size="32")
+    .add("image1", "Image", src="https://picsum.photos/seed/a2ui/600/200", alt="Sample landscape", fit="cover")
+    .add("divider1", "Divider")
+
+    # ── Layout Components ───────────────────────────────────────
+    .add("layout-section", "Card", title="Layout Components", children=["layout-col"])
+    .add("layout-col", "Column", children=["tabs1"], gap="8")
+    .add("tabs1", "Tabs", tabs=[
+        {"label": "Tab One", "contentId": "tab1-content"},
+        {"label": "Tab Two", "contentId": "tab2-content"},
+    ])
+    .add("tab1-content", "Text", text="Content of the first tab.", variant="body")
+    .add("tab2-content", "Text", text="Content of the second tab.", variant="body")
+    .add("divider2", "Divider")
+
+    # ── Input Components ────────────────────────────────────────
+    .add("input-section", "Card", title="Input Components", children=["input-col"])
+    .add("input-col", "Column", children=[
+        "btn-primary", "textfield1", "checkbox1", "slider1",
+        "choicepicker1", "dateinput1",
+        "validation-divider", "validation-label",
+        "tf-error", "tf-helper", "cb-error", "cp-error",
+    ], gap="12")
+    .add("btn-primary", "Button", label="Click Me", variant="primary")
+    .add("textfield1", "TextField", label="Text Field", placeholder="Type here...")
+    .add("checkbox1", "CheckBox", label="Check me")
+    .add("slider1", "Slider", label="Volume", min=0, max=100, step=1, value=50)
+    .add("choicepicker1", "ChoicePicker", label="Favorite color", options=["Red", "Green", "Blue", "Yellow"])
+    .add("dateinput1", "DateTimeInput", label="Pick a date", inputType="date")
+
+    # Validation examples
+    .add("validation-divider", "Divider")
+    .add("validation-label", "Text", text="Validation & Helper Text", variant="h3")
+    .add("tf-error", "TextField", label="Email", placeholder="you@example.com", error="Please enter a valid email address")
+    .add("tf-helper", "TextField", label="Username", placeholder="Choose a username", helperText="Must be 3-20 characters, letters and numbers only")
+    .add("cb-error", "CheckBox", label="I accept the terms", error="You must accept the terms to continue")
+    .add("cp-error", "ChoicePicker", label="Country", options=["USA", "Canada", "UK", "Germany"], error="Please select your country")
+    .add("divider3", "Divider")
+
+    # ── Media Components ────────────────────────────────────────
+    .add("media-section", "Card", title="Media Components", children=["media-col"])
+    .add("media-col", "Column", children=["video1", "audio1"], gap="12")
+    .add("video1", "Video", src="https://interactive-examples.mdn.mozilla.net/media/cc0-videos/flower.webm", controls=True)
+    .add("audio1", "AudioPlayer", src="https://interactive-examples.mdn.mozilla.net/media/cc0-audio/t-rex-roar.mp3", controls=True)
+    .build()
+)
 
-# ── Component Gallery ────────────────────────────────────────────────
 
 @app.get("/agents/gallery")
-async def gallery_stream():
-    async def generate():
-        yield sse({"type": "createSurface", "surfaceId": "gallery"})
-        yield sse(components_msg("gallery", [
-            # Root layout
-            {"id": "root", "component": "Column", "children": [
-                "title", "subtitle", "divider-top",
-                "display-section", "divider1",
-                "layout-section", "divider2",
-                "input-section", "divider3",
-                "media-section",
-            ], "gap": "16"},
-            {"id": "title", "component": "Text", "text": "A2UI Component Gallery", "variant": "h1"},
-            {"id": "subtitle", "component": "Text", "text": "Served from Python, rendered in Blazor", "variant": "caption"},
-            {"id": "divider-top", "component": "Divider"},
-
-            # ── Display Components ──────────────────────────────────────
-            {"id": "display-section", "component": "Card", "title": "Display Components", "children": ["display-col"]},
-            {"id": "display-col", "component": "Column", "children": ["text-h2", "text-body", "icon1", "image1"], "gap": "8"},
-            {"id": "text-h2", "component": "Text", "text": "Heading 2", "variant": "h2"},
-            {"id": "text-body", "component": "Text", "text": "This text is coming from a Python FastAPI server.", "variant": "body"},
-            {"id": "icon1", "component": "Icon", "icon": "★", "size": "32"},
-            {"id": "image1", "component": "Image", "src": "https://picsum.photos/seed/a2ui/600/200", "alt": "Sample landscape", "fit": "cover"},
-            {"id": "divider1", "component": "Divider"},
-
-            # ── Layout Components ───────────────────────────────────────
-            {"id": "layout-section", "component": "Card", "title": "Layout Components", "children": ["layout-col"]},
-            {"id": "layout-col", "component": "Column", "children": ["tabs1"], "gap": "8"},
-            {"id": "tabs1", "component": "Tabs", "tabs": [
-                {"label": "Tab One", "contentId": "tab1-content"},
-                {"label": "Tab Two", "contentId": "tab2-content"},
-            ]},
-            {"id": "tab1-content", "component": "Text", "text": "Content of the first tab.", "variant": "body"},
-            {"id": "tab2-content", "component": "Text", "text": "Content of the second tab.", "variant": "body"},
-            {"id": "divider2", "component": "Divider"},
-
-            # ── Input Components ────────────────────────────────────────
-            {"id": "input-section", "component": "Card", "title": "Input Components", "children": ["input-col"]},
-            {"id": "input-col", "component": "Column", "children": [
-                "btn-primary", "textfield1", "checkbox1", "slider1",
-                "choicepicker1", "dateinput1",
-                "validation-divider", "validation-label",
-                "tf-error", "tf-helper", "cb-error", "cp-error",
-            ], "gap": "12"},
-            {"id": "btn-primary", "component": "Button", "label": "Click Me", "variant": "primary"},
-            {"id": "textfield1", "component": "TextField", "label": "Text Field", "placeholder": "Type here..."},
-            {"id": "checkbox1", "component": "CheckBox", "label": "Check me"},
-            {"id": "slider1", "component": "Slider", "label": "Volume", "min": 0, "max": 100, "step": 1, "value": 50},
-            {"id": "choicepicker1", "component": "ChoicePicker", "label": "Favorite color", "options": ["Red", "Green", "Blue", "Yellow"]},
-            {"id": "dateinput1", "component": "DateTimeInput", "label": "Pick a date", "inputType": "date"},
-
-            # Validation examples
-            {"id": "validation-divider", "component": "Divider"},
-            {"id": "validation-label", "component": "Text", "text": "Validation & Helper Text", "variant": "h3"},
-            {"id": "tf-error", "component": "TextField", "label": "Email", "placeholder": "you@example.com", "error": "Please enter a valid email address"},
-            {"id": "tf-helper", "component": "TextField", "label": "Username", "placeholder": "Choose a username", "helperText": "Must be 3-20 characters, letters and numbers only"},
-            {"id": "cb-error", "component": "CheckBox", "label": "I accept the terms", "error": "You must accept the terms to continue"},
-            {"id": "cp-error", "component": "ChoicePicker", "label": "Country", "options": ["USA", "Canada", "UK", "Germany"], "error": "Please select your country"},
-            {"id": "divider3", "component": "Divider"},
-
-            # ── Media Components ────────────────────────────────────────
-            {"id": "media-section", "component": "Card", "title": "Media Components", "children": ["media-col"]},
-            {"id": "media-col", "component": "Column", "children": ["video1", "audio1"], "gap": "12"},
-            {"id": "video1", "component": "Video", "src": "https://interactive-examples.mdn.mozilla.net/media/cc0-videos/flower.webm", "controls": True},
-            {"id": "audio1", "component": "AudioPlayer", "src": "https://interactive-examples.mdn.mozilla.net/media/cc0-audio/t-rex-roar.mp3", "controls": True},
-        ]))
-        while True:
-            await asyncio.sleep(30)
-            yield ": keepalive\n\n"
-
-    return StreamingResponse(generate(), media_type="text/event-stream")
+async def gallery_stream(request: Request):
+    return connections.stream("gallery", surfaces.resume("gallery", request.headers.get("last-event-id")))
 
 
 # ── Live State Machine ──────────────────────────────────────────────
@@ -224,126 +423,161 @@ PIPELINE_STATES = [
     {"id": "delivered",  "label": "Delivered"},
 ]
 
+PIPELINE_INITIAL = {
+    "pipeline": {
+        "title": "Order Processing Pipeline",
+        "states": [{**s, "status": "pending"} for s in PIPELINE_STATES],
+        "statusMessage": "Waiting to start...",
+    }
+}
+
+surfaces.define_surface(
+    SurfaceBuilder("state-machine").send_data_model()
+    .add("root", "Column", children=["header", "pipeline", "status-text"], gap="12")
+    .add("header", "Text", text="Live State Machine", variant="h2")
+    .add("pipeline", "StateMachine", data="/pipeline", title="/pipeline/title")
+    .add("status-text", "Text", text="/pipeline/statusMessage", variant="caption")
+    # Initial data model — all pending
+    .data_model(PIPELINE_INITIAL)
+    .build()
+)
+
+
+pipeline_model = DataModelMirror("state-machine", PIPELINE_INITIAL)
+
+
+async def run_pipeline(publish):
+    """Auto-advance through states in a loop. One ticker shared by every viewer."""
+
+    def pipeline_update(states: list, status_message: str) -> None:
+        # Only the changed statuses and message go out, e.g. /pipeline/states/2/status.
+        for message in pipeline_model.update("/pipeline", {
+            "title": "Order Processing Pipeline",
+            "states": states,
+            "statusMessage": status_message,
+        }):
+            publish(message)
+
+    # Viewers joining a fresh run start from the prelude's initial model.
+    pipeline_model.reset(PIPELINE_INITIAL)
+    while True:
+        for step in range(len(PIPELINE_STATES)):
+            await asyncio.sleep(2)
+            states = []
+            for i, s in enumerate(PIPELINE_STATES):
+                if i < step:
+                    states.append({**s, "status": "completed"})
+                elif i == step:
+                    states.append({**s, "status": "active"})
+                else:
+                    states.append({**s, "status": "pending"})
+            msg = f"Step {step + 1}/{len(PIPELINE_STATES)}: {PIPELINE_STATES[step]['label']}"
+            pipeline_update(states, msg)
+
+        # All completed
+        await asyncio.sleep(2)
+        pipeline_update([{**s, "status": "completed"} for s in PIPELINE_STATES], "All steps completed! Restarting in 3s...")
+        await asyncio.sleep(3)
+
+        # Reset
+        pipeline_update([{**s, "status": "pending"} for s in PIPELINE_STATES], "Pipeline reset. Starting...")
+
+
+# Updates are patches, so late or lagging viewers resync from a full snapshot.
+pipeline = Broadcast(run_pipeline, snapshot=pipeline_model.snapshot, queue_size=8,
+                     policy=SlowConsumerPolicy.COALESCE)
+metrics.gauge("a2ui_broadcast_subscribers", "Streams subscribed to the state-machine ticker.", lambda: len(pipeline))
+
 
 @app.get("/agents/state-machine")
-async def state_machine_stream():
-    async def generate():
-        yield sse({"type": "createSurface", "surfaceId": "state-machine", "sendDataModel": True})
-
-        # Initial data model — all pending
-        initial_states = [{**s, "status": "pending"} for s in PIPELINE_STATES]
-        yield sse({"type": "updateDataModel", "surfaceId": "state-machine", "path": "/", "value": {
-            "pipeline": {
-                "title": "Order Processing Pipeline",
-                "states": initial_states,
-                "statusMessage": "Waiting to start...",
-            }
-        }})
-
-        # Component tree
-        yield sse(components_msg("state-machine", [
-            {"id": "root", "component": "Column", "children": ["header", "pipeline", "status-text"], "gap": "12"},
-            {"id": "header", "component": "Text", "text": "Live State Machine", "variant": "h2"},
-            {"id": "pipeline", "component": "StateMachine", "data": "/pipeline", "title": "/pipeline/title"},
-            {"id": "status-text", "component": "Text", "text": "/pipeline/statusMessage", "variant": "caption"},
-        ]))
-
-        # Auto-advance through states in a loop
-        while True:
-            for step in range(len(PIPELINE_STATES)):
-                await asyncio.sleep(2)
-                states = []
-                for i, s in enumerate(PIPELINE_STATES):
-                    if i < step:
-                        states.append({**s, "status": "completed"})
-                    elif i == step:
-                        states.append({**s, "status": "active"})
-                    else:
-                        states.append({**s, "status": "pending"})
-                msg = f"Step {step + 1}/{len(PIPELINE_STATES)}: {PIPELINE_STATES[step]['label']}"
-                yield sse({"type": "updateDataModel", "surfaceId": "state-machine", "path": "/pipeline", "value": {
-                    "title": "Order Processing Pipeline",
-                    "states": states,
-                    "statusMessage": msg,
-                }})
-
-            # All completed
-            await asyncio.sleep(2)
-            yield sse({"type": "updateDataModel", "surfaceId": "state-machine", "path": "/pipeline", "value": {
-                "title": "Order Processing Pipeline",
-                "states": [{**s, "status": "completed"} for s in PIPELINE_STATES],
-                "statusMessage": "All steps completed! Restarting in 3s...",
-            }})
-            await asyncio.sleep(3)
+async def state_machine_stream(request: Request):
+    last_event_id = request.headers.get("last-event-id")
 
-            # Reset
-            yield sse({"type": "updateDataModel", "surfaceId": "state-machine", "path": "/pipeline", "value": {
-                "title": "Order Processing Pipeline",
-                "states": [{**s, "status": "pending"} for s in PIPELINE_STATES],
-                "statusMessage": "Pipeline reset. Starting...",
-            }})
+    async def generate():
+        # A viewer resuming the current run already has the components and
+        # only needs the patches it missed (or a snapshot).
+        if not pipeline.can_resume(last_event_id):
+            yield surfaces.resume("state-machine", last_event_id)
+        async for frame in pipeline.stream(last_event_id=last_event_id):
+            yield frame
 
-    return StreamingResponse(generate(), media_type="text/event-stream")
+    return connections.stream("state-machine", generate())
 
 
 # ── Error Demo ──────────────────────────────────────────────────────
 
-error_demo_count = 0
+ERROR_DEMO_INITIAL = {"lastErrorMessage": "No errors reported yet.", "errorCount": 0}
+
+
+def error_demo_message(model: dict) -> dict:
+    return {"type": "updateDataModel", "surfaceId": "error-demo", "path": "/", "value": model}
+
+
+surfaces.define_surface(
+    # FancyWidget is deliberately outside the catalog: the client shows its fallback.
+    SurfaceBuilder("error-demo", allow_unknown={"FancyWidget"}).send_data_model()
+    .add("root", "Column", children=[
+        "header", "description", "divider1", "unknown-section", "divider2", "report-section",
+    ], gap="16")
+    .add("header", "Text", text="Error Handling Demo", variant="h2")
+    .add("description", "Text", text="This demo shows how A2UI handles errors gracefully \u2014 unknown components render fallback UI, and errors can be reported back to the server.", variant="body")
+    .add("divider1", "Divider")
+    # Unknown component section
+    .add("unknown-section", "Card", title="Unknown Component", children=["unknown-col"])
+    .add("unknown-col", "Column", children=["unknown-desc", "unknown-component"], gap="8")
+    .add("unknown-desc", "Text", text="The component below uses type 'FancyWidget' which doesn't exist in the standard catalog. The renderer shows a graceful fallback:", variant="body")
+    .add("unknown-component", "FancyWidget")
+    .add("divider2", "Divider")
+    # Error reporting section
+    .add("report-section", "Card", title="Error Reporting", children=["report-col"])
+    .add("report-col", "Column", children=["report-desc", "report-btn", "error-status"], gap="8")
+    .add("report-desc", "Text", text="Click the button to send a VALIDATION_FAILED error report to the server via the v0.9 error envelope. The server will acknowledge receipt.", variant="body")
+    .add("report-btn", "Button", label="Report Error to Server", action={"event": {"name": "report-error"}})
+    .add("error-status", "Text", text="/lastErrorMessage", variant="caption")
+    .data_model(ERROR_DEMO_INITIAL)
+    .build()
+)
 
 
 @app.get("/agents/error-demo")
-async def error_demo_stream():
+async def error_demo_stream(request: Request):
+    prelude = surfaces.resume("error-demo", request.headers.get("last-event-id"))
+
+    def snapshot() -> dict:
+        return error_demo_message(backend.get("error-demo", ERROR_DEMO_INITIAL))
+
     async def generate():
-        yield sse({"type": "createSurface", "surfaceId": "error-demo", "sendDataModel": True})
-        yield sse({"type": "updateDataModel", "surfaceId": "error-demo", "path": "/", "value": {
-            "lastErrorMessage": "No errors reported yet.",
-            "errorCount": 0,
-        }})
-        yield sse(components_msg("error-demo", [
-            {"id": "root", "component": "Column", "children": [
-                "header", "description", "divider1", "unknown-section", "divider2", "report-section",
-            ], "gap": "16"},
-            {"id": "header", "component": "Text", "text": "Error Handling Demo", "variant": "h2"},
-            {"id": "description", "component": "Text", "text": "This demo shows how A2UI handles errors gracefully \u2014 unknown components render fallback UI, and errors can be reported back to the server.", "variant": "body"},
-            {"id": "divider1", "component": "Divider"},
-            # Unknown component section
-            {"id": "unknown-section", "component": "Card", "title": "Unknown Component", "children": ["unknown-col"]},
-            {"id": "unknown-col", "component": "Column", "children": ["unknown-desc", "unknown-component"], "gap": "8"},
-            {"id": "unknown-desc", "component": "Text", "text": "The component below uses type 'FancyWidget' which doesn't exist in the standard catalog. The renderer shows a graceful fallback:", "variant": "body"},
-            {"id": "unknown-component", "component": "FancyWidget"},
-            {"id": "divider2", "component": "Divider"},
-            # Error reporting section
-            {"id": "report-section", "component": "Card", "title": "Error Reporting", "children": ["report-col"]},
-            {"id": "report-col", "component": "Column", "children": ["report-desc", "report-btn", "error-status"], "gap": "8"},
-            {"id": "report-desc", "component": "Text", "text": "Click the button to send a VALIDATION_FAILED error report to the server via the v0.9 error envelope. The server will acknowledge receipt.", "variant": "body"},
-            {"id": "report-btn", "component": "Button", "label": "Report Error to Server", "action": {"event": {"name": "report-error"}}},
-            {"id": "error-status", "component": "Text", "text": "/lastErrorMessage", "variant": "caption"},
-        ]))
-        while True:
-            await asyncio.sleep(30)
-            yield ": keepalive\n\n"
-
-    return StreamingResponse(generate(), media_type="text/event-stream")
+        yield prelude
+        # Current shared state first (other workers may have counted errors), then live updates.
+        async for frame in backend.stream("error-demo", snapshot=snapshot):
+            yield frame
+
+    return connections.stream("error-demo", generate())
 
 
 @app.post("/agents/error-demo")
 async def error_demo_action(request: Request):
-    global error_demo_count
     body = await request.json()
 
     if "error" in body:
         error = body["error"]
-        error_demo_count += 1
-        message = f"Server received error #{error_demo_count}: [{error.get('code', '')}] {error.get('message', '')}"
+        metrics.client_error("error-demo", error)
         path = error.get("path")
-        if path:
-            message += f" (path: {path})"
+
+        def record(model: dict) -> dict:
+            count = model["errorCount"] + 1
+            message = f"Server received error #{count}: [{error.get('code', '')}] {error.get('message', '')}"
+            if path:
+                message += f" (path: {path})"
+            return {"lastErrorMessage": message, "errorCount": count}
+
+        # The count is shared by every worker, and so is the update: viewers
+        # whose stream is held by another worker see it too.
+        update = error_demo_message(await backend.aupdate("error-demo", record, ERROR_DEMO_INITIAL))
+        backend.publish("error-demo", update)
 
         async def generate():
-            yield sse({"type": "updateDataModel", "surfaceId": "error-demo", "path": "/", "value": {
-                "lastErrorMessage": message,
-                "errorCount": error_demo_count,
-            }})
+            yield sse(update)
 
         return StreamingResponse(generate(), media_type="text/event-stream")
 
@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import pytest
+
+from a2ui_server import ActionLanes, ResponseCache, Superseded
+
+
+def test_newer_action_supersedes_the_one_in_flight():
+    async def run():
+        lanes = ActionLanes()
+        finished = []
+
+        async def search(query):
+            await asyncio.sleep(0.01)
+            finished.append(query)
+            return query
+
+        results = await asyncio.gather(
+            *(lanes.run(("s1", "restaurants"), lambda q=q: search(q)) for q in ("s", "su", "sus")),
+            lanes.run(("s2", "restaurants"), lambda: search("taco")),
+            return_exceptions=True,
+        )
+        return lanes, finished, results
+
+    lanes, finished, results = asyncio.run(run())
+    assert isinstance(results[0], Superseded) and isinstance(results[1], Superseded)
+    assert results[2:] == ["sus", "taco"]  # other sessions are unaffected
+    assert sorted(finished) == ["sus", "taco"]
+    assert lanes.superseded == 2
+    assert len(lanes) == 0
+
+
+def test_actions_without_a_lane_never_cancel_each_other():
+    async def run():
+        lanes = ActionLanes()
+
+        async def work(n):
+            await asyncio.sleep(0.01)
+            return n
+
+        return await asyncio.gather(*(lanes.run(None, lambda n=n: work(n)) for n in range(3)))
+
+    assert asyncio.run(run()) == [0, 1, 2]
+
+
+def test_cancelling_the_caller_cancels_the_work():
+    async def run():
+        lanes = ActionLanes()
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        caller = asyncio.ensure_future(lanes.run("lane", work))
+        await started.wait()
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        return cancelled.is_set(), len(lanes)
+
+    assert asyncio.run(run()) == (True, 0)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_cache_is_bounded_by_size():
+    cache = ResponseCache(max_entries=100, max_bytes=10)
+    cache.put("a", b"xxxx", 4)
+    cache.put("b", b"yyyy", 4)
+    cache.put("a", b"zzzz", 4)  # replacing an entry doesn't count it twice
+    assert len(cache) == 2
+    cache.put("c", b"wwww", 4)
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    cache.put("big", b"x" * 50, 50)  # an oversized entry is kept on its own
+    assert len(cache) == 1 and cache.get("big") is not None
+
+
+def test_cache_entries_expire_and_clear():
+    cache = ResponseCache(ttl=0.01)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    cache.put("b", 2)
+    cache.clear()
+    assert cache.get("b") is None
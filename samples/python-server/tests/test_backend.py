@@ -0,0 +1,106 @@
+import asyncio
+import json
+import multiprocessing
+import sqlite3
+
+from a2ui_server import LocalBackend, MemoryBackend
+
+
+def payload(frame: bytes) -> dict:
+    return json.loads(frame[len(b"data: "):])
+
+
+def test_update_applies_function_to_current_value():
+    backend = MemoryBackend()
+    assert backend.update("n", lambda n: n + 1, 0) == 1
+    assert backend.update("n", lambda n: n + 1, 0) == 2
+    assert backend.get("n") == 2
+    assert backend.get("missing", "default") == "default"
+
+
+def test_stream_starts_with_snapshot_then_published_frames():
+    async def run():
+        backend = MemoryBackend()
+        stream = backend.stream("c", snapshot=lambda: {"n": 0})
+        first = await stream.__anext__()
+        backend.publish("c", {"n": 1})
+        backend.publish("other", {"n": 99})
+        second = await stream.__anext__()
+        await stream.aclose()
+        return backend, [payload(first), payload(second)]
+
+    backend, received = asyncio.run(run())
+    assert received == [{"n": 0}, {"n": 1}]
+    assert backend._channels == {}
+
+
+def test_local_backend_fans_out_to_other_workers(tmp_path):
+    async def run():
+        a = LocalBackend(str(tmp_path), worker="a")
+        b = LocalBackend(str(tmp_path), worker="b")
+        sub_a, sub_b = a.subscribe("c"), b.subscribe("c")
+        a.publish("c", {"n": 1})
+        got = await asyncio.wait_for(asyncio.gather(sub_a.get(), sub_b.get()), 1)
+        asyncio.get_running_loop().remove_reader(a._sock.fileno())
+        a._sock.close()  # a crashes, leaving its socket file behind
+        b.publish("c", {"n": 2})
+        a_left = (tmp_path / "worker-a.sock").exists()
+        b.close()
+        return [payload(f) for f in got], a_left
+
+    received, a_left = asyncio.run(run())
+    assert received == [{"n": 1}, {"n": 1}]
+    assert not a_left
+
+
+def _count(directory: str, times: int) -> None:
+    backend = LocalBackend(directory)
+    for _ in range(times):
+        backend.update("n", lambda n: n + 1, 0)
+    backend.close()
+
+
+def test_local_backend_update_is_atomic_across_processes(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_count, args=(str(tmp_path), 100)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(30)
+    assert [w.exitcode for w in workers] == [0, 0, 0, 0]
+    backend = LocalBackend(str(tmp_path))
+    assert backend.get("n") == 400
+    backend.close()
+
+
+def test_local_backend_aupdate_waits_for_other_writers_off_the_loop(tmp_path):
+    async def run():
+        backend = LocalBackend(str(tmp_path), worker="a")
+        backend.set("n", 0)
+        other = sqlite3.connect(str(tmp_path / "state.db"), isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")  # another worker mid-update
+        pending = asyncio.create_task(backend.aupdate("n", lambda n: n + 1, 0))
+        await asyncio.sleep(0.1)  # the loop keeps running while the update waits
+        read_meanwhile = backend.get("n")
+        other.execute("COMMIT")
+        other.close()
+        value = await asyncio.wait_for(pending, 5)
+        backend.close()
+        return read_meanwhile, value
+
+    assert asyncio.run(run()) == (0, 1)
+
+
+def test_local_backend_publishes_to_a_worker_that_just_started(tmp_path):
+    async def run():
+        a = LocalBackend(str(tmp_path), worker="a")
+        a.publish("c", {"n": 0})  # nobody else yet
+        b = LocalBackend(str(tmp_path), worker="b")
+        sub = b.subscribe("c")
+        a.publish("c", {"n": 1})
+        got = await asyncio.wait_for(sub.get(), 1)
+        a.close()
+        b.close()
+        return payload(got)
+
+    assert asyncio.run(run()) == {"n": 1}
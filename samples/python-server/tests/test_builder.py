@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from a2ui_server import ComponentBuilder, SurfaceBuilder, SurfaceCache, SurfaceError
+
+
+def decode(body: bytes) -> list[dict]:
+    return [json.loads(line[len(b"data: "):]) for line in body.split(b"\n") if line.startswith(b"data: ")]
+
+
+def page(title: str = "Hello") -> SurfaceBuilder:
+    return (SurfaceBuilder("s").send_data_model()
+            .add("root", "Column", children=["title", "list"], gap="8")
+            .add("title", "Text", text=title, variant="h1")
+            .add("list", "List", data="/items", template={"componentId": "item"})
+            .add("item", "Text", text="name")
+            .data_model({"items": []}))
+
+
+def test_build_encodes_the_same_prelude_as_the_messages():
+    surface = page().build()
+    messages = [
+        {"type": "createSurface", "surfaceId": "s", "sendDataModel": True},
+        {"type": "updateComponents", "surfaceId": "s", "components": [
+            {"id": "root", "component": "Column", "children": ["title", "list"], "gap": "8"},
+            {"id": "title", "component": "Text", "text": "Hello", "variant": "h1"},
+            {"id": "list", "component": "List", "data": "/items", "template": {"componentId": "item"}},
+            {"id": "item", "component": "Text", "text": "name"},
+        ]},
+        {"type": "updateDataModel", "surfaceId": "s", "path": "/", "value": {"items": []}},
+    ]
+    cache = SurfaceCache()
+    assert cache.define_surface(surface) == cache.define("t", messages) == surface.version
+    assert surface.prelude == cache.prelude("t") and cache.prelude("s") is surface.prelude
+    assert decode(surface.prelude) == messages
+    assert page().build().version == surface.version
+
+
+def test_component_builder_mirrors_the_dotnet_setters():
+    surface = (SurfaceBuilder("s")
+               .add_component(ComponentBuilder("root", "Tabs").tabs(("One", "a"), ("Two", "b")))
+               .add_component(ComponentBuilder("a", "Button").label("Go").action("go", {"value": "/q"}))
+               .add_component(ComponentBuilder("b", "Slider").min(0).max(10).step(1).value(5))
+               .build())
+    assert surface["root"].props["tabs"][1] == {"label": "Two", "contentId": "b"}
+    assert surface["a"].props["action"] == {"event": {"name": "go", "context": {"value": "/q"}}}
+    with pytest.raises(AttributeError):
+        surface["b"].props = {}
+    with pytest.raises(AttributeError):
+        surface.version = "x"
+
+
+def test_build_reports_every_problem():
+    builder = (SurfaceBuilder("s")
+               .add("main", "Column", children=["a", "ghost"])
+               .add("a", "Card", children=["b"])
+               .add("b", "Row", children=["a"])
+               .add("tabs", "Tabs", tabs=[{"label": "x", "contentId": "nowhere"}])
+               .add("fancy", "FancyWidget")
+               .add("fancy", "Text"))
+    with pytest.raises(SurfaceError) as error:
+        builder.build()
+    assert sorted(error.value.problems) == sorted([
+        "duplicate id 'fancy'",
+        "'fancy' has unknown component type 'FancyWidget'",
+        "no component with id 'root'",
+        "'main' refers to missing component 'ghost'",
+        "'tabs' refers to missing component 'nowhere'",
+        "reference cycle a -> b -> a",
+    ])
+
+
+def test_allow_unknown_accepts_custom_types():
+    surface = SurfaceBuilder("s", allow_unknown={"FancyWidget"}).add("root", "FancyWidget").build()
+    assert surface["root"].component == "FancyWidget"
+
+
+def test_delta_sends_only_changed_and_added_components():
+    before = page().build()
+    after = page("Goodbye").add("footer", "Divider").build()
+    delta = after.delta(before)
+    assert delta.startswith(f"id: {after.version}\n".encode())
+    [message] = decode(delta)
+    assert message["type"] == "updateComponents"
+    assert [c["id"] for c in message["components"]] == ["title", "footer"]
+    assert message["components"][0]["text"] == "Goodbye"
+    assert page().build().delta(before) == b""
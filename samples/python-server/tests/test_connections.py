@@ -0,0 +1,169 @@
+import asyncio
+
+from a2ui_server import ConnectionManager
+from a2ui_server.connections import KEEPALIVE
+
+
+class Peer:
+    """A fake ASGI client: records what is sent and disconnects on demand."""
+
+    def __init__(self, stall_writes: bool = False):
+        self.messages: list[dict] = []
+        self.gone = asyncio.Event()
+        self.stall_writes = stall_writes
+        self.drained = asyncio.Event()
+        self.drained.set()
+
+    async def receive(self) -> dict:
+        await self.gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message: dict) -> None:
+        if self.stall_writes and message.get("body") == KEEPALIVE:
+            await asyncio.Event().wait()  # a full socket buffer that never drains
+        await self.drained.wait()
+        self.messages.append(message)
+
+    @property
+    def body(self) -> bytes:
+        return b"".join(m.get("body", b"") for m in self.messages)
+
+
+async def serve(response, peer: Peer) -> asyncio.Task:
+    task = asyncio.ensure_future(response({"type": "http"}, peer.receive, peer.send))
+    await asyncio.sleep(0)
+    return task
+
+
+def test_limits_answer_503_with_retry_after():
+    manager = ConnectionManager(max_connections=3, max_per_agent=2, retry_after=7)
+    assert manager.stream("a").status_code == 200
+    assert manager.stream("a").status_code == 200
+    full_agent = manager.stream("a")
+    assert full_agent.status_code == 503
+    assert full_agent.headers["retry-after"] == "7"
+    assert manager.stream("b").status_code == 200
+    assert manager.stream("b").status_code == 503  # global limit
+    assert manager.stats()["rejected"] == 2
+    assert manager.stats()["perAgent"] == {"a": 2, "b": 1}
+
+
+def test_idle_stream_gets_keepalives_from_the_wheel_and_closes_on_disconnect():
+    async def run():
+        manager = ConnectionManager(keepalive_interval=0.05, tick=0.01)
+        peer = Peer()
+        task = await serve(manager.stream("a", b"data: {}\n\n"), peer)
+        await asyncio.sleep(0.2)
+        open_while_idle = manager.open
+        peer.gone.set()
+        await asyncio.wait_for(task, 1)
+        await asyncio.sleep(0.03)
+        return manager, peer, open_while_idle
+
+    manager, peer, open_while_idle = asyncio.run(run())
+    assert open_while_idle == 1
+    assert peer.messages[0]["type"] == "http.response.start"
+    assert peer.body.startswith(b"data: {}\n\n")
+    assert peer.body.count(KEEPALIVE) >= 2
+    assert manager.open == 0
+    assert manager._task is None  # the wheel stops once nothing is open
+
+
+def test_disconnect_cancels_the_body_iterator():
+    async def run():
+        done = asyncio.Event()
+
+        async def body():
+            try:
+                yield b"data: 1\n\n"
+                await asyncio.Event().wait()
+            finally:
+                done.set()
+
+        manager = ConnectionManager()
+        peer = Peer()
+        task = await serve(manager.stream("a", body()), peer)
+        await asyncio.sleep(0.01)
+        peer.gone.set()
+        await asyncio.wait_for(task, 1)
+        return manager, peer, done.is_set()
+
+    manager, peer, finalized = asyncio.run(run())
+    assert peer.body == b"data: 1\n\n"
+    assert finalized
+    assert manager.open == 0
+
+
+def test_finished_body_completes_the_response():
+    async def run():
+        async def body():
+            yield b"data: 1\n\n"
+
+        peer = Peer()
+        task = await serve(ConnectionManager().stream("a", body()), peer)
+        await asyncio.wait_for(task, 1)
+        return peer
+
+    peer = asyncio.run(run())
+    assert peer.messages[-1] == {"type": "http.response.body", "body": b"", "more_body": False}
+
+
+def test_peer_that_stops_reading_is_evicted():
+    async def run():
+        manager = ConnectionManager(keepalive_interval=0.04, tick=0.01)
+        peer = Peer(stall_writes=True)
+        task = await serve(manager.stream("a"), peer)
+        await asyncio.wait_for(task, 1)
+        return manager
+
+    manager = asyncio.run(run())
+    assert manager.evicted == 1
+    assert manager.open == 0
+
+
+def test_no_keepalive_while_a_body_write_is_pending():
+    async def run():
+        manager = ConnectionManager(keepalive_interval=0.2, tick=0.01)
+        peer = Peer()
+
+        async def body():
+            yield b"data: 1\n\n"
+            peer.drained.clear()  # the next write waits on a full socket buffer
+            yield b"data: 2\n\n"
+            await asyncio.Event().wait()
+
+        task = await serve(manager.stream("a", body()), peer)
+        await asyncio.sleep(0.15)  # idle long enough for a keepalive, not for eviction
+        keepalives = manager.keepalives
+        peer.drained.set()
+        await asyncio.sleep(0.01)
+        peer.gone.set()
+        await asyncio.wait_for(task, 1)
+        return peer, keepalives, manager.evicted
+
+    peer, keepalives, evicted = asyncio.run(run())
+    assert keepalives == 0 and evicted == 0
+    assert peer.body.startswith(b"data: 1\n\ndata: 2\n\n")
+
+
+def test_peer_that_stops_reading_during_a_body_write_is_evicted():
+    async def run():
+        manager = ConnectionManager(keepalive_interval=0.04, tick=0.01)
+        peer = Peer()
+
+        async def body():
+            n = 0
+            while True:
+                yield f"data: {n}\n\n".encode()
+                n += 1
+                if n == 2:
+                    peer.drained.clear()  # the client stops reading for good
+                await asyncio.sleep(0.005)
+
+        task = await serve(manager.stream("a", body()), peer)
+        await asyncio.wait_for(task, 1)
+        return manager
+
+    manager = asyncio.run(run())
+    assert manager.evicted == 1
+    assert manager.open == 0
@@ -0,0 +1,80 @@
+from a2ui_server import DataModelMirror, diff
+from a2ui_server.datamodel import get_at, set_at, split_pointer
+
+
+def paths(messages: list[dict]) -> list[str]:
+    return [m["path"] for m in messages]
+
+
+def test_pointer_tokens_are_unescaped():
+    assert split_pointer("/a~1b/c~0d") == ["a/b", "c~d"]
+    assert split_pointer("/") == []
+
+
+def test_set_at_copies_instead_of_mutating():
+    original = {"items": [{"name": "a"}]}
+    updated = set_at(original, ["items", "0", "name"], "b")
+    assert original == {"items": [{"name": "a"}]}
+    assert get_at(updated, ["items", "0", "name"]) == "b"
+
+
+def test_unchanged_value_emits_nothing():
+    mirror = DataModelMirror("s", {"a": {"b": [1, 2]}})
+    assert mirror.update("/a", {"b": [1, 2]}) == []
+
+
+def test_nested_scalar_change_is_path_scoped():
+    states = [{"id": str(i), "label": f"State {i}", "status": "pending"} for i in range(6)]
+    mirror = DataModelMirror("s", {"pipeline": {"states": states, "statusMessage": "Waiting"}})
+    new_states = [dict(s) for s in states]
+    new_states[2]["status"] = "active"
+    messages = mirror.update("/pipeline", {"states": new_states, "statusMessage": "Step 3"})
+    assert paths(messages) == ["/pipeline/states/2/status", "/pipeline/statusMessage"]
+    assert messages[0]["value"] == "active"
+    assert mirror.data["pipeline"]["states"][2]["status"] == "active"
+
+
+def test_bool_and_int_are_not_equal():
+    assert diff(1, True, "/flag") == [("/flag", True)]
+
+
+def test_removed_key_replaces_parent():
+    assert diff({"a": 1, "b": 2}, {"a": 1}, "/obj") == [("/obj", {"a": 1})]
+
+
+def test_shrinking_list_replaces_list():
+    assert diff([1, 2, 3], [1, 2], "/items") == [("/items", [1, 2])]
+
+
+def test_growing_list_appends_indices():
+    rows = [{"name": f"row {i}", "email": f"row{i}@example.com"} for i in range(50)]
+    extra = {"name": "new", "email": "new@example.com"}
+    assert diff(rows, rows + [extra], "/rows") == [("/rows/50", extra)]
+
+
+def test_large_diff_falls_back_to_full_replace():
+    old = [{"v": i} for i in range(10)]
+    new = [{"v": i + 1} for i in range(10)]
+    assert diff(old, new, "/items") == [("/items", new)]
+
+
+def test_patch_larger_than_value_falls_back_to_full_replace():
+    assert diff({"a": 1, "b": 2}, {"a": 3, "b": 4}, "/o") == [("/o", {"a": 3, "b": 4})]
+
+
+def test_root_replace_uses_slash_path():
+    mirror = DataModelMirror("s", {"a": 1, "b": 2})
+    assert paths(mirror.update("/", {"c": 3})) == ["/"]
+
+
+def test_missing_path_sends_value_as_is():
+    mirror = DataModelMirror("s")
+    assert mirror.update("/query", "x") == [
+        {"type": "updateDataModel", "surfaceId": "s", "path": "/query", "value": "x"},
+    ]
+
+
+def test_snapshot_reflects_updates():
+    mirror = DataModelMirror("s", {"a": 1})
+    mirror.update("/b", 2)
+    assert mirror.snapshot()["value"] == {"a": 1, "b": 2}
@@ -0,0 +1,80 @@
+import json
+
+from a2ui_server import SurfaceCache, set_encoder, sse
+from a2ui_server.encoding import stdlib_dumps
+
+
+def decode(body: bytes) -> list[dict]:
+    return [json.loads(line[len(b"data: "):]) for line in body.split(b"\n") if line.startswith(b"data: ")]
+
+
+def test_sse_frames_one_json_payload():
+    frame = sse({"type": "createSurface", "surfaceId": "s"})
+    assert frame.startswith(b"data: ")
+    assert frame.endswith(b"\n\n")
+    assert decode(frame) == [{"type": "createSurface", "surfaceId": "s"}]
+
+
+def test_set_encoder_swaps_and_restores():
+    set_encoder(lambda obj: b'{"x":1}')
+    try:
+        assert sse({"type": "anything"}) == b'data: {"x":1}\n\n'
+    finally:
+        set_encoder(None)
+    assert decode(sse({"a": "é"})) == [{"a": "é"}]
+    assert stdlib_dumps({"a": 1}) == b'{"a":1}'
+
+
+def test_prelude_concatenates_encoded_messages():
+    cache = SurfaceCache()
+    messages = [{"type": "createSurface", "surfaceId": "s"}, {"type": "updateComponents", "surfaceId": "s", "components": []}]
+    cache.define("s", messages)
+    assert decode(cache.prelude("s")) == messages
+
+
+def test_identical_definition_keeps_entry():
+    cache = SurfaceCache()
+    v1 = cache.define("s", [{"type": "createSurface", "surfaceId": "s"}])
+    body = cache.prelude("s")
+    v2 = cache.define("s", [{"type": "createSurface", "surfaceId": "s"}])
+    assert v1 == v2
+    assert cache.prelude("s") is body
+
+
+def test_changed_definition_replaces_entry():
+    cache = SurfaceCache()
+    v1 = cache.define("s", [{"type": "createSurface", "surfaceId": "s"}])
+    v2 = cache.define("s", [{"type": "createSurface", "surfaceId": "s", "sendDataModel": True}])
+    assert v1 != v2
+    assert cache.version("s") == v2
+    assert decode(cache.prelude("s"))[0]["sendDataModel"] is True
+
+
+def test_explicit_version_skips_reencoding():
+    cache = SurfaceCache()
+    cache.define("s", [{"type": "createSurface", "surfaceId": "s"}], version="1")
+    cache.define("s", [{"type": "createSurface", "surfaceId": "other"}], version="1")
+    assert decode(cache.prelude("s"))[0]["surfaceId"] == "s"
+
+
+def test_invalidate_removes_entry():
+    cache = SurfaceCache()
+    cache.define("s", [])
+    cache.invalidate("s")
+    assert "s" not in cache
+    assert cache.version("s") is None
+
+
+def test_prelude_ends_with_version_event_id():
+    cache = SurfaceCache()
+    version = cache.define("s", [{"type": "createSurface", "surfaceId": "s"}])
+    assert f"id: {version}\n".encode() in cache.prelude("s")
+    assert sse({"a": 1}, event_id=7) == b'id: 7\ndata: {"a":1}\n\n'
+
+
+def test_resume_skips_prelude_only_for_current_version():
+    cache = SurfaceCache()
+    version = cache.define("s", [{"type": "createSurface", "surfaceId": "s"}])
+    assert cache.resume("s", version) == b""
+    assert cache.resume("s", None) == cache.prelude("s")
+    assert cache.resume("s", "stale") == cache.prelude("s")
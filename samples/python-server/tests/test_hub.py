@@ -0,0 +1,113 @@
+import asyncio
+
+from a2ui_server import Broadcast, SlowConsumerPolicy, Subscription
+
+
+def test_drop_oldest_keeps_newest_frames():
+    sub = Subscription(2, SlowConsumerPolicy.DROP_OLDEST)
+    for frame in (b"1", b"2", b"3"):
+        sub.offer(frame)
+    assert sub.dropped == 1
+
+    async def drain():
+        return [await sub.get(), await sub.get()]
+
+    assert asyncio.run(drain()) == [b"2", b"3"]
+
+
+def test_coalesce_keeps_only_latest():
+    sub = Subscription(2, SlowConsumerPolicy.COALESCE)
+    for frame in (b"1", b"2", b"3"):
+        sub.offer(frame)
+    assert len(sub) == 1
+    assert asyncio.run(sub.get()) == b"3"
+
+
+def test_disconnect_closes_subscription():
+    sub = Subscription(1, SlowConsumerPolicy.DISCONNECT)
+    sub.offer(b"1")
+    sub.offer(b"2")
+    assert sub.closed
+
+    async def drain():
+        return [await sub.get(), await sub.get()]
+
+    assert asyncio.run(drain()) == [b"1", None]
+
+
+def test_one_producer_encodes_once_for_all_subscribers():
+    started = 0
+
+    async def producer(publish):
+        nonlocal started
+        started += 1
+        for i in range(3):
+            publish({"tick": i})
+            await asyncio.sleep(0)
+        await asyncio.Event().wait()
+
+    async def run():
+        hub = Broadcast(producer)
+        a, b = hub.subscribe(), hub.subscribe()
+        frames_a = [await a.get() for _ in range(3)]
+        frames_b = [await b.get() for _ in range(3)]
+        assert all(x is y for x, y in zip(frames_a, frames_b))
+        hub.unsubscribe(a)
+        hub.unsubscribe(b)
+        await asyncio.sleep(0)
+        return hub
+
+    hub = asyncio.run(run())
+    assert started == 1
+    assert len(hub) == 0
+    assert hub.latest is None
+
+
+def test_late_subscriber_starts_from_latest_frame():
+    async def producer(publish):
+        publish({"tick": 0})
+        publish({"tick": 1})
+        await asyncio.Event().wait()
+
+    async def run():
+        hub = Broadcast(producer)
+        first = hub.subscribe()
+        await first.get()
+        await first.get()
+        late = hub.subscribe()
+        frame = await late.get()
+        hub.unsubscribe(first)
+        hub.unsubscribe(late)
+        return frame
+
+    assert asyncio.run(run()).endswith(b'data: {"tick":1}\n\n')
+
+
+def test_stream_unsubscribes_when_consumer_stops():
+    async def producer(publish):
+        while True:
+            publish({"tick": 1})
+            await asyncio.sleep(0.01)
+
+    async def run():
+        hub = Broadcast(producer)
+        stream = hub.stream()
+        await stream.__anext__()
+        assert len(hub) == 1
+        await stream.aclose()
+        return hub
+
+    hub = asyncio.run(run())
+    assert len(hub) == 0
+
+
+def test_failed_producer_closes_subscribers():
+    async def producer(publish):
+        raise RuntimeError("boom")
+
+    async def run():
+        hub = Broadcast(producer)
+        sub = hub.subscribe()
+        return await asyncio.wait_for(sub.get(), 1)
+
+    assert asyncio.run(run()) is None
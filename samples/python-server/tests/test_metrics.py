@@ -0,0 +1,155 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+
+from a2ui_server import LoopLagMonitor, Metrics, MetricsMiddleware, sse
+from a2ui_server.encoding import DEFAULT_ENCODER
+from a2ui_server.metrics import LATENCY_BUCKETS
+
+
+def samples(metrics: Metrics) -> dict[str, float]:
+    out = {}
+    for line in metrics.render().decode().splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            out[name] = float(value)
+    return out
+
+
+def call(app, method: str, path: str) -> None:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": method, "path": path}
+    asyncio.run(app(scope, receive, send))
+
+
+def test_middleware_counts_frames_by_type_and_times_actions():
+    prelude = sse({"type": "createSurface", "surfaceId": "s"}) + sse({"type": "updateComponents", "surfaceId": "s"})
+    update = sse({"type": "updateDataModel", "surfaceId": "s", "path": "/", "value": {}}, event_id=7)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": prelude, "more_body": True})
+        await send({"type": "http.response.body", "body": update + b": keepalive\n\n", "more_body": True})
+        await send({"type": "http.response.body", "body": b"data: {}\n\n"})
+
+    metrics = Metrics()
+    metered = MetricsMiddleware(app, metrics)
+    call(metered, "GET", "/agents/demo")
+    call(metered, "POST", "/agents/demo")
+    call(metered, "GET", "/metrics")  # outside the prefix: not metered
+
+    s = samples(metrics)
+    assert s['a2ui_frames_sent_total{agent="demo",type="createSurface"}'] == 2
+    assert s['a2ui_frames_sent_total{agent="demo",type="updateComponents"}'] == 2
+    assert s['a2ui_frames_sent_total{agent="demo",type="updateDataModel"}'] == 2
+    assert s['a2ui_frames_sent_total{agent="demo",type="other"}'] == 2
+    assert s['a2ui_bytes_sent_total{agent="demo",type="createSurface"}'] == 2 * len(prelude.split(b"\n\n")[0] + b"\n\n")
+    assert s['a2ui_bytes_sent_total{agent="demo",type="updateComponents"}'] == 2 * len(prelude.split(b"\n\n")[1] + b"\n\n")
+    assert s['a2ui_bytes_sent_total{agent="demo",type="updateDataModel"}'] == 2 * len(update)
+    assert s['a2ui_bytes_sent_total{agent="demo",type="comment"}'] == 2 * len(b": keepalive\n\n")
+    assert s['a2ui_bytes_sent_total{agent="demo",type="other"}'] == 2 * 10
+    assert s['a2ui_action_seconds_count{agent="demo",status="200"}'] == 1  # only the POST
+    assert s['a2ui_action_seconds_bucket{agent="demo",status="200",le="+Inf"}'] == 1
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics()
+    for value in (0.0005, 0.003, 0.003, 10):
+        metrics.actions.observe(("a", "200"), value)
+    s = samples(metrics)
+    assert s['a2ui_action_seconds_bucket{agent="a",status="200",le="0.001"}'] == 1
+    assert s['a2ui_action_seconds_bucket{agent="a",status="200",le="0.005"}'] == 3
+    assert s[f'a2ui_action_seconds_bucket{{agent="a",status="200",le="{LATENCY_BUCKETS[-1]:g}"}}'] == 3
+    assert s['a2ui_action_seconds_bucket{agent="a",status="200",le="+Inf"}'] == 4
+    assert s['a2ui_action_seconds_count{agent="a",status="200"}'] == 4
+    assert s['a2ui_action_seconds_sum{agent="a",status="200"}'] == 10.0065
+
+
+def test_client_error_codes_are_bounded():
+    metrics = Metrics()
+    metrics.client_error("a", {"code": "VALIDATION_FAILED"})
+    metrics.client_error("a", {"code": 'x"}\n'})
+    for i in range(100):
+        metrics.client_error("a", {"code": f"CODE_{i}"})
+    s = samples(metrics)
+    assert s['a2ui_client_errors_total{agent="a",code="VALIDATION_FAILED"}'] == 1
+    assert s['a2ui_client_errors_total{agent="a",code="invalid"}'] == 1
+    assert s['a2ui_client_errors_total{agent="a",code="other"}'] == 100 - 63
+    assert len([k for k in s if k.startswith("a2ui_client_errors_total")]) == 64 + 2
+
+
+def test_gauges_are_read_at_scrape_time():
+    metrics = Metrics()
+    open_streams = {"gallery": 3}
+    metrics.gauge("open", "Open streams.", lambda: open_streams, ("agent",))
+    metrics.gauge("total", "A count kept elsewhere.", lambda: 5, kind="counter")
+    metrics.gauge("missing", "Not available.", lambda: None)
+    open_streams["gallery"] = 4
+    text = metrics.render().decode()
+    assert 'open{agent="gallery"} 4' in text
+    assert "# TYPE total counter" in text
+    assert "missing" not in text
+
+
+def test_timed_encoder_and_trace_file(tmp_path):
+    trace = tmp_path / "trace.json"
+    metrics = Metrics(trace_file=str(trace))
+    encode = metrics.timed(DEFAULT_ENCODER)
+    assert encode({"a": 1}) == DEFAULT_ENCODER({"a": 1})
+    metrics.action("demo", 200, 1.0, 1.25)
+    metrics.client_error("demo", {"code": "VALIDATION_FAILED", "message": "bad", "path": "/email"})
+    metrics.close()
+
+    s = samples(metrics)
+    assert s["a2ui_encode_seconds_count"] == 1
+    assert s["a2ui_encoded_bytes_total"] == len(b'{"a":1}')
+    events = json.loads(trace.read_text().rstrip().rstrip(",") + "]")
+    assert events[0]["ph"] == "X" and events[0]["dur"] == 250000
+    assert events[1]["args"]["path"] == "/email"
+
+
+def test_timed_encoder_counts_every_call_from_pool_threads():
+    metrics = Metrics()
+    encode = metrics.timed(DEFAULT_ENCODER)
+
+    def work():
+        for _ in range(20_000):
+            encode(1)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads mid-update as often as possible
+    try:
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+    s = samples(metrics)
+    assert s["a2ui_encode_seconds_count"] == s["a2ui_encoded_bytes_total"] == 80_000
+
+
+def test_loop_lag_monitor_sees_a_blocked_loop():
+    metrics = Metrics()
+    monitor = LoopLagMonitor(metrics, interval=0.01)
+
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)  # hog the loop
+        await asyncio.sleep(0.03)
+        monitor.stop()
+
+    asyncio.run(main())
+    s = samples(metrics)
+    assert s["a2ui_event_loop_lag_max_seconds"] >= 0.08
+    assert s["a2ui_event_loop_lag_seconds_count"] >= 3
+    assert s['a2ui_event_loop_lag_seconds_bucket{le="0.05"}'] < s["a2ui_event_loop_lag_seconds_count"]
@@ -0,0 +1,34 @@
+from a2ui_server import ListPager, dumps
+
+
+def test_window_is_bounded_by_page_size():
+    rows = list(range(120))
+    pager = ListPager(page_size=50)
+    assert pager.window(rows) == rows[:50]
+    assert pager.window(rows, 100) == rows[100:]
+    assert pager.window(rows, 120) == []
+
+
+def test_window_is_bounded_by_encoded_size():
+    rows = [{"text": "x" * 100} for _ in range(20)]
+    row_size = len(dumps(rows[0])) + 1
+    pager = ListPager(page_size=50, byte_budget=row_size * 3)
+    assert len(pager.window(rows)) == 3
+
+
+def test_window_always_makes_progress():
+    rows = [{"text": "x" * 1000}, {"text": "y"}]
+    pager = ListPager(byte_budget=10)
+    assert pager.window(rows) == rows[:1]
+    assert pager.window(rows, 1) == rows[1:]
+
+
+def test_extend_reports_progress():
+    rows = list(range(120))
+    pager = ListPager(page_size=50)
+    shown, page = pager.extend(rows, 0)
+    assert shown == rows[:50]
+    assert page == {"loaded": 50, "total": 120, "hasMore": True}
+    shown, page = pager.extend(rows, 100)
+    assert shown == rows
+    assert page == {"loaded": 120, "total": 120, "hasMore": False}
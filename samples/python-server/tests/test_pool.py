@@ -0,0 +1,106 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from a2ui_server import DeadlineExceeded, Disconnected, PoolFull, WorkPool
+
+process_pool = WorkPool(kind="process", workers=1)
+
+
+@process_pool.cpu_bound
+def worker_pid(x: int) -> tuple[int, int]:
+    return os.getpid(), x * 2
+
+
+def test_thread_pool_runs_off_the_loop():
+    pool = WorkPool(workers=2)
+
+    async def main():
+        return await pool.run(threading.get_ident), threading.get_ident()
+
+    worker, loop = asyncio.run(main())
+    pool.shutdown()
+    assert worker != loop
+    assert pool.stats()["completed"] == 1 and pool.pending == 0
+
+
+def test_admission_is_bounded():
+    pool = WorkPool(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        jobs = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(PoolFull):
+            await pool.run(release.wait)
+        release.set()
+        return await asyncio.gather(*jobs)
+
+    assert asyncio.run(main()) == [True, True]
+    pool.shutdown()
+    assert (pool.rejected, pool.completed) == (1, 2)
+
+
+def test_deadline_drops_a_queued_job():
+    pool = WorkPool(workers=1, deadline=0.05)
+    ran = []
+
+    async def main():
+        blocker = asyncio.ensure_future(pool.run(time.sleep, 0.2, deadline=None))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceeded):
+            await pool.run(ran.append, "late")
+        await blocker
+
+    asyncio.run(main())
+    pool.shutdown()
+    assert ran == [] and pool.timed_out == 1
+
+
+def test_disconnect_and_cancellation_abandon_the_job():
+    pool = WorkPool(workers=1)
+    release = threading.Event()
+
+    async def gone():
+        await asyncio.sleep(0.01)
+        return {"type": "http.disconnect"}
+
+    async def main():
+        with pytest.raises(Disconnected):
+            await pool.run(release.wait, receive=gone)
+        job = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        job.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await job
+        release.set()
+        while pool.pending:  # the abandoned jobs still end on their worker
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    pool.shutdown()
+    assert (pool.abandoned, pool.completed) == (2, 0)
+
+
+def test_inline_pool_runs_on_the_loop():
+    pool = WorkPool(kind="inline")
+
+    async def main():
+        return await pool.run(threading.get_ident), threading.get_ident()
+
+    worker, loop = asyncio.run(main())
+    assert worker == loop
+
+
+@pytest.mark.skipif(os.name != "posix", reason="worker processes are forked")
+def test_process_pool_calls_declared_functions_by_name():
+    async def main():
+        return await worker_pid(21)
+
+    pid, doubled = asyncio.run(main())
+    process_pool.shutdown()
+    assert pid != os.getpid() and doubled == 42
+    assert worker_pid.__name__ == "worker_pid"
@@ -0,0 +1,181 @@
+import asyncio
+import json
+
+from a2ui_server import Broadcast, DataModelMirror, ReplayLog, SlowConsumerPolicy
+from a2ui_server.datamodel import set_at, split_pointer
+
+STATES = ["received", "validating", "processing", "billing", "shipping", "delivered"]
+INITIAL = {"pipeline": {"states": [{"id": s, "label": s.title(), "status": "pending"} for s in STATES], "step": 0}}
+
+
+def events(body: bytes) -> list[tuple[str | None, dict]]:
+    """(event id, payload) for each SSE event in body."""
+    out = []
+    for block in body.split(b"\n\n"):
+        fields = dict(line.split(b": ", 1) for line in block.split(b"\n") if line)
+        if b"data" in fields:
+            event_id = fields.get(b"id")
+            out.append((event_id.decode() if event_id else None, json.loads(fields[b"data"])))
+    return out
+
+
+class Viewer:
+    """Applies updateDataModel frames the way the client does and tracks Last-Event-ID."""
+
+    def __init__(self, model: dict):
+        self.model = model
+        self.last_event_id: str | None = None
+
+    def apply(self, body: bytes) -> None:
+        for event_id, message in events(body):
+            self.model = set_at(self.model, split_pointer(message["path"]), message["value"])
+            if event_id is not None:
+                self.last_event_id = event_id
+
+
+def pipeline_hub(steps: asyncio.Queue, **kwargs) -> tuple[Broadcast, DataModelMirror]:
+    """A state-machine producer that advances one step per item put on `steps`."""
+    mirror = DataModelMirror("sm", INITIAL)
+
+    async def producer(publish):
+        mirror.reset(INITIAL)
+        step = 0
+        while True:
+            await steps.get()
+            step = (step + 1) % (len(STATES) + 1)
+            states = [{**s, "status": "completed" if i < step else "active" if i == step else "pending"}
+                      for i, s in enumerate(INITIAL["pipeline"]["states"])]
+            for message in mirror.update("/pipeline", {"states": states, "step": step}):
+                publish(message)
+
+    hub = Broadcast(producer, snapshot=mirror.snapshot, queue_size=64,
+                    policy=SlowConsumerPolicy.COALESCE, **kwargs)
+    return hub, mirror
+
+
+async def advance(steps: asyncio.Queue, n: int) -> None:
+    for _ in range(n):
+        steps.put_nowait(None)
+        while not steps.empty():
+            await asyncio.sleep(0)
+
+
+async def drain(sub, viewer: Viewer) -> None:
+    while len(sub):
+        viewer.apply(await sub.get())
+
+
+def test_ids_increase_and_since_returns_missed_frames():
+    log = ReplayLog()
+    frames = [log.append({"n": i}) for i in range(5)]
+    ids = [events(f)[0][0] for f in frames]
+    assert [int(i) for i in ids] == sorted(int(i) for i in ids)
+    assert log.since(ids[1]) == frames[2:]
+    assert log.since(ids[-1]) == []
+
+
+def test_log_is_bounded_by_count_and_bytes():
+    by_count = ReplayLog(max_messages=3)
+    ids = [events(by_count.append({"n": i}))[0][0] for i in range(5)]
+    assert len(by_count) == 3
+    assert by_count.since(ids[1]) is not None
+    assert by_count.since(ids[0]) is None
+
+    frame_size = len(ReplayLog().append({"pad": "x" * 100}))
+    by_bytes = ReplayLog(max_bytes=frame_size * 2)
+    for _ in range(5):
+        by_bytes.append({"pad": "x" * 100})
+    assert len(by_bytes) == 2
+
+
+def test_unknown_future_and_reset_ids_are_not_replayed():
+    log = ReplayLog()
+    last = events(log.append({"n": 0}))[0][0]
+    assert log.since(None) is None
+    assert log.since("garbage") is None
+    assert log.since(str(int(last) + 1)) is None
+    assert log.issued(last)
+    log.reset()
+    log.append({"n": 1})
+    assert log.since(last) is None
+    assert ReplayLog().since(last) is None  # an id from an earlier process
+
+
+def test_drop_mid_cycle_replays_only_missed_patches():
+    async def run():
+        steps = asyncio.Queue()
+        hub, mirror = pipeline_hub(steps)
+        keeper = hub.subscribe()  # keeps the run alive while the viewer is away
+        viewer = Viewer(INITIAL)
+        sub = hub.subscribe()
+        await advance(steps, 2)
+        await drain(sub, viewer)
+        hub.unsubscribe(sub)  # network drop halfway through the cycle
+
+        await advance(steps, 1)
+        missed = hub.replay.last_id - int(viewer.last_event_id)
+        assert hub.can_resume(viewer.last_event_id)
+        sub = hub.subscribe(viewer.last_event_id)
+        catch_up = await sub.get()
+        viewer.apply(catch_up)
+
+        await advance(steps, 4)  # past the end of the cycle and around again
+        await drain(sub, viewer)
+        hub.unsubscribe(sub)
+        hub.unsubscribe(keeper)
+        return viewer, mirror, events(catch_up), missed
+
+    viewer, mirror, catch_up, missed = asyncio.run(run())
+    assert viewer.model == mirror.data
+    assert len(catch_up) == missed > 1
+    assert all(m["path"] != "/" for _, m in catch_up)
+
+
+def test_drop_past_replay_buffer_resyncs_from_snapshot():
+    async def run():
+        steps = asyncio.Queue()
+        hub, mirror = pipeline_hub(steps, replay=ReplayLog(max_messages=2))
+        keeper = hub.subscribe()
+        viewer = Viewer(INITIAL)
+        sub = hub.subscribe()
+        await advance(steps, 1)
+        await drain(sub, viewer)
+        hub.unsubscribe(sub)
+
+        await advance(steps, 3)
+        sub = hub.subscribe(viewer.last_event_id)
+        frame = await sub.get()
+        viewer.apply(frame)
+        hub.unsubscribe(sub)
+        hub.unsubscribe(keeper)
+        return viewer, mirror, frame
+
+    viewer, mirror, frame = asyncio.run(run())
+    assert [m["path"] for _, m in events(frame)] == ["/"]
+    assert viewer.model == mirror.data
+
+
+def test_drop_as_only_viewer_resyncs_into_the_next_run():
+    async def run():
+        steps = asyncio.Queue()
+        hub, mirror = pipeline_hub(steps)
+        viewer = Viewer(INITIAL)
+        sub = hub.subscribe()
+        await advance(steps, 2)
+        await drain(sub, viewer)
+        hub.unsubscribe(sub)  # last viewer gone: the producer stops
+        idle = hub.can_resume(viewer.last_event_id)
+
+        other = hub.subscribe()  # a new run starts from the initial model
+        await advance(steps, 1)
+        sub = hub.subscribe(viewer.last_event_id)
+        frame = await sub.get()
+        viewer.apply(frame)
+        hub.unsubscribe(sub)
+        hub.unsubscribe(other)
+        return viewer, mirror, frame, idle
+
+    viewer, mirror, frame, idle = asyncio.run(run())
+    assert idle is False  # nothing to resume into: the route resends the prelude
+    assert [m["path"] for _, m in events(frame)] == ["/"]
+    assert viewer.model == mirror.data
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from a2ui_server import SearchIndex
+
+CONTACTS = [
+    {"name": "Alice Johnson", "department": "Engineering"},
+    {"name": "Bob Smith", "department": "Marketing"},
+    {"name": "Carol Williams", "department": "Engineering"},
+    {"name": "David Brown", "department": "Sales"},
+]
+
+
+def scan(rows, fields, query):
+    q = query.lower()
+    return [r for r in rows if any(q in str(r[f]).lower() for f in fields)]
+
+
+def test_matches_substrings_in_any_field_in_order():
+    index = SearchIndex(("name", "department"), CONTACTS)
+    assert index.search("eng") == [CONTACTS[0], CONTACTS[2]]
+    assert index.search("SMITH") == [CONTACTS[1]]
+    assert index.search("xyz") == []
+
+
+def test_short_and_empty_queries():
+    index = SearchIndex(("name", "department"), CONTACTS)
+    assert index.search("") == CONTACTS
+    assert index.search("bo") == [CONTACTS[1]]
+
+
+def test_match_cannot_span_fields():
+    index = SearchIndex(("name", "department"), [{"name": "ab", "department": "cd"}])
+    assert index.search("bc") == []
+
+
+def test_limit():
+    index = SearchIndex(("name", "department"), CONTACTS)
+    assert index.search("e", limit=1) == [CONTACTS[0]]
+
+
+def test_insert_and_delete_are_incremental():
+    index = SearchIndex(("name", "department"), CONTACTS)
+    row_id = index.insert({"name": "Eve Davis", "department": "Engineering"})
+    assert len(index.search("engineering")) == 3
+    index.delete(0)
+    assert index.search("engineering") == [CONTACTS[2], {"name": "Eve Davis", "department": "Engineering"}]
+    index.delete(row_id)
+    assert len(index) == 3
+    assert index.rows() == CONTACTS[1:]
+    with pytest.raises(KeyError):
+        index.delete(0)
+
+
+def test_agrees_with_linear_scan():
+    rng = random.Random(7)
+    words = ["alpha", "beta", "gamma", "delta", "omega", "sigma"]
+    rows = [{"name": " ".join(rng.sample(words, 2)), "department": rng.choice(words)} for _ in range(300)]
+    index = SearchIndex(("name", "department"), rows)
+    for row_id in rng.sample(range(300), 50):
+        index.delete(row_id)
+        rows[row_id] = None
+    live = [r for r in rows if r is not None]
+    for query in ["a", "ta", "eta", "ma ga", "Omega", "sig", "zzz", "lta"]:
+        assert index.search(query) == scan(live, ("name", "department"), query)
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+import server
+from a2ui_server import DeadlineExceeded, Disconnected, PoolFull, SearchIndex
+from a2ui_server.datamodel import set_at, split_pointer
+from bench.asgi import frames, request
+
+
+def initial_model(surface_id: str) -> dict:
+    return frames(server.surfaces.prelude(surface_id))[-1]["value"]
+
+
+def post(path: str, body: dict, headers: dict | None = None) -> tuple[int, bytes]:
+    return asyncio.run(request(server.app, "POST", path, body, headers))
+
+
+def post_with_headers(path: str, body: dict) -> tuple[int, dict, bytes]:
+    headers = {}
+
+    async def app(scope, receive, send):
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                headers.update((k.decode(), v.decode()) for k, v in message["headers"])
+            await send(message)
+        await server.app(scope, receive, capture)
+
+    status, out = asyncio.run(request(app, "POST", path, body))
+    return status, headers, out
+
+
+def search(model: dict, query: str) -> dict:
+    return {"version": "v0.9", "dataModel": model,
+            "action": {"name": "search", "surfaceId": "restaurant-finder", "sourceComponentId": "search-field",
+                       "context": {"value": query}}}
+
+
+def apply(model: dict, body: bytes) -> dict:
+    for message in frames(body):
+        model = set_at(model, split_pointer(message["path"]), message["value"])
+    return model
+
+
+@pytest.fixture
+def fresh_cache():
+    server.restaurant_cache.clear()
+    yield server.restaurant_cache
+    server.restaurant_cache.clear()
+
+
+def failing(error: Exception):
+    async def answer_search(*args, receive=None):
+        raise error
+    return answer_search
+
+
+@pytest.mark.parametrize("error, status, headers", [
+    (PoolFull(), 503, {"retry-after": "1"}),
+    (DeadlineExceeded(), 504, {}),
+])
+def test_search_answers_busy_and_late_with_an_error_status(monkeypatch, fresh_cache, error, status, headers):
+    monkeypatch.setattr(server, "answer_search", failing(error))
+    got, response_headers, body = post_with_headers("/agents/restaurant", search(initial_model("restaurant-finder"), "thai"))
+    assert got == status and body == b""
+    assert headers.items() <= response_headers.items()
+
+
+def test_search_for_a_client_that_left_answers_empty(monkeypatch, fresh_cache):
+    monkeypatch.setattr(server, "answer_search", failing(Disconnected()))
+    assert post("/agents/restaurant", search(initial_model("restaurant-finder"), "thai")) == (200, b"")
+
+
+def test_superseded_search_answers_empty(monkeypatch, fresh_cache):
+    real = server.answer_search
+    started = asyncio.Event()
+
+    async def answer_search(*args, receive=None):
+        if not started.is_set():
+            started.set()
+            await asyncio.Event().wait()  # still running when the next keystroke arrives
+        return await real(*args, receive=receive)
+
+    monkeypatch.setattr(server, "answer_search", answer_search)
+    model, session = initial_model("restaurant-finder"), {"A2UI-Session": "s1"}
+    superseded = server.search_lanes.superseded
+
+    async def run():
+        first = asyncio.ensure_future(request(server.app, "POST", "/agents/restaurant", search(model, "thai"), session))
+        await started.wait()
+        second = await request(server.app, "POST", "/agents/restaurant", search(model, "thai food"), session)
+        return await first, second
+
+    first, (status, body) = asyncio.run(run())
+    assert first == (200, b"")
+    assert status == 200 and apply(model, body)["query"] == "thai food"
+    assert server.search_lanes.superseded == superseded + 1
+
+
+def test_search_answers_are_cached_until_the_surface_is_redefined(monkeypatch, fresh_cache):
+    real, calls = server.answer_search, []
+
+    async def answer_search(*args, receive=None):
+        calls.append(args[3])
+        return await real(*args, receive=receive)
+
+    monkeypatch.setattr(server, "answer_search", answer_search)
+    body = search(initial_model("restaurant-finder"), "sushi")
+    first = post("/agents/restaurant", body)
+    assert post("/agents/restaurant", body) == first and calls == ["sushi"]
+    assert fresh_cache.hits == 1
+    server.define_restaurant_surface()
+    assert post("/agents/restaurant", body) == first and calls == ["sushi", "sushi"]
+
+
+def test_overlapping_search_replies_leave_the_last_answer():
+    _, body = post("/agents/restaurant", search(initial_model("restaurant-finder"), "zen"))
+    start = apply(initial_model("restaurant-finder"), body)  # one row, so a diff would patch it element-wise
+    # Both keystrokes echo the same model: the second was sent before the first reply arrived.
+    _, first = post("/agents/restaurant", search(start, "e"))
+    _, second = post("/agents/restaurant", search(start, "fork"))
+    model = apply(apply(start, first), second)
+    assert [r["name"] for r in model["restaurants"]] == ["The Golden Fork"]
+    assert model["page"]["total"] == 1 and model["query"] == "fork"
+
+
+def test_load_more_sends_the_grown_list_as_one_message():
+    people = [{"name": f"Person {i}", "email": f"p{i}@example.com", "department": "Sales"} for i in range(5000)]
+    original = server.contacts_index
+    server.contacts_index = SearchIndex(("name", "department"), people)
+    server.define_contacts_surface()
+    try:
+        model = initial_model("contacts")
+        for shown in (100, 150, 200, 250):
+            status, body = post("/agents/contacts", {"version": "v0.9", "dataModel": model, "action": {
+                "name": "loadMore", "surfaceId": "contacts", "sourceComponentId": "load-more-btn"}})
+            messages = frames(body)
+            assert status == 200 and [m["path"] for m in messages] == ["/query", "/contacts", "/page"]
+            model = apply(model, body)
+            assert len(model["contacts"]) == shown and model["page"]["loaded"] == shown
+    finally:
+        server.contacts_index = original
+        server.define_contacts_surface()
+
+
+def test_inserted_restaurant_is_found_once_the_surface_is_redefined(fresh_cache):
+    body = search(initial_model("restaurant-finder"), "noodle")
+    assert apply(initial_model("restaurant-finder"), post("/agents/restaurant", body)[1])["restaurants"] == []
+    row_id = server.restaurant_index.insert(
+        {"name": "Noodle Bar", "cuisine": "Chinese", "rating": 4.1, "priceRange": "$"})
+    try:
+        stale = apply(initial_model("restaurant-finder"), post("/agents/restaurant", body)[1])
+        assert stale["restaurants"] == []  # the cached answer, until the surface is redefined
+        server.define_restaurant_surface()
+        model = apply(initial_model("restaurant-finder"), post("/agents/restaurant", body)[1])
+        assert [r["name"] for r in model["restaurants"]] == ["Noodle Bar"]
+        assert model["page"]["total"] == 1
+    finally:
+        server.restaurant_index.delete(row_id)
+        server.define_restaurant_surface()
@@ -0,0 +1,135 @@
+import asyncio
+import zlib
+
+import pytest
+
+from a2ui_server import TransportMiddleware, sse
+from a2ui_server.actions import ResponseCache
+from a2ui_server.connections import KEEPALIVE
+from a2ui_server.transport import DeflateStream, negotiate_encoding, negotiate_format, sse_to_jsonl
+
+PRELUDE = sse({"type": "createSurface", "surfaceId": "s"}) + sse(
+    {"type": "updateComponents", "surfaceId": "s", "components": [{"id": f"c{i}", "component": "Text"} for i in range(20)]},
+    event_id="v1")
+UPDATES = [sse({"type": "updateDataModel", "surfaceId": "s", "path": f"/items/{i}", "value": "done"}, event_id=i)
+           for i in range(5)]
+LARGE = sse({"type": "updateDataModel", "surfaceId": "s", "path": "/rows",
+             "value": [{"name": f"Row {i}", "email": f"row{i}@example.com"} for i in range(5000)]})
+
+
+def call(app, headers: dict, path: str = "/agents/demo") -> tuple[dict, list[bytes]]:
+    """Run one request; returns the response headers and the body chunks as sent."""
+    scope = {"type": "http", "method": "GET", "path": path,
+             "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]}
+    started, chunks = {}, []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            started.update((k.decode(), v.decode()) for k, v in message["headers"])
+        else:
+            chunks.append(message["body"])
+
+    asyncio.run(app(scope, receive, send))
+    return started, chunks
+
+
+def streaming_app(chunks: list[bytes], headers: list | None = None):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": headers or [(b"content-type", b"text/event-stream; charset=utf-8")]})
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    return app
+
+
+def test_accept_chooses_the_format():
+    assert negotiate_format("") == "text/event-stream"
+    assert negotiate_format("*/*") == "text/event-stream"
+    assert negotiate_format("application/jsonl") == "application/jsonl"
+    assert negotiate_format("text/event-stream, application/jsonl;q=0.9") == "text/event-stream"
+    assert negotiate_format("application/jsonl, */*;q=0.5") == "application/jsonl"
+    assert negotiate_format("text/*;q=0.2, application/*") == "application/jsonl"
+
+
+def test_accept_encoding_chooses_the_coding():
+    available = ("gzip", "br", "deflate")
+    assert negotiate_encoding("", available) is None
+    assert negotiate_encoding("identity", available) is None
+    assert negotiate_encoding("gzip, deflate, br", available) == "gzip"  # ties go to server order
+    assert negotiate_encoding("deflate, gzip;q=0.5", available) == "deflate"
+    assert negotiate_encoding("br;q=0.9, *;q=0.1", available) == "br"
+    assert negotiate_encoding("gzip;q=0, deflate;q=0", available) is None
+    assert negotiate_encoding("br", ("gzip", "deflate")) is None
+
+
+@pytest.mark.parametrize("coding, wbits", [("gzip", 31), ("deflate", 15)])
+def test_every_chunk_decodes_as_soon_as_it_arrives(coding, wbits):
+    stream = DeflateStream(coding, ResponseCache())
+    decoder = zlib.decompressobj(wbits)
+    sent = [PRELUDE, *UPDATES[:2], KEEPALIVE, UPDATES[2], LARGE, *UPDATES[3:]]
+    for chunk in sent:
+        assert decoder.decompress(stream.compress(chunk)) == chunk
+        if chunk == KEEPALIVE:
+            stream.idle()
+    assert decoder.decompress(stream.finish()) == b""
+    assert decoder.eof and not decoder.unused_data  # the trailer checksum and size matched
+
+
+def test_first_chunks_are_compressed_once_and_shared():
+    shared = ResponseCache()
+    bodies = []
+    for _ in range(3):
+        stream = DeflateStream("gzip", shared)
+        bodies.append(stream.compress(PRELUDE) + stream.compress(UPDATES[0]) + stream.finish())
+    assert (shared.hits, len(shared)) == (2, 1)
+    assert all(zlib.decompress(b, 31) == PRELUDE + UPDATES[0] for b in bodies)
+
+
+def test_reused_large_chunks_are_recompressed_thoroughly():
+    shared, levels = ResponseCache(), ((1024, 6), (None, 1))
+    first = DeflateStream("deflate", shared, levels).compress(LARGE)
+    second = DeflateStream("deflate", shared, levels).compress(LARGE)
+    assert shared.get(LARGE)[0] == 6 and second != first
+    assert zlib.decompressobj(15).decompress(second) == LARGE
+
+
+def test_middleware_negotiates_jsonl_and_gzip():
+    app = TransportMiddleware(streaming_app([PRELUDE, KEEPALIVE, *UPDATES]))
+    headers, chunks = call(app, {"Accept": "application/jsonl", "Accept-Encoding": "gzip, br;q=0.5"})
+    assert headers["content-type"] == "application/jsonl; charset=utf-8"
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept, Accept-Encoding"
+    lines = zlib.decompress(b"".join(chunks), 31).split(b"\n")
+    assert lines[0] == PRELUDE[6:PRELUDE.index(b"\n")]
+    assert b"id:" not in b"".join(lines) and lines[2] == b""  # ids dropped, keepalive is an empty line
+    assert sse_to_jsonl(UPDATES[1]) == UPDATES[1].split(b"data: ")[1][:-1]
+
+
+def test_middleware_leaves_other_responses_alone():
+    small = streaming_app([UPDATES[0]], [(b"content-type", b"text/event-stream"),
+                                         (b"content-length", str(len(UPDATES[0])).encode())])
+    headers, chunks = call(TransportMiddleware(small), {"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in headers and headers["content-length"] == str(len(UPDATES[0]))
+    assert b"".join(chunks) == UPDATES[0]
+
+    json_app = streaming_app([b'{"open":1}'], [(b"content-type", b"application/json")])
+    headers, chunks = call(TransportMiddleware(json_app), {"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in headers and b"".join(chunks) == b'{"open":1}'
+
+    headers, chunks = call(TransportMiddleware(streaming_app([PRELUDE])), {"Accept-Encoding": "gzip"}, path="/other")
+    assert "content-encoding" not in headers and b"".join(chunks) == PRELUDE
+
+
+def test_brotli_when_installed():
+    brotli = pytest.importorskip("brotli")
+    app = TransportMiddleware(streaming_app([PRELUDE, *UPDATES]))
+    headers, chunks = call(app, {"Accept-Encoding": "br"})
+    assert headers["content-encoding"] == "br"
+    decoder = brotli.Decompressor()
+    assert decoder.process(chunks[0]) == PRELUDE  # flushed per chunk
+    assert b"".join(decoder.process(c) for c in chunks[1:]) == b"".join(UPDATES)
@@ -10,7 +10,8 @@ namespace A2UI.Blazor.Services;
 /// <summary>
 /// Connects to an A2UI agent endpoint, reads the JSONL/SSE stream,
 /// and dispatches messages to the SurfaceManager. Automatically
-/// reconnects with exponential backoff when the stream drops.
+/// reconnects with exponential backoff when the stream drops, sending
+/// the last SSE event id seen so the server can resume the stream.
 /// </summary>
 public sealed class A2UIStreamClient : IDisposable
 {
@@ -21,9 +22,17 @@ public sealed class A2UIStreamClient : IDisposable
     private readonly ILogger<A2UIStreamClient> _logger;
     private CancellationTokenSource? _cts;
 
+    // Identifies this client's actions to the server, which may cancel an
+    // older action from the same session when a newer one arrives.
+    private readonly string _sessionId = Guid.NewGuid().ToString("N");
+
     private const int MaxDelayMs = 30_000;
     private const int BaseDelayMs = 1_000;
 
+    // A stream that stays open this long without a message (only keepalives)
+    // still counts as healthy when it drops, so backoff starts over.
+    private const int HealthyStreamMs = 5_000;
+
     public A2UIStreamClient(HttpClient http, JsonlStreamReader reader, MessageDispatcher dispatcher, SurfaceManager surfaceManager, ILogger<A2UIStreamClient> logger)
     {
         _http = http;
@@ -43,6 +52,7 @@ public sealed class A2UIStreamClient : IDisposable
         _cts = new CancellationTokenSource();
         var token = _cts.Token;
         int attempt = 0;
+        string? lastEventId = null;
 
         while (!token.IsCancellationRequested)
         {
@@ -57,9 +67,13 @@ public sealed class A2UIStreamClient : IDisposable
                 _logger.LogInformation(LogEvents.Reconnecting, "Reconnecting to {AgentPath} (attempt {Attempt})", agentPath, attempt);
             }
 
+            long openedAt = -1;
+
             try
             {
                 var request = new HttpRequestMessage(HttpMethod.Get, agentPath);
+                if (lastEventId is not null)
+                    request.Headers.TryAddWithoutValidation("Last-Event-ID", lastEventId);
                 EnableBrowserStreaming(request);
                 var response = await _http.SendAsync(request, HttpCompletionOption.ResponseHeadersRead, token);
 
@@ -75,14 +89,18 @@ public sealed class A2UIStreamClient : IDisposable
 
                 var stream = await response.Content.ReadAsStreamAsync(token);
 
-                await foreach (var message in _reader.ReadMessagesAsync(stream, token))
+                // A resumed stream may have nothing to replay, so the connection
+                // counts as established once the server has accepted it. Backoff
+                // only starts over once the stream proves healthy, though: a server
+                // that accepts and then drops every stream must not be retried
+                // at the base delay forever.
+                openedAt = Environment.TickCount64;
+                _logger.LogInformation(LogEvents.Connected, "Connected to {AgentPath}", agentPath);
+                SetState(StreamConnectionState.Connected);
+
+                await foreach (var message in _reader.ReadMessagesAsync(stream, id => { lastEventId = id; attempt = 0; }, token))
                 {
-                    if (State != StreamConnectionState.Connected)
-                    {
-                        attempt = 0;
-                        _logger.LogInformation(LogEvents.Connected, "Connected to {AgentPath}", agentPath);
-                        SetState(StreamConnectionState.Connected);
-                    }
+                    attempt = 0;
                     _dispatcher.Dispatch(message);
                 }
 
@@ -110,6 +128,10 @@ public sealed class A2UIStreamClient : IDisposable
 
             if (token.IsCancellationRequested) break;
 
+            // Long enough open to count as healthy: retry as after a stream that delivered messages.
+            if (openedAt >= 0 && Environment.TickCount64 - openedAt >= HealthyStreamMs)
+                attempt = 1;
+
             var delay = ComputeDelay(attempt);
             _logger.LogDebug("Delaying {DelayMs}ms before reconnect attempt {Attempt}", delay, attempt + 1);
             SetState(StreamConnectionState.Reconnecting);
@@ -145,6 +167,7 @@ public sealed class A2UIStreamClient : IDisposable
             var request = new HttpRequestMessage(HttpMethod.Post, agentPath);
             request.Content = JsonContent.Create(envelope);
             request.Headers.Add("A2UI-Client-Capabilities", s_capabilitiesJson);
+            request.Headers.Add("A2UI-Session", _sessionId);
             EnableBrowserStreaming(request);
 
             var response = await _http.SendAsync(request, HttpCompletionOption.ResponseHeadersRead);
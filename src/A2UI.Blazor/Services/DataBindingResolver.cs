@@ -75,7 +75,9 @@ public sealed class DataBindingResolver
 
     /// <summary>
     /// Set a value at a JSON Pointer path, returning a new root element.
-    /// Creates intermediate objects as needed.
+    /// Creates intermediate objects as needed. Inside an array, a numeric
+    /// segment replaces that element, and an index equal to the array length
+    /// (or "-") appends a new element.
     /// </summary>
     public static JsonElement SetValueAtPath(JsonElement? root, string path, JsonElement value)
     {
@@ -135,6 +137,21 @@ public sealed class DataBindingResolver
             }
             writer.WriteEndObject();
         }
+        else if (current.ValueKind == JsonValueKind.Array && TryGetArrayIndex(current, segment, out var index))
+        {
+            writer.WriteStartArray();
+            var i = 0;
+            foreach (var item in current.EnumerateArray())
+            {
+                if (i++ == index)
+                    WriteElementWithUpdate(writer, item, segments, depth, isLast, value);
+                else
+                    item.WriteTo(writer);
+            }
+            if (index == current.GetArrayLength())
+                WriteElementWithUpdate(writer, default, segments, depth, isLast, value);
+            writer.WriteEndArray();
+        }
         else
         {
             // Current isn't an object — create one
@@ -147,4 +164,30 @@ public sealed class DataBindingResolver
             writer.WriteEndObject();
         }
     }
+
+    private static void WriteElementWithUpdate(
+        Utf8JsonWriter writer,
+        JsonElement current,
+        string[] segments,
+        int depth,
+        bool isLast,
+        JsonElement value)
+    {
+        if (isLast)
+            value.WriteTo(writer);
+        else
+            WriteWithUpdate(writer, current, segments, depth + 1, value);
+    }
+
+    private static bool TryGetArrayIndex(JsonElement array, string segment, out int index)
+    {
+        var length = array.GetArrayLength();
+        if (segment == "-")
+        {
+            index = length;
+            return true;
+        }
+
+        return int.TryParse(segment, out index) && index >= 0 && index <= length;
+    }
 }
@@ -27,11 +27,23 @@ public sealed class JsonlStreamReader
     /// Read messages from a stream (typically an HTTP response body).
     /// Each non-empty line is parsed as a JSON object.
     /// </summary>
+    public IAsyncEnumerable<A2UIMessage> ReadMessagesAsync(
+        Stream stream,
+        CancellationToken cancellationToken = default)
+        => ReadMessagesAsync(stream, onEventId: null, cancellationToken);
+
+    /// <summary>
+    /// Read messages from a stream, reporting SSE <c>id:</c> fields through
+    /// <paramref name="onEventId"/> once the message they belong to has been
+    /// consumed. SSE <c>event:</c> and <c>retry:</c> fields are ignored.
+    /// </summary>
     public async IAsyncEnumerable<A2UIMessage> ReadMessagesAsync(
         Stream stream,
+        Action<string>? onEventId,
         [System.Runtime.CompilerServices.EnumeratorCancellation] CancellationToken cancellationToken = default)
     {
         using var reader = new StreamReader(stream);
+        string? pendingEventId = null;
 
         while (!cancellationToken.IsCancellationRequested)
         {
@@ -42,8 +54,28 @@ public sealed class JsonlStreamReader
 
             line = line.Trim();
 
-            if (line.Length == 0 || line.StartsWith(':'))
-                continue; // skip empty lines and SSE comments
+            if (line.Length == 0)
+            {
+                // End of an SSE event; an id-only event still updates the last id.
+                if (pendingEventId is not null)
+                {
+                    onEventId?.Invoke(pendingEventId);
+                    pendingEventId = null;
+                }
+                continue;
+            }
+
+            if (line.StartsWith(':'))
+                continue; // skip SSE comments
+
+            if (line.StartsWith("id:", StringComparison.Ordinal))
+            {
+                pendingEventId = line["id:".Length..].TrimStart();
+                continue;
+            }
+
+            if (line.StartsWith("event:", StringComparison.Ordinal) || line.StartsWith("retry:", StringComparison.Ordinal))
+                continue;
 
             // SSE format: strip "data: " prefix if present
             if (line.StartsWith("data: ", StringComparison.Ordinal))
@@ -67,6 +99,12 @@ public sealed class JsonlStreamReader
 
             if (message is not null)
                 yield return message;
+
+            if (pendingEventId is not null)
+            {
+                onEventId?.Invoke(pendingEventId);
+                pendingEventId = null;
+            }
         }
     }
 }
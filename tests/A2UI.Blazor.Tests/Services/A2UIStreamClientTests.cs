@@ -125,6 +125,67 @@ public class A2UIStreamClientTests
         Assert.Contains(StreamConnectionState.Reconnecting, states);
     }
 
+    [Fact]
+    public async Task ConnectAsync_Reconnect_SendsLastEventId()
+    {
+        var lastEventIds = new List<string?>();
+        var sse = "id: 7\ndata: {\"type\":\"createSurface\",\"surfaceId\":\"s1\"}\n\n";
+
+        var client = CreateClient(req =>
+        {
+            lastEventIds.Add(req.Headers.TryGetValues("Last-Event-ID", out var values) ? values.Single() : null);
+            return Task.FromResult(OkResponse(sse));
+        });
+
+        client.OnStateChanged += s =>
+        {
+            if (s == StreamConnectionState.Connected && lastEventIds.Count >= 2)
+                client.Disconnect();
+        };
+
+        await client.ConnectAsync("/test");
+
+        Assert.Null(lastEventIds[0]);
+        Assert.Equal("7", lastEventIds[1]);
+    }
+
+    [Fact]
+    public async Task ConnectAsync_ResumedStreamWithoutMessages_IsConnected()
+    {
+        var states = new List<StreamConnectionState>();
+        var client = CreateClient(_ => Task.FromResult(OkResponse(": keepalive\n\n")));
+        client.OnStateChanged += s =>
+        {
+            states.Add(s);
+            if (s == StreamConnectionState.Connected)
+                client.Disconnect();
+        };
+
+        await client.ConnectAsync("/test");
+
+        Assert.Contains(StreamConnectionState.Connected, states);
+    }
+
+    [Fact]
+    public async Task ConnectAsync_StreamsDroppedBeforeAnyMessage_KeepBackingOff()
+    {
+        // The server accepts every stream and closes it at once: each retry
+        // must wait longer than the last, not start over at the base delay.
+        var attempts = new List<int>();
+        var logger = new RecordingLogger();
+        var client = CreateClient(_ => Task.FromResult(OkResponse("")), logger);
+        logger.OnDelay = attempt =>
+        {
+            attempts.Add(attempt);
+            if (attempts.Count == 2)
+                client.Disconnect();
+        };
+
+        await client.ConnectAsync("/test");
+
+        Assert.Equal(new[] { 2, 3 }, attempts);
+    }
+
     [Theory]
     [InlineData(0, 800, 1200)]      // 1s ±20%
     [InlineData(1, 1600, 2400)]     // 2s ±20%
@@ -212,6 +273,28 @@ public class A2UIStreamClientTests
         Assert.True(doc.RootElement.TryGetProperty("v0.9", out _));
     }
 
+    [Fact]
+    public async Task SendActionAsync_IncludesStableSessionHeader()
+    {
+        var sessions = new List<string?>();
+        Func<HttpRequestMessage, Task<HttpResponseMessage>> handler = req =>
+        {
+            sessions.Add(req.Headers.TryGetValues("A2UI-Session", out var values) ? values.Single() : null);
+            return Task.FromResult(OkResponse(""));
+        };
+        var client = CreateClient(handler);
+        var other = CreateClient(handler);
+        var action = new A2UIUserAction { Name = "search", SurfaceId = "s1", SourceComponentId = "c1" };
+
+        await client.SendActionAsync("/test", action);
+        await client.SendActionAsync("/test", action);
+        await other.SendActionAsync("/test", action);
+
+        Assert.NotNull(sessions[0]);
+        Assert.Equal(sessions[0], sessions[1]);
+        Assert.NotEqual(sessions[0], sessions[2]);
+    }
+
     [Fact]
     public async Task SendActionAsync_IncludesDataModel_WhenSendDataModelTrue()
     {
@@ -400,14 +483,15 @@ public class A2UIStreamClientTests
 
     // --- Helpers ---
 
-    private static A2UIStreamClient CreateClient(Func<HttpRequestMessage, Task<HttpResponseMessage>> handler)
+    private static A2UIStreamClient CreateClient(Func<HttpRequestMessage, Task<HttpResponseMessage>> handler,
+        ILogger<A2UIStreamClient>? logger = null)
     {
-        var (client, _) = CreateClientWithManager(handler);
+        var (client, _) = CreateClientWithManager(handler, logger);
         return client;
     }
 
     private static (A2UIStreamClient Client, SurfaceManager Manager) CreateClientWithManager(
-        Func<HttpRequestMessage, Task<HttpResponseMessage>> handler)
+        Func<HttpRequestMessage, Task<HttpResponseMessage>> handler, ILogger<A2UIStreamClient>? logger = null)
     {
         var http = new HttpClient(new DelegateHandler(handler))
         {
@@ -416,8 +500,7 @@ public class A2UIStreamClientTests
         var manager = new SurfaceManager(NullLogger<SurfaceManager>.Instance);
         var dispatcher = new MessageDispatcher(manager, NullLogger<MessageDispatcher>.Instance);
         var reader = new JsonlStreamReader(NullLogger<JsonlStreamReader>.Instance);
-        var logger = NullLogger<A2UIStreamClient>.Instance;
-        return (new A2UIStreamClient(http, reader, dispatcher, manager, logger), manager);
+        return (new A2UIStreamClient(http, reader, dispatcher, manager, logger ?? NullLogger<A2UIStreamClient>.Instance), manager);
     }
 
     private static HttpResponseMessage OkResponse(string body)
@@ -428,6 +511,24 @@ public class A2UIStreamClientTests
         };
     }
 
+    /// <summary>Reports the attempt number of each "Delaying ... before reconnect attempt" log.</summary>
+    private sealed class RecordingLogger : ILogger<A2UIStreamClient>
+    {
+        public Action<int>? OnDelay { get; set; }
+
+        public IDisposable? BeginScope<TState>(TState state) where TState : notnull => null;
+        public bool IsEnabled(LogLevel logLevel) => true;
+        public void Log<TState>(LogLevel logLevel, EventId eventId, TState state, Exception? exception, Func<TState, Exception?, string> formatter)
+        {
+            if (state is IReadOnlyList<KeyValuePair<string, object?>> values
+                && formatter(state, exception).StartsWith("Delaying")
+                && values.FirstOrDefault(v => v.Key == "Attempt").Value is int attempt)
+            {
+                OnDelay?.Invoke(attempt);
+            }
+        }
+    }
+
     private sealed class DelegateHandler : HttpMessageHandler
     {
         private readonly Func<HttpRequestMessage, Task<HttpResponseMessage>> _handler;
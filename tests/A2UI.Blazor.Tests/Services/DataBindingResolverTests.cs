@@ -176,4 +176,42 @@ public class DataBindingResolverTests
         var result = DataBindingResolver.SetValueAtPath(null, "/greeting", newVal);
         Assert.Equal("hello", result.GetProperty("greeting").GetString());
     }
+
+    [Fact]
+    public void SetValueAtPath_ArrayIndex_ReplacesElement()
+    {
+        var root = Parse("""{"items":["a","b","c"]}""");
+        var newVal = JsonSerializer.SerializeToElement("B");
+        var result = DataBindingResolver.SetValueAtPath(root, "/items/1", newVal);
+        Assert.Equal("""["a","B","c"]""", result.GetProperty("items").GetRawText());
+    }
+
+    [Fact]
+    public void SetValueAtPath_PropertyInsideArrayElement_PatchesOnlyThatElement()
+    {
+        var root = Parse("""{"states":[{"id":"a","status":"pending"},{"id":"b","status":"pending"}]}""");
+        var newVal = JsonSerializer.SerializeToElement("active");
+        var result = DataBindingResolver.SetValueAtPath(root, "/states/1/status", newVal);
+        var states = result.GetProperty("states");
+        Assert.Equal(JsonValueKind.Array, states.ValueKind);
+        Assert.Equal("pending", states[0].GetProperty("status").GetString());
+        Assert.Equal("active", states[1].GetProperty("status").GetString());
+        Assert.Equal("b", states[1].GetProperty("id").GetString());
+    }
+
+    [Fact]
+    public void SetValueAtPath_IndexEqualToLength_AppendsElement()
+    {
+        var root = Parse("""{"items":[1,2]}""");
+        var result = DataBindingResolver.SetValueAtPath(root, "/items/2", Parse("3"));
+        Assert.Equal("[1,2,3]", result.GetProperty("items").GetRawText());
+    }
+
+    [Fact]
+    public void SetValueAtPath_DashSegment_AppendsElement()
+    {
+        var root = Parse("""{"items":[1,2]}""");
+        var result = DataBindingResolver.SetValueAtPath(root, "/items/-", Parse("3"));
+        Assert.Equal("[1,2,3]", result.GetProperty("items").GetRawText());
+    }
 }
@@ -114,6 +114,47 @@ data: {"type":"updateComponents","surfaceId":"s1","components":[]}
         Assert.Equal("updateComponents", messages[2].Type);
     }
 
+    [Fact]
+    public async Task ReadMessages_SseIdEventAndRetryFields_AreNotParsedAsJson()
+    {
+        var messages = await ReadAll("""
+retry: 1000
+event: message
+id: 41
+data: {"type":"createSurface","surfaceId":"s1"}
+
+""");
+        Assert.Single(messages);
+        Assert.Equal("createSurface", messages[0].Type);
+    }
+
+    [Fact]
+    public async Task ReadMessages_ReportsEventIdAfterItsMessage()
+    {
+        var content = """
+id: 41
+data: {"type":"createSurface","surfaceId":"s1"}
+
+data: {"type":"updateComponents","surfaceId":"s1","components":[]}
+
+id: 42
+data: {"type":"updateDataModel","surfaceId":"s1","path":"/"}
+
+""";
+        var seen = new List<(string Type, string? LastId)>();
+        string? lastId = null;
+        await foreach (var msg in _reader.ReadMessagesAsync(ToStream(content), id => lastId = id))
+        {
+            seen.Add((msg.Type, lastId));
+        }
+
+        Assert.Equal(3, seen.Count);
+        Assert.Null(seen[0].LastId);
+        Assert.Equal("41", seen[1].LastId);
+        Assert.Equal("41", seen[2].LastId);
+        Assert.Equal("42", lastId);
+    }
+
     [Fact]
     public async Task ReadMessages_EmptyStream_ReturnsNothing()
     {